@@ -0,0 +1,84 @@
+# analytics.py
+import sqlite3
+import threading
+import time
+from typing import Optional
+from config import ANALYTICS_MIN_REFRESH_SECONDS, ANALYTICS_BACKUP_PAGES
+from database import get_write_generation
+from storage import connect_db
+
+class AnalyticsSnapshot:
+    """
+    In-memory copy of the exercise log for long analytical reads.
+
+    The copy is taken with the backup API a few pages at a time, so the database
+    file is only read-locked for one short step at a time, and it is refreshed
+    only when the write generation has moved. Queries against the copy never
+    hold locks on the database file, so they cannot delay logging.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        min_refresh_seconds: float = ANALYTICS_MIN_REFRESH_SECONDS,
+        pages: int = ANALYTICS_BACKUP_PAGES
+    ):
+        self.db_path = db_path
+        self.min_refresh_seconds = min_refresh_seconds
+        self.pages = pages
+        self.generation = None
+        self.refreshed_at = None
+        self.refresh_seconds = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Return the snapshot connection, refreshing it first if the database changed.
+
+        Callers keep using the connection they got even if a refresh happens
+        meanwhile; a refresh swaps in a new copy instead of overwriting this one.
+        """
+        generation = get_write_generation()
+        with self._lock:
+            if self._conn is None or (
+                generation != self.generation
+                and time.monotonic() - self.refreshed_at >= self.min_refresh_seconds
+            ):
+                self._refresh(generation)
+            return self._conn
+
+    def _refresh(self, generation: int):
+        started = time.perf_counter()
+        snapshot = sqlite3.connect(':memory:', check_same_thread=False)
+        source = connect_db(self.db_path)
+        try:
+            # Each step takes and releases its own read lock; a write between
+            # steps makes the next step restart the copy, so the result is consistent
+            source.backup(snapshot, pages=self.pages)
+        except Exception as e:
+            snapshot.close()
+            raise e
+        finally:
+            source.close()
+        snapshot.execute('PRAGMA query_only = ON')
+
+        self._conn = snapshot
+        self.generation = generation
+        self.refreshed_at = time.monotonic()
+        self.refresh_seconds = time.perf_counter() - started
+
+_snapshot: Optional[AnalyticsSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+def get_analytics_snapshot() -> AnalyticsSnapshot:
+    """The process-wide snapshot shared by every session"""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = AnalyticsSnapshot()
+        return _snapshot
+
+def analytics_connection() -> sqlite3.Connection:
+    """Connection to a current in-memory copy of the database, for read-only pages"""
+    return get_analytics_snapshot().connection()
@@ -0,0 +1,356 @@
+# api_server.py
+import argparse
+import asyncio
+import base64
+import functools
+import json
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from config import (
+    FAMILY_MEMBERS, EXERCISE_TYPES, API_HOST, API_PORT,
+    API_MAX_WORKERS, API_BATCH_SIZE, API_BATCH_WINDOW_MS
+)
+from database import (
+    init_db, add_exercises_batch, get_exercises, get_goals, get_personal_bests,
+    get_activity_heatmap
+)
+
+STATUS_TEXT = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ExerciseAPIServer:
+    """
+    Minimal asyncio HTTP/1.1 server exposing the database operations as JSON.
+
+    Blocking SQLite calls run in a bounded thread pool. Exercise logs that
+    arrive together are queued and committed in one transaction per batch.
+    """
+
+    def __init__(
+        self,
+        host: str = API_HOST,
+        port: int = API_PORT,
+        max_workers: int = API_MAX_WORKERS,
+        batch_size: int = API_BATCH_SIZE,
+        batch_window_ms: int = API_BATCH_WINDOW_MS
+    ):
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='api-db')
+        self.routes = {
+            ('POST', '/exercises'): self.log_exercise,
+            ('GET', '/exercises'): self.list_exercises,
+            ('GET', '/goals'): self.list_goals,
+            ('GET', '/personal_bests'): self.list_personal_bests,
+            ('GET', '/heatmap'): self.activity_heatmap,
+            ('GET', '/health'): self.health
+        }
+
+    async def serve_forever(self) -> None:
+        """Start listening and the batch writer, then serve until cancelled."""
+        self.db_slots = asyncio.Semaphore(self.max_workers)
+        self.log_queue = asyncio.Queue()
+        writer_task = asyncio.create_task(self._batch_writer())
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Exercise API listening on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self.executor.shutdown(wait=True)
+
+    async def run_db(self, func, *args, **kwargs) -> Any:
+        """Run a blocking database call in the executor, bounded to max_workers at a time."""
+        loop = asyncio.get_running_loop()
+        async with self.db_slots:
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+
+    # Connection handling
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, query, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                try:
+                    handler = self.routes.get((method, path))
+                    if handler is None:
+                        if any(route_path == path for _, route_path in self.routes):
+                            raise HTTPError(405, f"{method} not allowed on {path}")
+                        raise HTTPError(404, f"No endpoint {path}")
+                    status, payload = await handler(query, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': e.message}
+                except Exception:
+                    # Database failures and bugs: log them, don't hand internals to the client
+                    traceback.print_exc()
+                    status, payload = 500, {'error': STATUS_TEXT[500]}
+
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), url.path.rstrip('/') or '/', query, headers, body
+
+    async def _write_response(
+        self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool
+    ) -> None:
+        body = (payload if isinstance(payload, str) else json.dumps(payload, default=str)).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    # Batched exercise logging
+
+    async def _batch_writer(self) -> None:
+        """Drain queued exercise logs and commit them in batches."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.log_queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.log_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            entries = [entry for entry, _ in batch]
+            try:
+                results = await self.run_db(add_exercises_batch, entries)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    # Endpoints
+
+    async def log_exercise(self, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        entry = _parse_exercise(body)
+        future = asyncio.get_running_loop().create_future()
+        await self.log_queue.put((entry, future))
+        try:
+            exercise_id, achievements = await future
+        except sqlite3.IntegrityError as e:
+            raise HTTPError(409, str(e))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return 201, {'id': exercise_id, 'achievements': achievements}
+
+    async def list_exercises(self, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        df = await self.run_db(
+            get_exercises,
+            family_member=query.get('family_member'),
+            start_date=query.get('start_date'),
+            end_date=query.get('end_date'),
+            exercise_type=query.get('exercise_type')
+        )
+        return 200, df.to_json(orient='records')
+
+    async def list_goals(self, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        df = await self.run_db(
+            get_goals,
+            family_member=query.get('family_member'),
+            status=query.get('status', 'active')
+        )
+        return 200, df.to_json(orient='records')
+
+    async def list_personal_bests(self, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        df = await self.run_db(
+            get_personal_bests,
+            family_member=query.get('family_member'),
+            exercise_type=query.get('exercise_type')
+        )
+        return 200, df.to_json(orient='records')
+
+    async def activity_heatmap(self, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        """Raw per-year heatmap arrays, base64 encoded: a 366-bit day bitset and one intensity byte per day."""
+        if not query.get('family_member'):
+            raise HTTPError(400, "Missing parameter: family_member")
+        try:
+            years = [int(year) for year in query['years'].split(',')] if query.get('years') else None
+        except ValueError:
+            raise HTTPError(400, "years must be comma separated integers")
+
+        heatmaps = await self.run_db(
+            get_activity_heatmap,
+            query['family_member'],
+            exercise_type=query.get('exercise_type'),
+            years=years
+        )
+        return 200, {
+            'family_member': query['family_member'],
+            'exercise_type': query.get('exercise_type'),
+            'years': {
+                year: {
+                    'active': base64.b64encode(heatmap['active']).decode('ascii'),
+                    'intensity': base64.b64encode(heatmap['intensity']).decode('ascii'),
+                    'active_days': heatmap['active_days']
+                }
+                for year, heatmap in heatmaps.items()
+            }
+        }
+
+    async def health(self, query: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        return 200, {'status': 'ok', 'queued_logs': self.log_queue.qsize()}
+
+
+def _parse_exercise(body: bytes) -> Dict[str, Any]:
+    """Validate a JSON exercise log and convert it to add_exercise keyword arguments."""
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, "Body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Body must be a JSON object")
+
+    for field in ('family_member', 'exercise_type'):
+        if not data.get(field):
+            raise HTTPError(400, f"Missing field: {field}")
+    if data['family_member'] not in FAMILY_MEMBERS:
+        raise HTTPError(400, f"Unknown family member: {data['family_member']}")
+    if data['exercise_type'] not in EXERCISE_TYPES:
+        raise HTTPError(400, f"Unknown exercise type: {data['exercise_type']}")
+
+    try:
+        day = date.fromisoformat(data.get('date') or date.today().isoformat())
+    except (TypeError, ValueError):
+        raise HTTPError(400, "date must be YYYY-MM-DD")
+
+    entry = {
+        'family_member': data['family_member'],
+        'date': day.isoformat(),
+        'exercise_type': data['exercise_type'],
+        'notes': data.get('notes'),
+        'feeling': data.get('feeling')
+    }
+    for field in ('reps_per_set', 'seconds_per_set'):
+        values = data.get(field)
+        if values is not None and not (
+            isinstance(values, list) and all(isinstance(v, int) and v >= 0 for v in values)
+        ):
+            raise HTTPError(400, f"{field} must be a list of non-negative integers")
+        entry[field] = values
+
+    sets = data.get('sets')
+    if sets is None:
+        sets = len(entry['reps_per_set'] or entry['seconds_per_set'] or []) or None
+        if sets is None:
+            raise HTTPError(400, "Missing field: sets (or reps_per_set / seconds_per_set)")
+    elif not isinstance(sets, int) or isinstance(sets, bool) or sets < 1:
+        raise HTTPError(400, "sets must be a positive integer")
+    for field in ('reps_per_set', 'seconds_per_set'):
+        if entry[field] is not None and len(entry[field]) != sets:
+            raise HTTPError(400, f"{field} must have one value per set ({sets})")
+    entry['sets'] = sets
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Standalone JSON API for the exercise log")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_MAX_WORKERS,
+                        help="Threads running blocking SQLite calls")
+    parser.add_argument('--batch-size', type=int, default=API_BATCH_SIZE)
+    parser.add_argument('--batch-window-ms', type=int, default=API_BATCH_WINDOW_MS)
+    args = parser.parse_args()
+
+    init_db()
+    server = ExerciseAPIServer(
+        args.host, args.port, args.workers, args.batch_size, args.batch_window_ms
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,38 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import date, datetime, timedelta
+import functools
 import json
 import random
 import yaml
 import streamlit_authenticator as stauth
 from config import *
 from database import *
-from backup import ExerciseLogBackup
+from backup import ExerciseLogBackup, load_manifest
+from backup_scheduler import start_backup_scheduler, STATUS_PATH as BACKUP_STATUS_PATH
+from events import start_event_dispatcher
+from export import EXPORT_FORMATS, export_to_tempfile, export_file_name
+from maintenance import start_maintenance_scheduler, get_database_stats, STATUS_PATH as MAINTENANCE_STATUS_PATH
+from scheduling import load_scheduler_status
+from analytics import analytics_connection
+from profiling import profile_page, phase, load_traces, summarize_traces
+from forecasting import get_goal_forecasts
+import records
 
 # Initialize database on first run
 init_db()
 
+# Background backups run in one thread per process, off the request path
+backup_scheduler = start_backup_scheduler() if BACKUP_SCHEDULE_ENABLED else None
+
+# Achievement and personal best events are delivered to their sinks in the background
+event_dispatcher = start_event_dispatcher() if EVENT_DISPATCH_ENABLED else None
+
+# ANALYZE, integrity checks, incremental vacuum and WAL checkpoints on a schedule
+maintenance_scheduler = start_maintenance_scheduler() if MAINTENANCE_SCHEDULE_ENABLED else None
+
 # Load authentication config
 with open('auth_config.yaml') as file:
     config = yaml.load(file, Loader=yaml.SafeLoader)
@@ -58,60 +78,13 @@ def main():
     page = st.sidebar.selectbox(
         "Choose a page",
         ["Dashboard", "Log Exercise", "Goals Management", 
-         "View History", "Progress Analysis", "Personal Bests", "Backup Data"]
-    )
-    
-    # Add a date filter in sidebar for all pages
-    start_date = st.sidebar.date_input(
-        "Start Date",
-        datetime.now() - timedelta(days=30),
-        key="sidebar_start_date"
-    )
-    end_date = st.sidebar.date_input(
-        "End Date",
-        datetime.now(),
-        key="sidebar_end_date"
-    )
-    
-    # Show logout button in sidebar
-    if st.sidebar.button("Logout"):
-        st.session_state["password_correct"] = False
-        st.experimental_rerun()
-    
-    if page == "Dashboard":
-        show_dashboard(start_date, end_date)
-    elif page == "Log Exercise":
-        log_exercise()
-    elif page == "Goals Management":
-        manage_goals()
-    elif page == "View History":
-        view_history(start_date, end_date)
-    elif page == "Backup Data":
-        show_backup_page()
-    elif page == "Progress Analysis":
-        show_analysis(start_date, end_date)
-    elif page == "Personal Bests":
-        show_personal_bests()
-
-def main():
-    st.set_page_config(
-        page_title="Family Exercise Logger",
-        page_icon="💪",
-        layout="wide"
+         "View History", "Progress Analysis", "Personal Bests", "Leaderboards",
+         "Backup Data", "Database Maintenance", "Profiling"]
     )
     
-    # Verify password before showing any content
-    if not check_password():
-        return
-    
-    # Main app content (only shown after correct password)
-    st.title("Family Exercise Logger")
-    
-    # Sidebar navigation
-    page = st.sidebar.selectbox(
-        "Choose a page",
-        ["Dashboard", "Log Exercise", "Goals Management", 
-         "View History", "Progress Analysis", "Personal Bests", "Backup Data"]
+    # Profiling mode times each page and its phases and counts the elements it emits
+    profiling = st.sidebar.checkbox(
+        "Profile page renders", value=PROFILING_ENABLED, key="profiling_enabled"
     )
     
     # Add a date filter in sidebar for all pages
@@ -131,75 +104,189 @@ def main():
         st.session_state["password_correct"] = False
         st.experimental_rerun()
     
-    if page == "Dashboard":
-        show_dashboard(start_date, end_date)
-    elif page == "Log Exercise":
-        log_exercise()
-    elif page == "Goals Management":
-        manage_goals()
-    elif page == "View History":
-        view_history(start_date, end_date)
-    elif page == "Backup Data":
-        show_backup_page()
-    elif page == "Progress Analysis":
-        show_analysis(start_date, end_date)
-    elif page == "Personal Bests":
-        show_personal_bests()
+    with profile_page(page, profiling) as profile:
+        if page == "Dashboard":
+            show_dashboard(start_date, end_date)
+        elif page == "Log Exercise":
+            log_exercise()
+        elif page == "Goals Management":
+            manage_goals()
+        elif page == "View History":
+            view_history(start_date, end_date)
+        elif page == "Backup Data":
+            show_backup_page()
+        elif page == "Database Maintenance":
+            show_maintenance_page()
+        elif page == "Progress Analysis":
+            show_analysis(start_date, end_date)
+        elif page == "Personal Bests":
+            show_personal_bests()
+        elif page == "Leaderboards":
+            show_leaderboards()
+        elif page == "Profiling":
+            show_profiling_page()
+    
+    if profile is not None:
+        show_render_profile(profile.result)
 
 def show_dashboard(start_date, end_date):
     st.header("Dashboard")
     
     # Recent Achievements
     st.subheader("🏆 Recent Achievements")
-    achievements_df = get_recent_achievements()
-    if not achievements_df.empty:
-        for _, achievement in achievements_df.iterrows():
-            with st.expander(f"{achievement['family_member']} - "
-                           f"{achievement['exercise_type']} Goal Achieved! "
-                           f"({achievement['achievement_date']})"):
-                st.write(f"**Goal:** {achievement['description']}")
-                st.write(f"**Target:** {achievement['target_value']} {achievement['goal_type']}")
-                st.write(f"**Achieved:** {achievement['achieved_value']} {achievement['goal_type']}")
-                st.write("---")
-                if achievement['notes']:
-                    st.write(f"*{achievement['notes']}*")
-    else:
-        st.info("No recent achievements. Keep pushing towards your goals! 💪")
+    with phase('fetch'):
+        recent_achievements = records.fetch_recent_achievements()
+    with phase('render'):
+        if recent_achievements:
+            for achievement in recent_achievements:
+                kind = "Milestone" if achievement.goal_type.startswith('lifetime_') else "Goal Achieved!"
+                with st.expander(f"{achievement.family_member} - "
+                               f"{achievement.exercise_type} {kind} "
+                               f"({achievement.achievement_date})"):
+                    st.write(f"**Goal:** {achievement.description}")
+                    st.write(f"**Target:** {achievement.target_value} {achievement.goal_type}")
+                    st.write(f"**Achieved:** {achievement.achieved_value} {achievement.goal_type}")
+                    st.write("---")
+                    if achievement.notes:
+                        st.write(f"*{achievement.notes}*")
+        else:
+            st.info("No recent achievements. Keep pushing towards your goals! 💪")
         
     # Get recent data
-    df = get_exercises(start_date=start_date, end_date=end_date)
+    with phase('fetch'):
+        exercises = records.fetch_exercises(start_date=start_date, end_date=end_date)
     
-    if not df.empty:
-        # Show summary statistics
-        col1, col2, col3 = st.columns(3)
+    with phase('render'):
+        if exercises:
+            # Show summary statistics
+            col1, col2, col3 = st.columns(3)
         
-        with col1:
-            st.metric("Total Workouts", len(df))
-        with col2:
-            unique_exercises = len(df['exercise_type'].unique())
-            st.metric("Different Exercises", unique_exercises)
-        with col3:
-            active_goals = len(get_goals(status='active'))
-            st.metric("Active Goals", active_goals)
+            with col1:
+                st.metric("Total Workouts", len(exercises))
+            with col2:
+                unique_exercises = len({row.exercise_type for row in exercises})
+                st.metric("Different Exercises", unique_exercises)
+            with col3:
+                active_goals = records.count_goals(status='active')
+                st.metric("Active Goals", active_goals)
+        
+            # Recent activity summary
+            st.subheader("Recent Activities")
+            for row in exercises:
+                with st.expander(
+                    f"{row.family_member} - {row.exercise_type} "
+                    f"({row.date})"
+                ):
+                    if row.reps_per_set is not None:
+                        st.write(f"Sets: {row.sets}")
+                        st.write(f"Reps per set: {row.reps_per_set}")
+                    if row.seconds_per_set is not None:
+                        st.write(f"Time per set: {row.seconds_per_set} seconds")
+                    if row.feeling:
+                        st.write(f"Feeling: {row.feeling}")
+                    if row.notes:
+                        st.write(f"Notes: {row.notes}")
+        else:
+            st.info("No recent activities found for the selected date range.")
+    
+    show_activity_heatmaps()
+
+def show_activity_heatmaps():
+    st.subheader("Activity")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        exercise_type = st.selectbox(
+            "Exercise", ["All exercises"] + list(EXERCISE_TYPES.keys()), key="heatmap_exercise"
+        )
+    with col2:
+        this_year = date.today().year
+        year = st.selectbox("Year", list(range(this_year, this_year - 5, -1)), key="heatmap_year")
+    
+    # Weekday rows by week columns, with the year's first day in its weekday row
+    first_weekday = date(year, 1, 1).weekday()
+    days_in_year = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+    cells = np.arange(days_in_year) + first_weekday
+    
+    for member in FAMILY_MEMBERS:
+        with phase('fetch'):
+            heatmaps = get_activity_heatmap(
+                member,
+                exercise_type=None if exercise_type == "All exercises" else exercise_type,
+                years=[year]
+            )
+        if year not in heatmaps:
+            continue
+        heatmap = heatmaps[year]
         
-        # Recent activity summary
-        st.subheader("Recent Activities")
-        for _, row in df.iterrows():
-            with st.expander(
-                f"{row['family_member']} - {row['exercise_type']} "
-                f"({row['date']})"
-            ):
-                if row['reps_per_set'] is not None:
-                    st.write(f"Sets: {row['sets']}")
-                    st.write(f"Reps per set: {row['reps_per_set']}")
-                if row['seconds_per_set'] is not None:
-                    st.write(f"Time per set: {row['seconds_per_set']} seconds")
-                if row['feeling']:
-                    st.write(f"Feeling: {row['feeling']}")
-                if row['notes']:
-                    st.write(f"Notes: {row['notes']}")
+        with phase('transform'):
+            sessions = np.frombuffer(heatmap['intensity'], dtype=np.uint8)[:days_in_year]
+            grid = np.full(54 * 7, np.nan)
+            grid[cells] = np.where(sessions > 0, sessions, np.nan)
+            dates = np.full(54 * 7, '', dtype=object)
+            dates[cells] = [(date(year, 1, 1) + timedelta(days=int(i))).isoformat() for i in range(days_in_year)]
+        
+        with phase('figure'):
+            fig = go.Figure(go.Heatmap(
+                z=grid.reshape(54, 7).T,
+                customdata=dates.reshape(54, 7).T,
+                y=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+                colorscale='Greens',
+                showscale=False,
+                xgap=2,
+                ygap=2,
+                hovertemplate="%{customdata}: %{z} session(s)<extra></extra>"
+            ))
+            fig.update_layout(
+                title=f"{member} - {heatmap['active_days']} active days in {year}",
+                height=200,
+                margin=dict(l=40, r=10, t=40, b=10),
+                yaxis=dict(autorange='reversed'),
+                xaxis=dict(showticklabels=False)
+            )
+        with phase('render'):
+            st.plotly_chart(fig)
+
+def show_render_profile(trace):
+    """Sidebar note with this rerun's render time, flagged when over the page's budget"""
+    message = (f"Rendered {trace['page']} in {trace['total_ms']:.0f} ms "
+               f"with {trace['widget_count']} elements")
+    if trace['over_budget']:
+        st.sidebar.warning(f"{message} (budget {trace['budget_ms']} ms)")
     else:
-        st.info("No recent activities found for the selected date range.")
+        st.sidebar.caption(message)
+
+def show_profiling_page():
+    st.header("Render Profiling")
+    
+    if not st.session_state.get("profiling_enabled", PROFILING_ENABLED):
+        st.info("Tick \"Profile page renders\" in the sidebar, or start the app with "
+                "EXERCISE_LOG_PROFILE=1, then browse the pages to collect traces.")
+    
+    summary = summarize_traces()
+    if summary.empty:
+        st.info(f"No traces in {PROFILE_TRACE_PATH} yet.")
+        return
+    
+    st.subheader("Per-page summary")
+    st.dataframe(summary, hide_index=True)
+    
+    over = summary[summary['budget_ms'].notna() & (summary['p95_ms'] > summary['budget_ms'])]
+    for _, row in over.iterrows():
+        st.warning(f"{row['page']}: p95 of {row['p95_ms']} ms is over its {row['budget_ms']:.0f} ms budget")
+    
+    traces = load_traces()
+    st.subheader("Recent reruns")
+    fig = px.scatter(
+        traces.tail(500),
+        x='timestamp',
+        y='total_ms',
+        color='page',
+        hover_data=['widget_count'],
+        title="Render time per rerun"
+    )
+    st.plotly_chart(fig)
+    st.dataframe(traces.tail(50).iloc[::-1], hide_index=True)
 
 def celebrate_achievement(achievement):
     """Display a celebratory message for achieved goals"""
@@ -322,6 +409,8 @@ def log_exercise():
                 notes=notes,
                 feeling=feeling
             )
+            if event_dispatcher is not None:
+                event_dispatcher.notify()
             
             # Celebrate any achievements
             if achievements:
@@ -331,14 +420,14 @@ def log_exercise():
                 st.success("Exercise logged successfully!")
                 
                 # Show progress towards goals
-                active_goals = get_goals(family_member=family_member, status='active')
-                if not active_goals.empty:
+                active_goals = records.fetch_goals(family_member=family_member, status='active')
+                if active_goals:
                     st.write("Progress towards goals:")
-                    for _, goal in active_goals.iterrows():
-                        if goal['exercise_type'] == exercise_type:
-                            progress = (goal['current_value'] / goal['target_value']) * 100
+                    for goal in active_goals:
+                        if goal.exercise_type == exercise_type:
+                            progress = (goal.current_value / goal.target_value) * 100
                             st.progress(min(progress / 100, 1.0))
-                            st.write(f"{goal['description']}: {goal['current_value']}/{goal['target_value']} "
+                            st.write(f"{goal.description}: {goal.current_value}/{goal.target_value} "
                                     f"({progress:.1f}% complete)")
         except Exception as e:
             st.error(f"Error saving exercise: {str(e)}")
@@ -346,6 +435,9 @@ def log_exercise():
 def view_history(start_date, end_date):
     st.header("Exercise History")
     
+    if st.session_state.get("history_message"):
+        st.success(st.session_state.pop("history_message"))
+    
     # Filters
     col1, col2 = st.columns(2)
     
@@ -356,31 +448,178 @@ def view_history(start_date, end_date):
             key="history_member_filter"
         )
     
-    # Get filtered data
-    df = get_exercises(
-        family_member=member_filter if member_filter != "All" else None,
-        start_date=start_date,
-        end_date=end_date
-    )
+    with col2:
+        search_text = st.text_input(
+            "Search notes",
+            key="history_search",
+            placeholder="e.g. shoulder pain"
+        )
     
-    if not df.empty:
-        # Display as a table
-        st.dataframe(
-            df[['date', 'family_member', 'exercise_type', 'sets', 'feeling', 'notes']],
-            hide_index=True
+    # Read from the in-memory snapshot so long reads never hold up logging
+    with phase('fetch'):
+        snapshot = analytics_connection() if ANALYTICS_SNAPSHOT_ENABLED else None
+    
+    # Download exactly the sessions this page lists; the file is only built on click
+    with st.expander("Export"):
+        col1, col2 = st.columns(2)
+        with col1:
+            export_format = st.selectbox(
+                "Format", list(EXPORT_FORMATS),
+                format_func={'csv': "CSV", 'jsonl': "JSON Lines"}.get,
+                key="history_export_format"
+            )
+        with col2:
+            per_set = st.checkbox("One row per set", key="history_export_per_set")
+        st.download_button(
+            "Download",
+            data=functools.partial(
+                export_to_tempfile,
+                family_member=member_filter if member_filter != "All" else None,
+                start_date=start_date,
+                end_date=end_date,
+                export_format=export_format,
+                per_set=per_set,
+                conn=snapshot
+            ),
+            file_name=export_file_name(
+                member_filter if member_filter != "All" else None,
+                start_date, end_date, export_format, per_set
+            ),
+            mime=EXPORT_FORMATS[export_format][0],
+            on_click="ignore",
+            key="history_export_download"
         )
+    
+    if search_text:
+        with phase('fetch'):
+            results_df = search_notes(
+                search_text,
+                family_member=member_filter if member_filter != "All" else None,
+                start_date=start_date,
+                end_date=end_date,
+                conn=snapshot
+            )
+        if not results_df.empty:
+            st.subheader(f"Notes matching \"{search_text}\"")
+            for _, result in results_df.iterrows():
+                st.markdown(
+                    f"**{result['family_member']}** - {result['source']} "
+                    f"({result['date']}): {result['snippet']}"
+                )
+        else:
+            st.info("No notes match your search.")
+        st.write("---")
+    
+    # Get filtered data
+    with phase('fetch'):
+        df = get_exercises(
+            family_member=member_filter if member_filter != "All" else None,
+            start_date=start_date,
+            end_date=end_date,
+            conn=snapshot
+        )
+    
+    with phase('render'):
+        if not df.empty:
+            # Display as a table
+            st.dataframe(
+                df[['date', 'family_member', 'exercise_type', 'sets', 'feeling', 'notes']],
+                hide_index=True
+            )
         
-        # Show detailed views in expanders
-        for _, row in df.iterrows():
-            with st.expander(f"Details - {row['exercise_type']} on {row['date']}"):
-                if row['reps_per_set'] is not None:
-                    st.write(f"Reps per set: {row['reps_per_set']}")
-                if row['seconds_per_set'] is not None:
-                    st.write(f"Seconds per set: {row['seconds_per_set']}")
-                if row['notes']:
-                    st.write(f"Notes: {row['notes']}")
-    else:
-        st.info("No exercises found for the selected filters.")
+            # Show detailed views in expanders
+            for _, row in df.iterrows():
+                with st.expander(f"Details - {row['exercise_type']} on {row['date']}"):
+                    if row['reps_per_set'] is not None:
+                        st.write(f"Reps per set: {row['reps_per_set']}")
+                    if row['seconds_per_set'] is not None:
+                        st.write(f"Seconds per set: {row['seconds_per_set']}")
+                    if not pd.isna(row['notes']) and row['notes']:
+                        st.write(f"Notes: {row['notes']}")
+                    # Only the entry being edited gets a form, not every row on each rerun
+                    if st.session_state.get("editing_exercise") == int(row['id']):
+                        edit_exercise_controls(row)
+                    elif st.button("Edit", key=f"edit_exercise_{int(row['id'])}"):
+                        st.session_state.editing_exercise = int(row['id'])
+                        st.rerun()
+        else:
+            st.info("No exercises found for the selected filters.")
+
+def edit_exercise_controls(row):
+    """Correct or delete one history entry; derived stats are recomputed for it"""
+    exercise_id = int(row['id'])
+    feelings = ['Very Easy', 'Easy', 'Moderate', 'Hard', 'Very Hard']
+    exercise_types = list(EXERCISE_TYPES.keys())
+    
+    with st.form(key=f"edit_exercise_{exercise_id}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            family_member = st.selectbox(
+                "Family Member", FAMILY_MEMBERS,
+                index=FAMILY_MEMBERS.index(row['family_member']) if row['family_member'] in FAMILY_MEMBERS else 0
+            )
+            entry_date = st.date_input("Date", date.fromisoformat(row['date']))
+            exercise_type = st.selectbox(
+                "Exercise", exercise_types,
+                index=exercise_types.index(row['exercise_type']) if row['exercise_type'] in exercise_types else 0
+            )
+        with col2:
+            reps_text = st.text_input(
+                "Reps per set", ", ".join(str(v) for v in row['reps_per_set'] or []),
+                help="Comma separated, e.g. 10, 12, 8"
+            )
+            seconds_text = st.text_input(
+                "Seconds per set", ", ".join(str(v) for v in row['seconds_per_set'] or []),
+                help="Comma separated, e.g. 30, 45"
+            )
+            feeling = st.select_slider(
+                "How did it feel?", options=feelings,
+                value=row['feeling'] if row['feeling'] in feelings else 'Moderate'
+            )
+        notes = st.text_area("Notes", "" if pd.isna(row['notes']) else row['notes'])
+        save = st.form_submit_button("Save changes")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        confirm = st.checkbox("Confirm delete", key=f"confirm_delete_{exercise_id}")
+    with col2:
+        delete = st.button("Delete entry", key=f"delete_exercise_{exercise_id}", disabled=not confirm)
+    with col3:
+        if st.button("Cancel", key=f"cancel_edit_{exercise_id}"):
+            st.session_state.pop("editing_exercise", None)
+            st.rerun()
+    
+    try:
+        if save:
+            reps_per_set = [int(v) for v in reps_text.replace(',', ' ').split()] or None
+            seconds_per_set = [int(v) for v in seconds_text.replace(',', ' ').split()] or None
+            achievements = update_exercise(
+                exercise_id,
+                family_member=family_member,
+                date=entry_date,
+                exercise_type=exercise_type,
+                sets=len(reps_per_set or seconds_per_set or []) or (
+                    None if pd.isna(row['sets']) else int(row['sets'])
+                ),
+                reps_per_set=reps_per_set,
+                seconds_per_set=seconds_per_set,
+                notes=notes,
+                feeling=feeling
+            )
+            if event_dispatcher is not None and achievements:
+                event_dispatcher.notify()
+            st.session_state.history_message = "Entry updated." + "".join(
+                f" 🎉 Goal achieved: {achievement['description']}" for achievement in achievements
+            )
+            st.session_state.pop("editing_exercise", None)
+            st.rerun()
+        if delete:
+            delete_exercise(exercise_id)
+            st.session_state.history_message = "Entry deleted."
+            st.session_state.pop("editing_exercise", None)
+            st.rerun()
+    except Exception as e:
+        st.error(f"Error updating entry: {str(e)}")
 
 def show_analysis(start_date, end_date):
     st.header("Progress Analysis")
@@ -394,74 +633,142 @@ def show_analysis(start_date, end_date):
             key="analysis_member_filter"
         )
     
-    df = get_exercises(
-        family_member=member_filter if member_filter != "All" else None,
-        start_date=start_date,
-        end_date=end_date
-    )
+    with phase('fetch'):
+        df = get_exercises(
+            family_member=member_filter if member_filter != "All" else None,
+            start_date=start_date,
+            end_date=end_date,
+            conn=analytics_connection() if ANALYTICS_SNAPSHOT_ENABLED else None
+        )
     
     if not df.empty:
         # Exercise distribution
         st.subheader("Exercise Distribution")
-        fig = px.pie(
-            df,
-            names='exercise_type',
-            title="Exercise Type Distribution"
-        )
-        st.plotly_chart(fig)
+        with phase('figure'):
+            fig = px.pie(
+                df,
+                names='exercise_type',
+                title="Exercise Type Distribution"
+            )
+        with phase('render'):
+            st.plotly_chart(fig)
         
         # Progress over time
         st.subheader("Progress Over Time")
         for exercise_type in df['exercise_type'].unique():
-            exercise_df = df[df['exercise_type'] == exercise_type]
-            
             # For exercises measured in reps
             if 'reps' in EXERCISE_TYPES[exercise_type]['measurements']:
-                max_reps = []
-                dates = []
-                
-                for _, row in exercise_df.iterrows():
-                    if row['reps_per_set']:
-                        max_reps.append(max(row['reps_per_set']))
-                        dates.append(row['date'])
+                with phase('transform'):
+                    exercise_df = df[df['exercise_type'] == exercise_type]
+                    max_reps = []
+                    dates = []
+                    
+                    for _, row in exercise_df.iterrows():
+                        if row['reps_per_set']:
+                            max_reps.append(max(row['reps_per_set']))
+                            dates.append(row['date'])
                 
                 if max_reps:
-                    progress_df = pd.DataFrame({
-                        'date': dates,
-                        'max_reps': max_reps
-                    })
-                    
-                    fig = px.line(
-                        progress_df,
-                        x='date',
-                        y='max_reps',
-                        title=f"{exercise_type} - Max Reps Progress"
-                    )
-                    st.plotly_chart(fig)
+                    with phase('figure'):
+                        progress_df = pd.DataFrame({
+                            'date': dates,
+                            'max_reps': max_reps
+                        })
+                        
+                        fig = px.line(
+                            progress_df,
+                            x='date',
+                            y='max_reps',
+                            title=f"{exercise_type} - Max Reps Progress"
+                        )
+                    with phase('render'):
+                        st.plotly_chart(fig)
     else:
         st.info("No data available for the selected filters.")
 
 def show_personal_bests():
     st.header("Personal Bests")
     
-    pbs_df = get_personal_bests()
+    personal_bests = records.fetch_personal_bests()
     
-    if not pbs_df.empty:
+    if personal_bests:
         for member in FAMILY_MEMBERS:
-            member_pbs = pbs_df[pbs_df['family_member'] == member]
-            if not member_pbs.empty:
+            member_pbs = [pb for pb in personal_bests if pb.family_member == member]
+            if member_pbs:
                 st.subheader(f"{member}'s Personal Bests")
                 
-                for _, pb in member_pbs.iterrows():
+                for pb in member_pbs:
                     st.write(
-                        f"**{pb['exercise_type']}** - "
-                        f"{pb['value']} {pb['measurement_type']} "
-                        f"({pb['date']})"
+                        f"**{pb.exercise_type}** - "
+                        f"{pb.value} {pb.measurement_type} "
+                        f"({pb.date})"
                     )
                 st.write("---")
+        
+        # Progression timeline for one member and exercise
+        st.subheader("Personal Best Timeline")
+        col1, col2 = st.columns(2)
+        with col1:
+            member = st.selectbox("Family Member", FAMILY_MEMBERS, key="pb_timeline_member")
+        with col2:
+            exercise_type = st.selectbox(
+                "Exercise", list(EXERCISE_TYPES.keys()), key="pb_timeline_exercise"
+            )
+        
+        timeline_df = get_pb_timeline(member, exercise_type)
+        if not timeline_df.empty:
+            fig = px.line(
+                timeline_df,
+                x='date',
+                y='value',
+                color='measurement_type',
+                markers=True,
+                line_shape='hv',
+                title=f"{member} - {exercise_type} Personal Bests"
+            )
+            st.plotly_chart(fig)
+        else:
+            st.info(f"No personal bests recorded for {member} in {exercise_type} yet.")
     else:
         st.info("No personal bests recorded yet.")
 
+def show_leaderboards():
+    st.header("Leaderboards")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        exercise_type = st.selectbox(
+            "Exercise", list(EXERCISE_TYPES.keys()), key="leaderboard_exercise"
+        )
+    with col2:
+        period = st.selectbox(
+            "Period",
+            list(LEADERBOARD_PERIODS.keys()),
+            format_func=LEADERBOARD_PERIODS.get,
+            key="leaderboard_period"
+        )
+    with col3:
+        metric = st.selectbox(
+            "Rank by",
+            list(LEADERBOARD_METRICS.keys()),
+            format_func=LEADERBOARD_METRICS.get,
+            key="leaderboard_metric"
+        )
+
+    board_df = get_leaderboard(exercise_type, period=period, metric=metric)
+
+    if not board_df.empty:
+        unit = 'seconds' if 'time' in EXERCISE_TYPES[exercise_type]['measurements'] else 'reps'
+        for _, row in board_df.iterrows():
+            st.write(
+                f"**#{row['rank']} {row['family_member']}** - "
+                f"best set {row['max_value']:g} {unit}, "
+                f"total {row['total_volume']:g} {unit}, "
+                f"{row['session_count']} sessions"
+            )
+    else:
+        st.info(f"No {exercise_type} sessions logged for {LEADERBOARD_PERIODS[period].lower()}.")
+
 def show_backup_page():
     st.header("Backup Data")
     
@@ -470,55 +777,140 @@ def show_backup_page():
     - **SQLite (.db)**: Complete database backup for system restore
     - **CSV (.zip)**: Spreadsheet-friendly format for data analysis
     - **JSON**: Structured format for data interoperability
+    
+    Backups are skipped when the data hasn't changed since the last one,
+    and older backups are pruned automatically (daily, weekly and monthly copies are kept).
     """)
     
     col1, col2, col3 = st.columns(3)
     
+    def report(backup, format, path):
+        if backup.skipped.get(format):
+            st.info(f"No changes since the last {format.upper()} backup: {path}")
+        else:
+            st.success(f"{format.upper()} backup created: {path}")
+    
     with col1:
         if st.button("Create SQLite Backup"):
             with st.spinner("Creating SQLite backup..."):
                 backup = ExerciseLogBackup()
                 path = backup.create_sqlite_backup()
-                st.success(f"SQLite backup created: {path}")
+                report(backup, 'sqlite', path)
 
     with col2:
         if st.button("Create CSV Backup"):
             with st.spinner("Creating CSV backup..."):
                 backup = ExerciseLogBackup()
                 path = backup.create_csv_backup()
-                st.success(f"CSV backup created: {path}")
+                report(backup, 'csv', path)
 
     with col3:
         if st.button("Create JSON Backup"):
             with st.spinner("Creating JSON backup..."):
                 backup = ExerciseLogBackup()
                 path = backup.create_json_backup()
-                st.success(f"JSON backup created: {path}")
+                report(backup, 'json', path)
 
     if st.button("Create Full Backup (All Formats)"):
-        with st.spinner("Creating full backup in all formats..."):
-            backup = ExerciseLogBackup()
-            paths = backup.create_full_backup()
-            
-            st.success("Full backup created successfully!")
-            st.write("Backup files created:")
-            for format, path in paths.items():
-                st.write(f"- {format.upper()}: {path}")
+        if backup_scheduler is not None:
+            # Hand the job to the scheduler thread so this session isn't blocked
+            backup_scheduler.run_now()
+            st.success("Full backup started in the background. Check the status below.")
+        else:
+            with st.spinner("Creating full backup in all formats..."):
+                backup = ExerciseLogBackup()
+                paths = backup.create_full_backup()
+                
+                st.success("Full backup created successfully!")
+                st.write("Backup files:")
+                for format, path in paths.items():
+                    note = (" (unchanged, existing backup)" if backup.skipped.get(format)
+                            else f" ({backup.timings[format]:.2f}s)")
+                    st.write(f"- {format.upper()}: {path}{note}")
+                st.caption(f"Snapshot {backup.timings['snapshot']:.2f}s, total {backup.timings['total']:.2f}s")
+
+    # Scheduled backup status
+    st.subheader("Scheduled Backups")
+    status = load_scheduler_status(BACKUP_STATUS_PATH)
+    if status:
+        st.write(f"**State:** {status.get('state', 'unknown')}")
+        st.write(f"**Last backup:** {status.get('last_run') or 'never'}")
+        st.write(f"**Last check:** {status.get('last_checked') or 'never'} ({status.get('last_result', '-')})")
+        if status.get('next_run'):
+            st.write(f"**Next run:** {status['next_run']}")
+        if status.get('last_timings'):
+            st.write("**Last timings:** " + ", ".join(
+                f"{step} {seconds:.2f}s" for step, seconds in status['last_timings'].items()
+            ))
+        if status.get('last_error'):
+            st.error(f"Last error: {status['last_error']}")
+    else:
+        st.info(f"Scheduled backups run every {BACKUP_INTERVAL_MINUTES} minutes; no run recorded yet.")
 
-    # Show existing backups
+    # Show existing backups from the manifest
     st.subheader("Existing Backups")
-    if os.path.exists('backups'):
-        backups = os.listdir('backups')
-        if backups:
-            for backup_file in sorted(backups, reverse=True):
-                with st.expander(backup_file):
-                    file_path = os.path.join('backups', backup_file)
-                    st.write(f"Created: {datetime.fromtimestamp(os.path.getctime(file_path))}")
-                    st.write(f"Size: {os.path.getsize(file_path) / 1024:.1f} KB")
-        else:
-            st.info("No backups found")
+    backups = load_manifest()
+    if backups:
+        for entry in backups:
+            with st.expander(f"{entry['created'][:19].replace('T', ' ')} - {entry['format'].upper()}"):
+                st.write(f"File: {entry['path']}")
+                st.write(f"Size: {entry['size'] / 1024:.1f} KB")
+                st.write(f"Content hash: {entry['sha256'][:16]}")
     else:
-        st.info("No backups directory found")
+        st.info("No backups found")
+
+def show_maintenance_page():
+    st.header("Database Maintenance")
+    
+    stats = get_database_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("File size", f"{stats['file_size'] / 1024:.0f} KB")
+    with col2:
+        st.metric("Pages", f"{stats['page_count']} x {stats['page_size'] // 1024} KB")
+    with col3:
+        st.metric("Free pages", f"{stats['freelist_count']} ({stats['free_percent']}%)")
+    with col4:
+        st.metric("WAL size", f"{stats['wal_size'] / 1024:.0f} KB")
+    st.write(f"**auto_vacuum:** {stats['auto_vacuum']} · **journal_mode:** {stats['journal_mode']} · "
+             f"**planner statistics:** {'yes' if stats['analyzed'] else 'never analyzed'}")
+    if stats['auto_vacuum'] != 'incremental':
+        st.info("Free pages are only returned to the file system after a one-off switch to "
+                "auto_vacuum=INCREMENTAL. It rewrites the whole file and blocks logging meanwhile, "
+                "so it is not run from the app: run `python maintenance.py --once` at a quiet time.")
+    
+    if stats['objects']:
+        st.subheader("Tables and indexes")
+        objects = pd.DataFrame(stats['objects'])
+        objects['KB'] = (objects['bytes'] / 1024).round(1)
+        st.dataframe(
+            objects[['name', 'type', 'table', 'pages', 'KB', 'unused_percent']],
+            hide_index=True
+        )
+    
+    st.subheader("Scheduled Maintenance")
+    status = load_scheduler_status(MAINTENANCE_STATUS_PATH)
+    if status:
+        st.write(f"**State:** {status.get('state', 'unknown')}")
+        st.write(f"**Last run:** {status.get('last_run') or 'never'}")
+        st.write(f"**Last check:** {status.get('last_checked') or 'never'} ({status.get('last_result', '-')})")
+        st.write(f"**Last full integrity check:** {status.get('last_integrity_check') or 'never'}")
+        if status.get('next_run'):
+            st.write(f"**Next run:** {status['next_run']}")
+        if status.get('last_error'):
+            st.error(f"Last error: {status['last_error']}")
+        report = status.get('last_report')
+        if report:
+            if not report['check_ok']:
+                st.error(f"{report['check']} reported: " + "; ".join(report.get('check_errors', [])))
+            with st.expander("Last run details"):
+                st.json(report)
+    else:
+        st.info(f"Maintenance runs every {MAINTENANCE_INTERVAL_MINUTES} minutes; no run recorded yet.")
+    
+    if maintenance_scheduler is not None and st.button("Run maintenance now"):
+        maintenance_scheduler.run_now()
+        st.success("Maintenance started in the background. Refresh to see the result.")
 
 def manage_goals():
     st.header("Goals Management")
@@ -534,27 +926,46 @@ def manage_goals():
 def show_active_goals():
     st.subheader("Active Goals")
     
-    goals_df = get_goals()
+    goals = records.fetch_goals()
     
-    if not goals_df.empty:
+    if goals:
+        forecasts = get_goal_forecasts()
         for member in FAMILY_MEMBERS:
-            member_goals = goals_df[goals_df['family_member'] == member]
-            if not member_goals.empty:
+            member_goals = [goal for goal in goals if goal.family_member == member]
+            if member_goals:
                 st.write(f"**{member}'s Goals**")
                 
-                for _, goal in member_goals.iterrows():
-                    with st.expander(f"{goal['exercise_type']} - {goal['goal_type']}"):
-                        progress = (goal['current_value'] / goal['target_value']) * 100
+                for goal in member_goals:
+                    with st.expander(f"{goal.exercise_type} - {goal.goal_type}"):
+                        progress = (goal.current_value / goal.target_value) * 100
                         st.progress(min(progress / 100, 1.0))
-                        st.write(f"Target: {goal['target_value']}")
-                        st.write(f"Current: {goal['current_value']}")
+                        st.write(f"Target: {goal.target_value}")
+                        st.write(f"Current: {goal.current_value}")
                         
-                        if goal['target_date']:
-                            days_left = (pd.to_datetime(goal['target_date']) - pd.Timestamp.now()).days
+                        window = GOAL_TYPES.get(goal.goal_type, {}).get('window')
+                        if window:
+                            period_total = get_goal_period_total(
+                                goal.family_member, goal.exercise_type, goal.goal_type
+                            )
+                            st.write(f"This {window} so far: {period_total} "
+                                     f"{GOAL_TYPES[goal.goal_type]['unit']}")
+                        
+                        if goal.target_date:
+                            days_left = (datetime.fromisoformat(goal.target_date) - datetime.now()).days
                             st.write(f"Days remaining: {max(0, days_left)}")
                         
-                        if st.button("Archive Goal", key=f"archive_{goal['id']}"):
-                            update_goal_status(goal['id'], 'archived')
+                        if goal.id in forecasts.index:
+                            forecast = forecasts.loc[goal.id]
+                            if pd.notna(forecast['projected_date']):
+                                status = "✅ On track" if forecast['on_track'] else "⚠️ Behind schedule"
+                                st.write(f"Projected achievement: {forecast['projected_date']} ({status})")
+                            elif forecast['points'] < 2:
+                                st.write("Projection: log a few more sessions to see a forecast")
+                            else:
+                                st.write("Projection: ⚠️ no upward trend yet")
+                        
+                        if st.button("Archive Goal", key=f"archive_{goal.id}"):
+                            update_goal_status(goal.id, 'archived')
                             st.experimental_rerun()
     else:
         st.info("No active goals found.")
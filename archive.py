@@ -0,0 +1,24 @@
+# archive.py
+import argparse
+from config import ARCHIVE_HORIZON_DAYS
+from database import init_db, archive_old_exercises
+
+def main():
+    """Move old exercise sessions into the archive table"""
+    parser = argparse.ArgumentParser(
+        description="Move old exercise sessions into exercises_archive"
+    )
+    parser.add_argument(
+        '--days',
+        type=int,
+        default=ARCHIVE_HORIZON_DAYS,
+        help=f"Archive sessions older than this many days (default {ARCHIVE_HORIZON_DAYS})"
+    )
+    args = parser.parse_args()
+    
+    init_db()
+    moved = archive_old_exercises(args.days)
+    print(f"Archived {moved} sessions older than {args.days} days")
+
+if __name__ == "__main__":
+    main()
@@ -1,100 +1,322 @@
-import shutil
-import os
-import json
-import sqlite3
-import pandas as pd
-from datetime import datetime
-import zipfile
-
-class ExerciseLogBackup:
-    def __init__(self):
-        self.db_path = 'data/exercise_log.db'
-        self.backup_dir = 'backups'
-        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # Create backup directory if it doesn't exist
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
-
-    def create_sqlite_backup(self):
-        """Create a full SQLite database backup"""
-        backup_path = f"{self.backup_dir}/exercise_log_{self.timestamp}.db"
-        shutil.copy2(self.db_path, backup_path)
-        return backup_path
-
-    def create_csv_backup(self):
-        """Export all tables to CSV files"""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Get all table names
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        
-        # Create a directory for this backup
-        csv_dir = f"{self.backup_dir}/csv_backup_{self.timestamp}"
-        os.makedirs(csv_dir)
-        
-        # Export each table to CSV
-        csv_files = []
-        for table in tables:
-            table_name = table[0]
-            csv_path = f"{csv_dir}/{table_name}.csv"
-            
-            df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-            df.to_csv(csv_path, index=False)
-            csv_files.append(csv_path)
-        
-        conn.close()
-        
-        # Create zip file containing all CSVs
-        zip_path = f"{self.backup_dir}/exercise_log_{self.timestamp}_csv.zip"
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for csv_file in csv_files:
-                zipf.write(csv_file, os.path.basename(csv_file))
-        
-        # Clean up individual CSV files
-        shutil.rmtree(csv_dir)
-        
-        return zip_path
-
-    def create_json_backup(self):
-        """Export all data to a structured JSON file"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        
-        # Create JSON structure
-        backup_data = {
-            'backup_date': self.timestamp,
-            'tables': {}
-        }
-        
-        # Export each table to JSON
-        for table in tables:
-            table_name = table[0]
-            df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
-            
-            # Convert DataFrame to JSON structure
-            backup_data['tables'][table_name] = df.to_dict(orient='records')
-        
-        conn.close()
-        
-        # Save JSON file
-        json_path = f"{self.backup_dir}/exercise_log_{self.timestamp}.json"
-        with open(json_path, 'w') as f:
-            json.dump(backup_data, f, indent=2)
-        
-        return json_path
-
-    def create_full_backup(self):
-        """Create backups in all formats and return their paths"""
-        backup_paths = {
-            'sqlite': self.create_sqlite_backup(),
-            'csv': self.create_csv_backup(),
-            'json': self.create_json_backup()
-        }
-        return backup_paths
\ No newline at end of file
+import os
+import json
+import sqlite3
+import hashlib
+import multiprocessing
+import threading
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+import zipfile
+from contextlib import contextmanager
+from config import BACKUP_RETENTION
+from database import COMPAT_VIEWS
+from scheduling import lower_io_priority
+from storage import connect_db, get_db_path
+
+BACKUP_EXTENSIONS = {
+    'sqlite': '.db',
+    'csv': '_csv.zip',
+    'json': '.json'
+}
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# What the spreadsheet-friendly formats contain: the compatibility views (names
+# and ISO dates, not the compact *_data rows) and the other user-facing tables.
+# Internal bookkeeping and aggregates rebuilt from the log are left out.
+EXPORT_TABLES = [*COMPAT_VIEWS, 'goal_progress', 'personal_best_events']
+
+_manifest_lock = threading.Lock()
+
+@contextmanager
+def manifest_lock(backup_dir='backups'):
+    """
+    Hold the manifest lock of a backup directory. It serialises manifest
+    read-modify-write between threads and between processes (the app, the
+    standalone scheduler and load test workers), through a lock file.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    with _manifest_lock:
+        with open(os.path.join(backup_dir, 'manifest.lock'), 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def load_manifest(backup_dir='backups'):
+    """Return the backup manifest entries, newest first"""
+    manifest_path = os.path.join(backup_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path) as f:
+        entries = json.load(f)
+    return sorted(entries, key=lambda entry: entry['created'], reverse=True)
+
+class ExerciseLogBackup:
+    """
+    Content-addressed backup store.
+
+    Every backup is made from one in-memory snapshot of the database and is
+    named after the SHA-256 of the snapshot's exported content (the
+    EXPORT_TABLES rows), so a database whose data has not changed never
+    produces a second copy, even if its bookkeeping tables or page layout did. A manifest records each backup, and old backups
+    are pruned with a grandfather-father-son policy. A full backup writes the
+    formats concurrently in worker processes, each from its own copy of the
+    snapshot.
+    """
+
+    def __init__(self):
+        self.db_path = get_db_path()
+        self.backup_dir = 'backups'
+        self.manifest_path = os.path.join(self.backup_dir, 'manifest.json')
+        self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.skipped = {}  # format -> True when an identical backup already existed
+        self.timings = {}  # format -> seconds spent writing it, plus 'snapshot' and 'total'
+        self._snapshot = None
+        self._image = None
+        self._digest = None
+        self._snapshot_lock = threading.Lock()
+
+        # Create backup directory if it doesn't exist
+        if not os.path.exists(self.backup_dir):
+            os.makedirs(self.backup_dir)
+
+    def snapshot(self):
+        """Take (once per instance) a consistent in-memory copy of the database and its hash"""
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                started = time.perf_counter()
+                source = connect_db(self.db_path)
+                self._snapshot = sqlite3.connect(':memory:', check_same_thread=False)
+                source.backup(self._snapshot)
+                source.close()
+                self._image = self._snapshot.serialize()
+                self._digest = _content_digest(self._snapshot)
+                self.timings['snapshot'] = round(time.perf_counter() - started, 3)
+        return self._snapshot, self._digest
+
+    def create_sqlite_backup(self):
+        """Create a full SQLite database backup"""
+        return self._store('sqlite')
+
+    def create_csv_backup(self):
+        """Export all tables to CSV files"""
+        return self._store('csv')
+
+    def create_json_backup(self):
+        """Export all data to a structured JSON file"""
+        return self._store('json')
+
+    def create_full_backup(self, low_priority=False):
+        """
+        Create backups in all formats from one snapshot and return their paths.
+
+        The CSV and JSON encoders hold the GIL, so on multi-core machines those
+        formats are written in worker processes, each handed the serialized
+        snapshot, and a full backup takes about as long as the slowest format.
+        Per-format times end up in self.timings.
+
+        Worker processes do not inherit a thread's priority, so with
+        low_priority (set by the background scheduler) they lower their own.
+        """
+        started = time.perf_counter()
+        self.snapshot()
+
+        if (os.cpu_count() or 1) < 2:
+            # Nothing to overlap with; skip the worker start-up cost
+            backup_paths = {backup_format: self._store(backup_format) for backup_format in BACKUP_EXTENSIONS}
+        else:
+            with ProcessPoolExecutor(max_workers=2, mp_context=_worker_context(),
+                                     initializer=lower_io_priority if low_priority else None) as processes, \
+                    ThreadPoolExecutor(max_workers=len(BACKUP_EXTENSIONS), thread_name_prefix='backup') as threads:
+
+                def write_in_worker(backup_format, image, path, timestamp):
+                    if backup_format == 'sqlite':
+                        return _write_backup_file(backup_format, image, path, timestamp)
+                    processes.submit(_write_backup_file, backup_format, image, path, timestamp).result()
+
+                # One thread per format waits on its writer and then updates the manifest
+                futures = {
+                    backup_format: threads.submit(self._store, backup_format, write_in_worker)
+                    for backup_format in BACKUP_EXTENSIONS
+                }
+                backup_paths = {backup_format: future.result() for backup_format, future in futures.items()}
+
+        self.timings['total'] = round(time.perf_counter() - started, 3)
+        return backup_paths
+
+    def _store(self, backup_format, write=None):
+        """Write one format unless the manifest already holds identical content, then prune"""
+        _, digest = self.snapshot()
+        write = write or _write_backup_file
+
+        # Serialise manifest read-modify-write between threads and processes;
+        # the file itself is written outside the lock
+        with manifest_lock(self.backup_dir):
+            existing = _find_backup(load_manifest(self.backup_dir), backup_format, digest)
+        if existing:
+            self.skipped[backup_format] = True
+            self.timings[backup_format] = 0.0
+            return existing
+
+        started = time.perf_counter()
+        backup_path = f"{self.backup_dir}/exercise_log_{digest[:16]}{BACKUP_EXTENSIONS[backup_format]}"
+        tmp_path = _tmp_path(backup_path)
+        write(backup_format, self._image, tmp_path, self.timestamp)
+        os.replace(tmp_path, backup_path)
+        self.skipped[backup_format] = False
+        self.timings[backup_format] = round(time.perf_counter() - started, 3)
+
+        with manifest_lock(self.backup_dir):
+            manifest = load_manifest(self.backup_dir)
+            if _find_backup(manifest, backup_format, digest):
+                # Another thread stored the same content meanwhile, at the same path
+                return backup_path
+
+            manifest.append({
+                'format': backup_format,
+                'sha256': digest,
+                'path': backup_path,
+                'size': os.path.getsize(backup_path),
+                'created': datetime.now().isoformat()
+            })
+            self._save_manifest(manifest, apply_retention(manifest))
+        return backup_path
+
+    def _save_manifest(self, candidates, entries):
+        """Write the manifest atomically and delete candidate files no kept entry refers to"""
+        kept_paths = {entry['path'] for entry in entries}
+        for entry in candidates:
+            if entry['path'] not in kept_paths and os.path.exists(entry['path']):
+                os.remove(entry['path'])
+
+        tmp_path = _tmp_path(self.manifest_path)
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+def _worker_context():
+    """
+    Multiprocessing context for backup workers. Workers come from a fork server
+    (with this module and pandas preloaded) rather than being forked from the
+    threaded app; spawn is the fallback where fork servers are unavailable.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload([__name__])
+    return context
+
+def _write_backup_file(backup_format, image, path, timestamp):
+    """Write one backup format from a serialized snapshot; also runs in worker processes"""
+    if backup_format == 'sqlite':
+        with open(path, 'wb') as f:
+            f.write(image)
+        return
+
+    snapshot = sqlite3.connect(':memory:')
+    snapshot.deserialize(image)
+    try:
+        if backup_format == 'csv':
+            # Zip one CSV per table
+            with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for table_name in _export_tables(snapshot):
+                    df = pd.read_sql_query(f"SELECT * FROM {table_name}", snapshot)
+                    zipf.writestr(f"{table_name}.csv", df.to_csv(index=False))
+        else:
+            backup_data = {
+                'backup_date': timestamp,
+                'tables': {}
+            }
+
+            # Export each table to JSON
+            for table_name in _export_tables(snapshot):
+                df = pd.read_sql_query(f"SELECT * FROM {table_name}", snapshot)
+                backup_data['tables'][table_name] = df.to_dict(orient='records')
+
+            with open(path, 'w') as f:
+                json.dump(backup_data, f, indent=2, default=str)
+    finally:
+        snapshot.close()
+
+def _find_backup(manifest, backup_format, digest):
+    """Path of an existing backup of this format and content, or None"""
+    for entry in manifest:
+        if (entry['format'] == backup_format and entry['sha256'] == digest
+                and os.path.exists(entry['path'])):
+            return entry['path']
+    return None
+
+def _tmp_path(path):
+    """Temporary file name unique to this process and thread, for write-then-rename"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _content_digest(conn):
+    """
+    SHA-256 of the exported tables' rows, each table in a stable order. Unlike
+    a hash of the whole image it ignores bookkeeping (event cursors, the
+    changelog, replica acks) and how the rows are laid out in pages.
+    """
+    digest = hashlib.sha256()
+    for table_name in _export_tables(conn):
+        cursor = conn.execute(f"SELECT * FROM {table_name} LIMIT 0")
+        order = ', '.join(str(position) for position in range(1, len(cursor.description) + 1))
+        digest.update(json.dumps([table_name, [column[0] for column in cursor.description]]).encode())
+        for row in conn.execute(f"SELECT * FROM {table_name} ORDER BY {order}"):
+            digest.update(json.dumps(row, default=str).encode())
+    return digest.hexdigest()
+
+def _export_tables(conn):
+    """
+    Names of the tables and views the CSV and JSON formats export, in
+    EXPORT_TABLES order. The SQLite format keeps everything else.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+    return [name for name in EXPORT_TABLES if name in existing]
+
+def apply_retention(entries, retention=BACKUP_RETENTION):
+    """
+    Keep the newest backup per day, ISO week and month (per format) within the
+    retention counts, and drop every other entry.
+    """
+    kept = []
+    for backup_format in BACKUP_EXTENSIONS:
+        format_entries = sorted(
+            (entry for entry in entries if entry['format'] == backup_format),
+            key=lambda entry: entry['created'],
+            reverse=True
+        )
+        keep_ids = set()
+        for period, count in retention.items():
+            seen = []
+            for entry in format_entries:
+                created = datetime.fromisoformat(entry['created'])
+                if period == 'daily':
+                    bucket = created.date()
+                elif period == 'weekly':
+                    bucket = created.isocalendar()[:2]
+                else:
+                    bucket = (created.year, created.month)
+                if bucket in seen:
+                    continue
+                if len(seen) == count:
+                    break
+                seen.append(bucket)
+                keep_ids.add(id(entry))
+        kept.extend(entry for entry in format_entries if id(entry) in keep_ids)
+    return kept
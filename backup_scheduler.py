@@ -0,0 +1,60 @@
+# backup_scheduler.py
+import argparse
+import json
+import threading
+from backup import ExerciseLogBackup
+from config import BACKUP_INTERVAL_MINUTES
+from scheduling import IntervalScheduler, lower_io_priority
+
+STATUS_PATH = 'backups/scheduler_status.json'
+
+class BackupScheduler(IntervalScheduler):
+    """Run full backups on an interval in a background thread, skipping unchanged databases."""
+
+    skipped_result = 'skipped: no changes since last backup'
+
+    def __init__(self, interval_minutes=BACKUP_INTERVAL_MINUTES, status_path=STATUS_PATH):
+        super().__init__('backup-scheduler', interval_minutes, status_path)
+
+    def run_job(self):
+        """Write one full backup, with its worker processes at low priority too"""
+        backup = ExerciseLogBackup()
+        paths = backup.create_full_backup(low_priority=True)
+        return dict(last_paths=paths, last_timings=backup.timings)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def start_backup_scheduler(interval_minutes=BACKUP_INTERVAL_MINUTES):
+    """Start the in-process scheduler once per process and return it"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = BackupScheduler(interval_minutes)
+            _scheduler.start()
+        return _scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run exercise log backups on a schedule")
+    parser.add_argument('--interval', type=float, default=BACKUP_INTERVAL_MINUTES,
+                        help=f"Minutes between backups (default {BACKUP_INTERVAL_MINUTES})")
+    parser.add_argument('--once', action='store_true', help="Run a single backup job and exit")
+    args = parser.parse_args()
+
+    scheduler = BackupScheduler(args.interval)
+    if args.once:
+        lower_io_priority()
+        scheduler.run_once()
+        print(json.dumps(scheduler.status, indent=2))
+        return
+
+    print(f"Backing up every {args.interval:g} minutes; status in {scheduler.status_path}")
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            scheduler.join(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,157 @@
-FAMILY_MEMBERS = ['Dad', 'Son', 'Mum']
-
-EXERCISE_TYPES = {
-    'pull_ups': {
-        'measurements': ['reps', 'sets'],
-        'description': 'Full range of motion pull ups',
-        'valid_goals': ['max_reps', 'total_reps', 'sets_completed']
-    },
-    'push_ups': {
-        'measurements': ['reps', 'sets'],
-        'description': 'Standard push ups',
-        'valid_goals': ['max_reps', 'total_reps', 'sets_completed']
-    },
-    'dips': {
-        'measurements': ['reps', 'sets'],
-        'description': 'Full range dips',
-        'valid_goals': ['max_reps', 'total_reps', 'sets_completed']
-    },
-    'hangs': {
-        'measurements': ['time', 'sets'],
-        'description': 'Dead hangs from pull up bar (seconds)',
-        'valid_goals': ['max_time', 'total_time', 'sets_completed']
-    }
-}
-
-GOAL_TYPES = {
-    'max_reps': {
-        'description': 'Maximum repetitions in a single set',
-        'unit': 'reps'
-    },
-    'total_reps': {
-        'description': 'Total repetitions in a session',
-        'unit': 'reps'
-    },
-    'max_time': {
-        'description': 'Maximum time in a single set',
-        'unit': 'seconds'
-    },
-    'total_time': {
-        'description': 'Total time in a session',
-        'unit': 'seconds'
-    },
-    'sets_completed': {
-        'description': 'Number of sets completed',
-        'unit': 'sets'
-    }
-}
\ No newline at end of file
+import os
+
+FAMILY_MEMBERS = ['Dad', 'Son', 'Mum']
+
+# Database location (see storage.py): a file path, or ':memory:' / 'memory:<name>'
+# for a shared-cache in-memory database. A new database starts as a copy of the
+# template database when one is set.
+DB_PATH = os.environ.get('EXERCISE_LOG_DB', 'data/exercise_log.db')
+DB_TEMPLATE_PATH = os.environ.get('EXERCISE_LOG_DB_TEMPLATE') or None
+
+EXERCISE_TYPES = {
+    'pull_ups': {
+        'measurements': ['reps', 'sets'],
+        'description': 'Full range of motion pull ups',
+        'valid_goals': ['max_reps', 'total_reps', 'sets_completed', 'weekly_reps', 'monthly_reps']
+    },
+    'push_ups': {
+        'measurements': ['reps', 'sets'],
+        'description': 'Standard push ups',
+        'valid_goals': ['max_reps', 'total_reps', 'sets_completed', 'weekly_reps', 'monthly_reps']
+    },
+    'dips': {
+        'measurements': ['reps', 'sets'],
+        'description': 'Full range dips',
+        'valid_goals': ['max_reps', 'total_reps', 'sets_completed', 'weekly_reps', 'monthly_reps']
+    },
+    'hangs': {
+        'measurements': ['time', 'sets'],
+        'description': 'Dead hangs from pull up bar (seconds)',
+        'valid_goals': ['max_time', 'total_time', 'sets_completed', 'weekly_time', 'monthly_time']
+    }
+}
+
+GOAL_TYPES = {
+    'max_reps': {
+        'description': 'Maximum repetitions in a single set',
+        'unit': 'reps'
+    },
+    'total_reps': {
+        'description': 'Total repetitions in a session',
+        'unit': 'reps'
+    },
+    'max_time': {
+        'description': 'Maximum time in a single set',
+        'unit': 'seconds'
+    },
+    'total_time': {
+        'description': 'Total time in a session',
+        'unit': 'seconds'
+    },
+    'sets_completed': {
+        'description': 'Number of sets completed',
+        'unit': 'sets'
+    },
+    # Windowed goals: the total over one ISO week (Monday to Sunday) or calendar month
+    'weekly_reps': {
+        'description': 'Total repetitions in a week',
+        'unit': 'reps',
+        'window': 'week'
+    },
+    'monthly_reps': {
+        'description': 'Total repetitions in a month',
+        'unit': 'reps',
+        'window': 'month'
+    },
+    'weekly_time': {
+        'description': 'Total time in a week',
+        'unit': 'seconds',
+        'window': 'week'
+    },
+    'monthly_time': {
+        'description': 'Total time in a month',
+        'unit': 'seconds',
+        'window': 'month'
+    }
+}
+
+LEADERBOARD_PERIODS = {
+    'week': 'This Week',
+    'month': 'This Month',
+    'all': 'All Time'
+}
+
+LEADERBOARD_METRICS = {
+    'max_value': 'Best single set',
+    'total_volume': 'Total volume',
+    'session_count': 'Sessions logged'
+}
+
+# Lifetime milestone badges per member and exercise, separate from user goals.
+# Thresholds are running totals of reps, seconds and sessions, in ascending order.
+MILESTONES = {
+    'reps': [100, 500, 1000, 2500, 5000, 10000, 25000],
+    'seconds': [600, 1800, 3600, 3 * 3600, 10 * 3600, 24 * 3600],
+    'sessions': [10, 25, 50, 100, 250, 500, 1000]
+}
+
+# Sessions older than this many days are moved to exercises_archive
+ARCHIVE_HORIZON_DAYS = 365
+
+# Standalone JSON API (api_server.py)
+API_HOST = '127.0.0.1'
+API_PORT = 8502
+API_MAX_WORKERS = 4  # threads running blocking SQLite calls
+API_BATCH_SIZE = 50  # max exercise logs committed per transaction
+API_BATCH_WINDOW_MS = 10  # how long to wait for more logs to join a batch
+
+# Grandfather-father-son backup retention: newest backup kept per day, week and month
+BACKUP_RETENTION = {
+    'daily': 7,
+    'weekly': 4,
+    'monthly': 12
+}
+
+# Background backups (backup_scheduler.py)
+BACKUP_SCHEDULE_ENABLED = True  # start the scheduler thread inside the Streamlit app
+BACKUP_INTERVAL_MINUTES = 360
+
+# Achievement and personal best event delivery (events.py)
+EVENT_DISPATCH_ENABLED = True  # start the dispatcher thread inside the Streamlit app
+EVENT_SINKS = {
+    # name: {'type': 'jsonl', 'path': ...} or {'type': 'webhook', 'url': ...}
+    'family_feed': {'type': 'jsonl', 'path': 'data/family_feed.jsonl'},
+    'notifications': {'type': 'jsonl', 'path': 'data/notifications.jsonl'}
+}
+EVENT_BATCH_SIZE = 100  # max events handed to a sink at once
+EVENT_POLL_SECONDS = 2
+EVENT_MAX_BACKOFF_SECONDS = 300  # retry delay cap for a failing sink
+
+# Database maintenance (maintenance.py): statistics, checks, incremental vacuum, WAL checkpoints
+MAINTENANCE_SCHEDULE_ENABLED = True  # start the maintenance thread inside the Streamlit app
+MAINTENANCE_INTERVAL_MINUTES = 24 * 60
+MAINTENANCE_INTEGRITY_CHECK_DAYS = 7  # full integrity check this often, quick check otherwise
+
+# Analytics snapshot (analytics.py): history and analysis pages read an in-memory copy
+ANALYTICS_SNAPSHOT_ENABLED = True
+ANALYTICS_MIN_REFRESH_SECONDS = 0  # raise to refresh less often while logging is busy
+ANALYTICS_BACKUP_PAGES = 256  # pages copied per step; the database is only locked during a step
+
+# Render-time profiling (profiling.py); also switchable per session from the sidebar
+PROFILING_ENABLED = os.environ.get('EXERCISE_LOG_PROFILE', '') not in ('', '0')
+PROFILE_TRACE_PATH = 'data/profile_traces.jsonl'
+PAGE_LATENCY_BUDGETS_MS = {
+    'Dashboard': 800,
+    'Log Exercise': 300,
+    'Goals Management': 500,
+    'View History': 800,
+    'Progress Analysis': 1500,
+    'Personal Bests': 500,
+    'Leaderboards': 300,
+    'Backup Data': 500,
+    'Database Maintenance': 1000,
+    'Profiling': 500
+}
+
+# Filtered history exports (export.py)
+EXPORT_CHUNK_ROWS = 500  # sessions read and encoded at a time
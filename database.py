@@ -1,573 +1,2703 @@
-# database.py
-import sqlite3
-import pandas as pd
-import json
-from datetime import datetime, date
-from typing import Optional, List, Dict, Union, Any, Tuple
-import numpy as np
-import os
-
-def init_db():
-    """Initialize the database with all necessary tables."""
-    # Ensure data directory exists
-    os.makedirs('data', exist_ok=True)
-    
-    conn = sqlite3.connect('data/exercise_log.db')
-    c = conn.cursor()
-    
-    # Exercises table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS exercises (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            family_member TEXT NOT NULL,
-            date DATE NOT NULL,
-            exercise_type TEXT NOT NULL,
-            sets INTEGER,
-            reps_per_set TEXT,  -- JSON string array
-            seconds_per_set TEXT,  -- JSON string array
-            notes TEXT,
-            feeling TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(family_member, date, exercise_type, created_at)
-        )
-    ''')
-    
-    # Goals table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS goals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            family_member TEXT NOT NULL,
-            exercise_type TEXT NOT NULL,
-            goal_type TEXT NOT NULL,
-            target_value REAL NOT NULL,
-            current_value REAL DEFAULT 0,
-            start_date DATE NOT NULL,
-            target_date DATE,
-            status TEXT DEFAULT 'active',
-            description TEXT,
-            achievement_date DATE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Goal Progress table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS goal_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            goal_id INTEGER NOT NULL,
-            date DATE NOT NULL,
-            value REAL NOT NULL,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (goal_id) REFERENCES goals (id)
-        )
-    ''')
-    
-    # Personal Bests table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS personal_bests (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            family_member TEXT NOT NULL,
-            exercise_type TEXT NOT NULL,
-            measurement_type TEXT NOT NULL,
-            value REAL NOT NULL,
-            date DATE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(family_member, exercise_type, measurement_type)
-        )
-    ''')
-    
-    # Achievements table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS achievements (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            goal_id INTEGER,
-            family_member TEXT NOT NULL,
-            achievement_date DATE NOT NULL,
-            exercise_type TEXT NOT NULL,
-            goal_type TEXT NOT NULL,
-            target_value REAL NOT NULL,
-            achieved_value REAL NOT NULL,
-            description TEXT,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (goal_id) REFERENCES goals (id)
-        )
-    ''')
-    
-    # Create indices for better performance
-    c.execute('CREATE INDEX IF NOT EXISTS idx_exercises_family_member ON exercises(family_member)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_exercises_date ON exercises(date)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_goals_family_member ON goals(family_member)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_achievements_date ON achievements(achievement_date)')
-    
-    conn.commit()
-    conn.close()
-
-# In database.py
-
-def add_exercise(
-    family_member: str,
-    date: Union[str, date],
-    exercise_type: str,
-    sets: Optional[int] = None,
-    reps_per_set: Optional[List[int]] = None,
-    seconds_per_set: Optional[List[int]] = None,
-    notes: Optional[str] = None,
-    feeling: Optional[str] = None
-) -> Tuple[int, List[Dict]]:  # Now returns both ID and achievements
-    """
-    Add a new exercise entry to the database.
-    
-    Returns:
-        Tuple containing (exercise_id, list of achievements)
-    """
-    conn = sqlite3.connect('data/exercise_log.db')
-    c = conn.cursor()
-    
-    try:
-        # Convert lists to JSON strings
-        reps_json = json.dumps(reps_per_set) if reps_per_set else None
-        seconds_json = json.dumps(seconds_per_set) if seconds_per_set else None
-        
-        # Insert exercise record
-        c.execute('''
-            INSERT INTO exercises (
-                family_member, date, exercise_type, sets,
-                reps_per_set, seconds_per_set, notes, feeling
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (family_member, date, exercise_type, sets,
-              reps_json, seconds_json, notes, feeling))
-        
-        exercise_id = c.lastrowid
-        
-        # Update personal bests
-        if reps_per_set:
-            max_reps = max(reps_per_set)
-            update_personal_best(c, family_member, exercise_type, 'reps', max_reps, date)
-        
-        if seconds_per_set:
-            max_time = max(seconds_per_set)
-            update_personal_best(c, family_member, exercise_type, 'time', max_time, date)
-        
-        # Check and update goals, get achievements
-        achievements = update_goals_for_exercise(
-            c, family_member, exercise_type, date, reps_per_set, seconds_per_set
-        )
-        
-        conn.commit()
-        return exercise_id, achievements
-        
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
-
-def update_goals_for_exercise(
-    cursor: sqlite3.Cursor,
-    family_member: str,
-    exercise_type: str,
-    date: Union[str, date],
-    reps_per_set: Optional[List[int]],
-    seconds_per_set: Optional[List[int]]
-) -> List[Dict]:
-    """
-    Update goals and return list of achievements.
-    
-    Returns:
-        List of achievement dictionaries
-    """
-    achievements = []
-    
-    cursor.execute('''
-        SELECT id, goal_type, target_value, current_value, description 
-        FROM goals 
-        WHERE family_member = ? 
-        AND exercise_type = ? 
-        AND status = 'active'
-    ''', (family_member, exercise_type))
-    
-    active_goals = cursor.fetchall()
-    
-    for goal_id, goal_type, target_value, current_value, description in active_goals:
-        new_value = None
-        
-        if goal_type == 'max_reps' and reps_per_set:
-            new_value = max(reps_per_set)
-        elif goal_type == 'total_reps' and reps_per_set:
-            new_value = sum(reps_per_set)
-        elif goal_type == 'max_time' and seconds_per_set:
-            new_value = max(seconds_per_set)
-        elif goal_type == 'total_time' and seconds_per_set:
-            new_value = sum(seconds_per_set)
-        
-        if new_value and new_value >= target_value and current_value < target_value:
-            # Record achievement
-            cursor.execute('''
-                INSERT INTO achievements (
-                    goal_id, family_member, achievement_date, 
-                    exercise_type, goal_type, target_value,
-                    achieved_value, description
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (goal_id, family_member, date, exercise_type, 
-                  goal_type, target_value, new_value, description))
-            
-            achievements.append({
-                'goal_id': goal_id,
-                'description': description,
-                'target_value': target_value,
-                'achieved_value': new_value,
-                'exercise_type': exercise_type,
-                'goal_type': goal_type
-            })
-        
-        if new_value and new_value > current_value:
-            # Update goal progress
-            cursor.execute('''
-                INSERT INTO goal_progress (goal_id, date, value, notes)
-                VALUES (?, ?, ?, ?)
-            ''', (goal_id, date, new_value, 
-                  "🎉 Goal Achieved!" if new_value >= target_value else f"New best: {new_value}"))
-            
-            # Update goal status
-            cursor.execute('''
-                UPDATE goals 
-                SET current_value = ?,
-                    status = CASE WHEN ? >= target_value THEN 'achieved' ELSE status END,
-                    achievement_date = CASE WHEN ? >= target_value THEN ? ELSE NULL END,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (new_value, new_value, new_value, date if new_value >= target_value else None, goal_id))
-    
-    return achievements
-
-def update_personal_best(
-    cursor: sqlite3.Cursor,
-    family_member: str,
-    exercise_type: str,
-    measurement_type: str,
-    value: float,
-    date: Union[str, date]
-) -> None:
-    """Update personal best if the new value is higher."""
-    cursor.execute('''
-        INSERT INTO personal_bests (
-            family_member, exercise_type, measurement_type, value, date
-        ) VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(family_member, exercise_type, measurement_type)
-        DO UPDATE SET
-            value = CASE WHEN excluded.value > value THEN excluded.value ELSE value END,
-            date = CASE WHEN excluded.value > value THEN excluded.date ELSE date END
-    ''', (family_member, exercise_type, measurement_type, value, date))
-
-def get_exercises(
-    family_member: Optional[str] = None,
-    start_date: Optional[Union[str, date]] = None,
-    end_date: Optional[Union[str, date]] = None,
-    exercise_type: Optional[str] = None
-) -> pd.DataFrame:
-    """
-    Retrieve exercise records with optional filtering.
-    
-    Returns:
-        DataFrame containing exercise records
-    """
-    conn = sqlite3.connect('data/exercise_log.db')
-    
-    query = 'SELECT * FROM exercises WHERE 1=1'
-    params = []
-    
-    if family_member:
-        query += ' AND family_member = ?'
-        params.append(family_member)
-    if start_date:
-        query += ' AND date >= ?'
-        params.append(start_date)
-    if end_date:
-        query += ' AND date <= ?'
-        params.append(end_date)
-    if exercise_type:
-        query += ' AND exercise_type = ?'
-        params.append(exercise_type)
-    
-    query += ' ORDER BY date DESC, created_at DESC'
-    
-    df = pd.read_sql_query(query, conn, params=params)
-    
-    # Parse JSON columns
-    if not df.empty:
-        df['reps_per_set'] = df['reps_per_set'].apply(
-            lambda x: json.loads(x) if x else None
-        )
-        df['seconds_per_set'] = df['seconds_per_set'].apply(
-            lambda x: json.loads(x) if x else None
-        )
-    
-    conn.close()
-    return df
-
-def get_personal_bests(
-    family_member: Optional[str] = None,
-    exercise_type: Optional[str] = None
-) -> pd.DataFrame:
-    """Retrieve personal bests with optional filtering."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    
-    query = 'SELECT * FROM personal_bests WHERE 1=1'
-    params = []
-    
-    if family_member:
-        query += ' AND family_member = ?'
-        params.append(family_member)
-    if exercise_type:
-        query += ' AND exercise_type = ?'
-        params.append(exercise_type)
-    
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    return df
-
-def add_goal(
-    family_member: str,
-    exercise_type: str,
-    goal_type: str,
-    target_value: float,
-    start_date: Union[str, date],
-    target_date: Optional[Union[str, date]] = None,
-    description: Optional[str] = None
-) -> int:
-    """Add a new goal to the database."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    c = conn.cursor()
-    
-    try:
-        c.execute('''
-            INSERT INTO goals (
-                family_member, exercise_type, goal_type, target_value,
-                start_date, target_date, description
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (family_member, exercise_type, goal_type, target_value,
-              start_date, target_date, description))
-        
-        goal_id = c.lastrowid
-        conn.commit()
-        return goal_id
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
-
-def get_goals(
-    family_member: Optional[str] = None,
-    status: str = 'active'
-) -> pd.DataFrame:
-    """Retrieve goals with optional filtering."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    
-    query = 'SELECT * FROM goals WHERE status = ?'
-    params = [status]
-    
-    if family_member:
-        query += ' AND family_member = ?'
-        params.append(family_member)
-    
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    return df
-
-def get_goal_progress(goal_id: int) -> pd.DataFrame:
-    """Retrieve progress history for a specific goal."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    df = pd.read_sql_query('''
-        SELECT * FROM goal_progress 
-        WHERE goal_id = ?
-        ORDER BY date
-    ''', conn, params=[goal_id])
-    conn.close()
-    return df
-
-def get_recent_achievements(days: int = 30) -> pd.DataFrame:
-    """Get recent achievements within the specified number of days."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    
-    query = '''
-        SELECT * FROM achievements 
-        WHERE achievement_date >= date('now', ?)
-        ORDER BY achievement_date DESC, created_at DESC
-    '''
-    
-    df = pd.read_sql_query(
-        query,
-        conn,
-        params=[f'-{days} days']
-    )
-    
-    conn.close()
-    return df
-
-def get_achievements_summary(family_member: Optional[str] = None) -> Dict[str, Any]:
-    """Get summary statistics for achievements."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    
-    query = '''
-        SELECT 
-            COUNT(*) as total_achievements,
-            COUNT(DISTINCT exercise_type) as unique_exercises,
-            COUNT(DISTINCT date(achievement_date)) as achievement_days,
-            MAX(achievement_date) as last_achievement,
-            family_member
-        FROM achievements
-    '''
-    
-    if family_member:
-        query += ' WHERE family_member = ?'
-        query += ' GROUP BY family_member'
-        df = pd.read_sql_query(query, conn, params=[family_member])
-    else:
-        query += ' GROUP BY family_member'
-        df = pd.read_sql_query(query, conn)
-    
-    conn.close()
-    
-    if df.empty:
-        return {}
-    
-    return {
-        row['family_member']: {
-            'total_achievements': row['total_achievements'],
-            'unique_exercises': row['unique_exercises'],
-            'achievement_days': row['achievement_days'],
-            'last_achievement': row['last_achievement']
-        }
-        for _, row in df.iterrows()
-    }
-
-def update_goal_status(goal_id: int, status: str) -> None:
-    """Update the status of a goal (active/achieved/archived)."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    c = conn.cursor()
-    
-    try:
-        c.execute('''
-            UPDATE goals 
-            SET status = ?,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (status, goal_id))
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
-
-def delete_goal(goal_id: int) -> None:
-    """Delete a goal and its progress records."""
-    conn = sqlite3.connect('data/exercise_log.db')
-    c = conn.cursor()
-    
-    try:
-        # Delete goal progress first (foreign key constraint)
-        c.execute('DELETE FROM goal_progress WHERE goal_id = ?', (goal_id,))
-        # Delete the goal
-        c.execute('DELETE FROM goals WHERE id = ?', (goal_id,))
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
-
-def update_goals_for_exercise(cursor, family_member, exercise_type, date, reps_per_set, seconds_per_set):
-    """Enhanced goal update function with achievement celebration"""
-    achievements = []  # Track achievements in this session
-    
-    cursor.execute('''
-        SELECT id, goal_type, target_value, current_value, description 
-        FROM goals 
-        WHERE family_member = ? 
-        AND exercise_type = ? 
-        AND status = 'active'
-    ''', (family_member, exercise_type))
-    
-    active_goals = cursor.fetchall()
-    
-    for goal_id, goal_type, target_value, current_value, description in active_goals:
-        new_value = None
-        was_achieved = False
-        
-        if goal_type == 'max_reps' and reps_per_set:
-            new_value = max(reps_per_set)
-        elif goal_type == 'total_reps' and reps_per_set:
-            new_value = sum(reps_per_set)
-        elif goal_type == 'max_time' and seconds_per_set:
-            new_value = max(seconds_per_set)
-        elif goal_type == 'total_time' and seconds_per_set:
-            new_value = sum(seconds_per_set)
-        
-        if new_value and new_value >= target_value and current_value < target_value:
-            was_achieved = True
-            
-            # Record achievement
-            cursor.execute('''
-                INSERT INTO achievements (
-                    goal_id, family_member, achievement_date, 
-                    exercise_type, goal_type, target_value,
-                    achieved_value, description
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (goal_id, family_member, date, exercise_type, 
-                  goal_type, target_value, new_value, description))
-            
-            achievements.append({
-                'goal_id': goal_id,
-                'description': description,
-                'target_value': target_value,
-                'achieved_value': new_value,
-                'exercise_type': exercise_type,
-                'goal_type': goal_type
-            })
-        
-        if new_value and new_value > current_value:
-            # Update goal progress
-            cursor.execute('''
-                INSERT INTO goal_progress (goal_id, date, value, notes)
-                VALUES (?, ?, ?, ?)
-            ''', (goal_id, date, new_value, 
-                  "🎉 Goal Achieved!" if was_achieved else f"New best: {new_value}"))
-            
-            # Update goal status
-            cursor.execute('''
-                UPDATE goals 
-                SET current_value = ?,
-                    status = CASE WHEN ? >= target_value THEN 'achieved' ELSE status END,
-                    achievement_date = CASE WHEN ? >= target_value THEN ? ELSE NULL END,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            ''', (new_value, new_value, new_value, date if was_achieved else None, goal_id))
-    
-    return achievements
-
-def get_exercise_summary(
-    family_member: Optional[str] = None,
-    start_date: Optional[Union[str, date]] = None,
-    end_date: Optional[Union[str, date]] = None
-) -> Dict[str, Any]:
-    """Get summary statistics for exercises."""
-    df = get_exercises(family_member, start_date, end_date)
-    
-    if df.empty:
-        return {}
-    
-    summary = {
-        'total_exercises': len(df),
-        'exercise_types': df['exercise_type'].value_counts().to_dict(),
-        'dates': {
-            'first': df['date'].min(),
-            'last': df['date'].max()
-        }
-    }
-    
-    return summary
\ No newline at end of file
+# database.py
+import sqlite3
+import pandas as pd
+import json
+from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Union, Any, Tuple, Callable
+import numpy as np
+import time
+from bisect import bisect_right
+from config import (
+    EXERCISE_TYPES, GOAL_TYPES, LEADERBOARD_PERIODS, LEADERBOARD_METRICS, ARCHIVE_HORIZON_DAYS,
+    MILESTONES
+)
+from storage import connect_db, ensure_db_directory
+
+# Day numbers stored in the compact tables count days since 1970-01-01.
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Legacy row shape of each compact table, served by the view of the same name.
+# Every query aliases the compact row as r, so callers can append filters on its
+# integer keys (member_id, exercise_type_id, *day) and keep index lookups.
+# A migration that changes one of these must recreate the matching view.
+COMPAT_VIEWS = {
+    'exercises': """
+        SELECT r.id, m.name AS family_member, date(r.day * 86400, 'unixepoch') AS date,
+               t.name AS exercise_type, r.sets, r.reps_per_set, r.seconds_per_set,
+               r.notes, r.feeling, r.created_at
+        FROM exercises_data r
+        JOIN members m ON m.id = r.member_id
+        JOIN exercise_types t ON t.id = r.exercise_type_id
+    """,
+    'exercises_archive': """
+        SELECT r.id, m.name AS family_member, date(r.day * 86400, 'unixepoch') AS date,
+               t.name AS exercise_type, r.sets, r.reps_per_set, r.seconds_per_set,
+               r.notes, r.feeling, r.created_at
+        FROM exercises_archive_data r
+        JOIN members m ON m.id = r.member_id
+        JOIN exercise_types t ON t.id = r.exercise_type_id
+    """,
+    'goals': """
+        SELECT r.id, m.name AS family_member, t.name AS exercise_type, r.goal_type,
+               r.target_value, r.current_value,
+               date(r.start_day * 86400, 'unixepoch') AS start_date,
+               date(r.target_day * 86400, 'unixepoch') AS target_date,
+               r.status, r.description,
+               date(r.achievement_day * 86400, 'unixepoch') AS achievement_date,
+               r.created_at, r.updated_at
+        FROM goals_data r
+        JOIN members m ON m.id = r.member_id
+        JOIN exercise_types t ON t.id = r.exercise_type_id
+    """,
+    'personal_bests': """
+        SELECT r.id, m.name AS family_member, t.name AS exercise_type, r.measurement_type,
+               r.value, date(r.day * 86400, 'unixepoch') AS date, r.created_at
+        FROM personal_bests_data r
+        JOIN members m ON m.id = r.member_id
+        JOIN exercise_types t ON t.id = r.exercise_type_id
+    """,
+    'achievements': """
+        SELECT r.id, r.goal_id, m.name AS family_member,
+               date(r.achievement_day * 86400, 'unixepoch') AS achievement_date,
+               t.name AS exercise_type, r.goal_type, r.target_value, r.achieved_value,
+               r.description, r.notes, r.created_at
+        FROM achievements_data r
+        JOIN members m ON m.id = r.member_id
+        JOIN exercise_types t ON t.id = r.exercise_type_id
+    """,
+}
+
+# Activity heatmaps hold one row per (member, exercise, year); exercise type id 0
+# is the row for all exercises combined. `active` is a bitset with bit i of byte
+# i // 8 set when the member trained on day i of the year (0 = 1 January), and
+# `intensity` has one byte per day counting sessions, capped at 255.
+HEATMAP_ALL_EXERCISES = 0
+HEATMAP_DAYS = 366
+HEATMAP_BITSET_BYTES = (HEATMAP_DAYS + 7) // 8
+
+# Full-text indexed free-text columns: (table, text column, member column, date column, source, rowid offset).
+# notes_fts rowids are source_id * 4 + offset so each source row maps to exactly one index row.
+NOTES_FTS_SOURCES = [
+    ('exercises_data', 'notes', 'member_id', 'day', 'exercise', 0),
+    ('achievements_data', 'notes', 'member_id', 'achievement_day', 'achievement', 1),
+    ('goals_data', 'description', 'member_id', 'start_day', 'goal', 2),
+    ('exercises_archive_data', 'notes', 'member_id', 'day', 'exercise', 3),
+]
+
+# Tables whose inserts, updates and deletes are captured in the changelog for replicas.
+# A table added here needs a migration that calls _create_changelog_triggers for it.
+# Tables derived from the log are not captured; replicas recompute them with
+# refresh_derived_tables.
+CHANGELOG_TABLES = [
+    'members', 'exercise_types', 'exercises_data', 'exercises_archive_data',
+    'goals_data', 'goal_progress', 'personal_bests_data', 'achievements_data',
+    'personal_best_events'
+]
+
+def init_db(progress: Callable[[str], None] = print) -> int:
+    """
+    Bring the database schema up to date, applying any pending migrations.
+    
+    Returns:
+        The schema version after migrating
+    """
+    # Ensure data directory exists
+    ensure_db_directory()
+    
+    conn = connect_db(isolation_level=None)
+    
+    try:
+        # Fast path: a single pragma read when the schema is current
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return version
+        return _run_migrations(conn, progress)
+    finally:
+        conn.close()
+
+def _run_migrations(conn: sqlite3.Connection, progress: Callable[[str], None]) -> int:
+    """Apply pending migrations, each in its own transaction, and return the new version."""
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Re-read under the write lock in case another process migrated first
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                conn.execute('COMMIT')
+                return version
+            
+            description, migration = MIGRATIONS[version]
+            progress(f"Migrating schema to v{version + 1}: {description}")
+            started = time.perf_counter()
+            migration(conn.cursor(), progress)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.execute('COMMIT')
+            progress(f"Schema v{version + 1} applied in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            conn.execute('ROLLBACK')
+            raise e
+
+def _migration_base_tables(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v1: exercises, goals, goal_progress, personal_bests and achievements."""
+    # Exercises table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS exercises (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            family_member TEXT NOT NULL,
+            date DATE NOT NULL,
+            exercise_type TEXT NOT NULL,
+            sets INTEGER,
+            reps_per_set TEXT,  -- JSON string array
+            seconds_per_set TEXT,  -- JSON string array
+            notes TEXT,
+            feeling TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(family_member, date, exercise_type, created_at)
+        )
+    ''')
+    
+    # Goals table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            family_member TEXT NOT NULL,
+            exercise_type TEXT NOT NULL,
+            goal_type TEXT NOT NULL,
+            target_value REAL NOT NULL,
+            current_value REAL DEFAULT 0,
+            start_date DATE NOT NULL,
+            target_date DATE,
+            status TEXT DEFAULT 'active',
+            description TEXT,
+            achievement_date DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Goal Progress table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS goal_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            value REAL NOT NULL,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (goal_id) REFERENCES goals (id)
+        )
+    ''')
+    
+    # Personal Bests table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS personal_bests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            family_member TEXT NOT NULL,
+            exercise_type TEXT NOT NULL,
+            measurement_type TEXT NOT NULL,
+            value REAL NOT NULL,
+            date DATE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(family_member, exercise_type, measurement_type)
+        )
+    ''')
+    
+    # Achievements table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS achievements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER,
+            family_member TEXT NOT NULL,
+            achievement_date DATE NOT NULL,
+            exercise_type TEXT NOT NULL,
+            goal_type TEXT NOT NULL,
+            target_value REAL NOT NULL,
+            achieved_value REAL NOT NULL,
+            description TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (goal_id) REFERENCES goals (id)
+        )
+    ''')
+    
+    # Create indices for better performance
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_exercises_family_member ON exercises(family_member)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_exercises_date ON exercises(date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_goals_family_member ON goals(family_member)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_achievements_date ON achievements(achievement_date)')
+
+def _migration_exercises_archive(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v2: cold-storage table for archived sessions."""
+    # Exercises archive table (cold sessions moved out by archive_old_exercises)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS exercises_archive (
+            id INTEGER PRIMARY KEY,
+            family_member TEXT NOT NULL,
+            date DATE NOT NULL,
+            exercise_type TEXT NOT NULL,
+            sets INTEGER,
+            reps_per_set TEXT,
+            seconds_per_set TEXT,
+            notes TEXT,
+            feeling TEXT,
+            created_at TIMESTAMP
+        )
+    ''')
+
+    # Archive state (newest date held in exercises_archive)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive_state (
+            table_name TEXT PRIMARY KEY,
+            archived_through DATE NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_exercises_archive_member_date ON exercises_archive(family_member, date)')
+
+def _migration_leaderboard(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v3: precomputed leaderboard, backfilled from the log."""
+    # Leaderboard table (precomputed rankings, one row per member/exercise/period)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            period_type TEXT NOT NULL,  -- week, month or all
+            period_key TEXT NOT NULL,  -- e.g. 2024-W07, 2024-02 or all
+            exercise_type TEXT NOT NULL,
+            family_member TEXT NOT NULL,
+            max_value REAL NOT NULL DEFAULT 0,
+            total_volume REAL NOT NULL DEFAULT 0,
+            session_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (period_type, period_key, exercise_type, family_member)
+        )
+    ''')
+
+    for metric in LEADERBOARD_METRICS:
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_leaderboard_{metric}
+            ON leaderboard(period_type, period_key, exercise_type, {metric} DESC)
+        ''')
+
+    _rebuild_leaderboard(cursor, progress)
+
+def _migration_notes_index(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v4: FTS5 index over notes and goal descriptions."""
+    _create_notes_index(cursor, [
+        ('exercises', 'notes', 'family_member', 'date', 'exercise', 0),
+        ('achievements', 'notes', 'family_member', 'achievement_date', 'achievement', 1),
+        ('goals', 'description', 'family_member', 'start_date', 'goal', 2),
+        ('exercises_archive', 'notes', 'family_member', 'date', 'exercise', 3),
+    ])
+
+def _migration_changelog(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v5: change-data-capture changelog for replicas."""
+    _create_changelog(cursor)
+    _create_changelog_triggers(cursor, [
+        'exercises', 'exercises_archive', 'goals', 'goal_progress',
+        'personal_bests', 'achievements'
+    ])
+
+def _migration_personal_best_events(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v6: history of every personal best improvement, backfilled from the log."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS personal_best_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            family_member TEXT NOT NULL,
+            exercise_type TEXT NOT NULL,
+            measurement_type TEXT NOT NULL,
+            value REAL NOT NULL,
+            previous_value REAL,  -- NULL for the first recorded value
+            date DATE NOT NULL,
+            exercise_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pb_events_member_exercise
+        ON personal_best_events(family_member, exercise_type, measurement_type, date)
+    ''')
+    _rebuild_pb_events(cursor)
+    cursor.execute('SELECT COUNT(*) FROM personal_best_events')
+    progress(f"  personal best events: {cursor.fetchone()[0]} backfilled")
+    _create_changelog_triggers(cursor, ['personal_best_events'])
+
+def _migration_goal_progress_index(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v7: index goal progress by goal for per-goal and batched forecast reads."""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_goal_progress_goal_date ON goal_progress(goal_id, date)')
+
+def _migration_compact_schema(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """
+    v8: compact storage. Members and exercise types move to dimension tables
+    referenced by integer id, dates become day numbers, and views with the old
+    table names keep serving the old row shape.
+    """
+    legacy_tables = ['exercises', 'exercises_archive', 'goals', 'personal_bests', 'achievements']
+    
+    for dimension, column in (('members', 'family_member'), ('exercise_types', 'exercise_type')):
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {dimension} (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        names = ' UNION '.join(f'SELECT {column} FROM {table}' for table in legacy_tables)
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {dimension} (name)
+            SELECT {column} FROM ({names}) ORDER BY {column}
+        ''')
+    
+    # Exercises table
+    cursor.execute('''
+        CREATE TABLE exercises_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            day INTEGER NOT NULL,  -- days since 1970-01-01
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            sets INTEGER,
+            reps_per_set TEXT,  -- JSON string array
+            seconds_per_set TEXT,  -- JSON string array
+            notes TEXT,
+            feeling TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(member_id, day, exercise_type_id, created_at)
+        )
+    ''')
+    
+    # Exercises archive table (cold sessions moved out by archive_old_exercises)
+    cursor.execute('''
+        CREATE TABLE exercises_archive_data (
+            id INTEGER PRIMARY KEY,
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            day INTEGER NOT NULL,
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            sets INTEGER,
+            reps_per_set TEXT,
+            seconds_per_set TEXT,
+            notes TEXT,
+            feeling TEXT,
+            created_at TIMESTAMP
+        )
+    ''')
+    
+    # Goals table
+    cursor.execute('''
+        CREATE TABLE goals_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            goal_type TEXT NOT NULL,
+            target_value REAL NOT NULL,
+            current_value REAL DEFAULT 0,
+            start_day INTEGER NOT NULL,
+            target_day INTEGER,
+            status TEXT DEFAULT 'active',
+            description TEXT,
+            achievement_day INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Personal Bests table
+    cursor.execute('''
+        CREATE TABLE personal_bests_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            measurement_type TEXT NOT NULL,
+            value REAL NOT NULL,
+            day INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(member_id, exercise_type_id, measurement_type)
+        )
+    ''')
+    
+    # Achievements table
+    cursor.execute('''
+        CREATE TABLE achievements_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER REFERENCES goals_data (id),
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            achievement_day INTEGER NOT NULL,
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            goal_type TEXT NOT NULL,
+            target_value REAL NOT NULL,
+            achieved_value REAL NOT NULL,
+            description TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Copy every row across, keeping ids so notes_fts rowids and replicas stay valid
+    def to_day(column):
+        return f'CAST(julianday(r.{column}) - 2440587.5 AS INTEGER)'
+    
+    dimensions = '''
+        JOIN members m ON m.name = r.family_member
+        JOIN exercise_types t ON t.name = r.exercise_type
+    '''
+    for table in ('exercises', 'exercises_archive'):
+        cursor.execute(f'''
+            INSERT INTO {table}_data
+            SELECT r.id, m.id, {to_day('date')}, t.id, r.sets, r.reps_per_set,
+                   r.seconds_per_set, r.notes, r.feeling, r.created_at
+            FROM {table} r {dimensions}
+        ''')
+    cursor.execute(f'''
+        INSERT INTO goals_data
+        SELECT r.id, m.id, t.id, r.goal_type, r.target_value, r.current_value,
+               {to_day('start_date')}, {to_day('target_date')}, r.status, r.description,
+               {to_day('achievement_date')}, r.created_at, r.updated_at
+        FROM goals r {dimensions}
+    ''')
+    cursor.execute(f'''
+        INSERT INTO personal_bests_data
+        SELECT r.id, m.id, t.id, r.measurement_type, r.value, {to_day('date')}, r.created_at
+        FROM personal_bests r {dimensions}
+    ''')
+    cursor.execute(f'''
+        INSERT INTO achievements_data
+        SELECT r.id, r.goal_id, m.id, {to_day('achievement_date')}, t.id, r.goal_type,
+               r.target_value, r.achieved_value, r.description, r.notes, r.created_at
+        FROM achievements r {dimensions}
+    ''')
+    
+    # Rebuild goal progress so its foreign key points at goals_data
+    cursor.execute('ALTER TABLE goal_progress RENAME TO goal_progress_legacy')
+    cursor.execute('''
+        CREATE TABLE goal_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_id INTEGER NOT NULL REFERENCES goals_data (id),
+            date DATE NOT NULL,
+            value REAL NOT NULL,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('INSERT INTO goal_progress SELECT * FROM goal_progress_legacy')
+    
+    # Carry AUTOINCREMENT high-water marks over so deleted ids are never reused
+    for legacy_table, table in (
+        ('exercises', 'exercises_data'), ('goals', 'goals_data'),
+        ('personal_bests', 'personal_bests_data'), ('achievements', 'achievements_data'),
+        ('goal_progress_legacy', 'goal_progress')
+    ):
+        cursor.execute('DELETE FROM sqlite_sequence WHERE name = ?', (table,))
+        cursor.execute('''
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?, seq FROM sqlite_sequence WHERE name = ?
+        ''', (table, legacy_table))
+    
+    for table in ('exercises', 'goals', 'personal_bests', 'achievements'):
+        cursor.execute(f'SELECT COUNT(*) FROM {table}')
+        progress(f"  {table}: {cursor.fetchone()[0]} rows converted")
+    
+    # Dropping the old tables also drops their indexes and triggers
+    for table in legacy_tables + ['goal_progress_legacy']:
+        cursor.execute(f'DROP TABLE {table}')
+    
+    for view, select in COMPAT_VIEWS.items():
+        cursor.execute(f'CREATE VIEW {view} AS {select}')
+    
+    cursor.execute('CREATE INDEX idx_exercises_data_day ON exercises_data(day)')
+    cursor.execute('CREATE INDEX idx_exercises_archive_data_member_day ON exercises_archive_data(member_id, day)')
+    cursor.execute('CREATE INDEX idx_goals_data_member_exercise ON goals_data(member_id, exercise_type_id)')
+    cursor.execute('CREATE INDEX idx_achievements_data_day ON achievements_data(achievement_day)')
+    cursor.execute('CREATE INDEX idx_goal_progress_goal_date ON goal_progress(goal_id, date)')
+    
+    _create_notes_index(cursor, NOTES_FTS_SOURCES)
+    _create_changelog_triggers(cursor, [
+        'members', 'exercise_types', 'exercises_data', 'exercises_archive_data',
+        'goals_data', 'goal_progress', 'personal_bests_data', 'achievements_data'
+    ])
+
+def _migration_activity_heatmap(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v9: per-(member, exercise, year) activity bitsets and intensities, backfilled from the log."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS activity_heatmap (
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            exercise_type_id INTEGER NOT NULL,  -- 0 for all exercises
+            year INTEGER NOT NULL,
+            active BLOB NOT NULL,  -- 366-bit day bitset
+            intensity BLOB NOT NULL,  -- sessions per day, one byte each
+            PRIMARY KEY (member_id, exercise_type_id, year)
+        ) WITHOUT ROWID
+    ''')
+    _rebuild_activity_heatmap(cursor)
+    cursor.execute('SELECT COUNT(*) FROM activity_heatmap')
+    progress(f"  activity heatmap: {cursor.fetchone()[0]} member years backfilled")
+
+def _migration_event_outbox(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v10: outbox of achievement and personal best events, and per-sink delivery cursors."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,  -- achievement or personal_best
+            payload TEXT NOT NULL,  -- JSON object
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Delivery position of each sink; a lease keeps two dispatchers off the same sink
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_sink_cursors (
+            sink TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,  -- consecutive failed deliveries
+            last_error TEXT,
+            next_attempt_at REAL NOT NULL DEFAULT 0,  -- unix time
+            lease_owner TEXT,
+            lease_expires_at REAL NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_goal_period_totals(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v11: running weekly and monthly totals for windowed goals, backfilled from the log."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS goal_period_totals (
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            period_type TEXT NOT NULL,  -- week or month
+            period_key TEXT NOT NULL,  -- e.g. 2024-W07 or 2024-02
+            reps INTEGER NOT NULL DEFAULT 0,
+            seconds INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (member_id, exercise_type_id, period_type, period_key)
+        ) WITHOUT ROWID
+    ''')
+    _rebuild_goal_period_totals(cursor)
+    cursor.execute('SELECT COUNT(*) FROM goal_period_totals')
+    progress(f"  goal period totals: {cursor.fetchone()[0]} periods backfilled")
+
+def _migration_exercise_slice_index(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v12: index sessions by (member, exercise, day) so one slice can be recomputed after an edit."""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_exercises_data_member_exercise_day
+        ON exercises_data(member_id, exercise_type_id, day)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_exercises_archive_data_member_exercise_day
+        ON exercises_archive_data(member_id, exercise_type_id, day)
+    ''')
+
+def _migration_lifetime_totals(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """v13: running lifetime totals per member and exercise, and their milestones, backfilled from the log."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lifetime_totals (
+            member_id INTEGER NOT NULL REFERENCES members (id),
+            exercise_type_id INTEGER NOT NULL REFERENCES exercise_types (id),
+            reps INTEGER NOT NULL DEFAULT 0,
+            seconds INTEGER NOT NULL DEFAULT 0,
+            sessions INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (member_id, exercise_type_id)
+        ) WITHOUT ROWID
+    ''')
+    milestones = _rebuild_lifetime_totals(cursor)
+    cursor.execute('SELECT COUNT(*) FROM lifetime_totals')
+    progress(f"  lifetime totals: {cursor.fetchone()[0]} member exercises backfilled, "
+             f"{len(milestones)} milestones recorded")
+
+def _migration_windowed_goal_periods(cursor: sqlite3.Cursor, progress: Callable[[str], None]) -> None:
+    """
+    v14: windowed goals recur, with one achievement per week or month counted
+    from the goal's start day. Replays the slices that have windowed goals,
+    without notifying about the achievements this backfills.
+    """
+    windowed = [goal_type for goal_type, goal in GOAL_TYPES.items() if goal.get('window')]
+    cursor.execute(f'''
+        SELECT DISTINCT g.member_id, g.exercise_type_id, m.name, e.name
+        FROM goals_data g
+        JOIN members m ON m.id = g.member_id
+        JOIN exercise_types e ON e.id = g.exercise_type_id
+        WHERE g.goal_type IN ({', '.join('?' * len(windowed))})
+    ''', windowed)
+    slices = cursor.fetchall()
+    for member_id, exercise_type_id, family_member, exercise_type in slices:
+        _reevaluate_goals(
+            cursor, member_id, exercise_type_id, family_member, exercise_type,
+            _slice_sessions(cursor, member_id, exercise_type_id), notify=False
+        )
+    progress(f"  windowed goals: {len(slices)} member exercises replayed")
+
+def _create_changelog(cursor: sqlite3.Cursor) -> None:
+    """Create the changelog and replica acknowledgement tables."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,  -- I, U or D
+            row_id INTEGER NOT NULL,
+            row_data TEXT  -- JSON object of the new row, NULL for deletes
+        )
+    ''')
+    
+    # Last sequence each replica has applied, so acknowledged entries can be pruned
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS replica_acks (
+            replica_name TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+def _create_changelog_triggers(
+    cursor: sqlite3.Cursor,
+    tables: List[str],
+    replace: bool = False
+) -> None:
+    """
+    Install the changelog capture triggers on the given tables.
+    
+    The row JSON lists the table's current columns, so a migration that changes
+    a captured table's columns must call this again with replace=True.
+    """
+    for table in tables:
+        if replace:
+            for event in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {table}_cdc_{event}')
+        
+        cursor.execute(f'PRAGMA table_info({table})')
+        columns = [row[1] for row in cursor.fetchall()]
+        row_json = 'json_object(' + ', '.join(f"'{col}', new.{col}" for col in columns) + ')'
+        
+        for event, op in (('INSERT', 'I'), ('UPDATE', 'U')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_cdc_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO changelog (table_name, op, row_id, row_data)
+                    VALUES ('{table}', '{op}', new.id, {row_json});
+                END
+            ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_cdc_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO changelog (table_name, op, row_id, row_data)
+                VALUES ('{table}', 'D', old.id, NULL);
+            END
+        ''')
+
+def _create_notes_index(
+    cursor: sqlite3.Cursor,
+    sources: List[Tuple[str, str, str, str, str, int]]
+) -> None:
+    """
+    Create the notes_fts full-text index and the triggers that keep it in sync.
+    
+    Member id and day number columns of the compact tables are indexed as the
+    member's name and an ISO date, like the text columns they replaced.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'")
+    is_new = cursor.fetchone() is None
+    
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+            body,
+            family_member UNINDEXED,
+            source UNINDEXED,
+            date UNINDEXED
+        )
+    ''')
+    
+    for table, text_col, member_col, date_col, source, offset in sources:
+        insert_row = f'''
+            INSERT INTO notes_fts (rowid, body, family_member, source, date)
+            SELECT new.id * 4 + {offset}, new.{text_col}, {_fts_member_sql('new', member_col)},
+                   '{source}', {_fts_date_sql('new', date_col)}
+            WHERE COALESCE(new.{text_col}, '') != '';
+        '''
+        delete_row = f"DELETE FROM notes_fts WHERE rowid = old.id * 4 + {offset};"
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table}
+            BEGIN {insert_row} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table}
+            BEGIN {delete_row} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update
+            AFTER UPDATE OF {text_col}, {member_col}, {date_col} ON {table}
+            BEGIN {delete_row} {insert_row} END
+        ''')
+    
+    if is_new:
+        # Index notes written before the full-text table existed
+        for table, text_col, member_col, date_col, source, offset in sources:
+            cursor.execute(f'''
+                INSERT INTO notes_fts (rowid, body, family_member, source, date)
+                SELECT id * 4 + {offset}, {text_col}, {_fts_member_sql(table, member_col)},
+                       '{source}', {_fts_date_sql(table, date_col)}
+                FROM {table}
+                WHERE COALESCE({text_col}, '') != ''
+            ''')
+
+def _fts_member_sql(row: str, column: str) -> str:
+    """SQL for the member name of `row`, resolving a member id through members."""
+    if column == 'member_id':
+        return f'(SELECT name FROM members WHERE id = {row}.member_id)'
+    return f'{row}.{column}'
+
+def _fts_date_sql(row: str, column: str) -> str:
+    """SQL for the ISO date of `row`, converting a day number column."""
+    if column.endswith('day'):
+        return f"date({row}.{column} * 86400, 'unixepoch')"
+    return f'{row}.{column}'
+
+
+# Numbered schema migrations; the schema version stored in PRAGMA user_version
+# is the number of entries applied. Only ever append to this list.
+MIGRATIONS = [
+    ('base tables', _migration_base_tables),
+    ('exercises archive', _migration_exercises_archive),
+    ('leaderboard', _migration_leaderboard),
+    ('notes full-text index', _migration_notes_index),
+    ('changelog', _migration_changelog),
+    ('personal best events', _migration_personal_best_events),
+    ('goal progress index', _migration_goal_progress_index),
+    ('compact storage schema', _migration_compact_schema),
+    ('activity heatmap', _migration_activity_heatmap),
+    ('event outbox', _migration_event_outbox),
+    ('goal period totals', _migration_goal_period_totals),
+    ('exercise slice index', _migration_exercise_slice_index),
+    ('lifetime totals', _migration_lifetime_totals),
+    ('windowed goal periods', _migration_windowed_goal_periods),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def add_exercise(
+    family_member: str,
+    date: Union[str, date],
+    exercise_type: str,
+    sets: Optional[int] = None,
+    reps_per_set: Optional[List[int]] = None,
+    seconds_per_set: Optional[List[int]] = None,
+    notes: Optional[str] = None,
+    feeling: Optional[str] = None
+) -> Tuple[int, List[Dict]]:  # Now returns both ID and achievements
+    """
+    Add a new exercise entry to the database.
+    
+    Returns:
+        Tuple containing (exercise_id, list of achievements)
+    """
+    conn = connect_db()
+    c = conn.cursor()
+    
+    try:
+        result = record_exercise(
+            c, family_member, date, exercise_type, sets,
+            reps_per_set, seconds_per_set, notes, feeling
+        )
+        conn.commit()
+        return result
+        
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def add_exercises_batch(entries: List[Dict[str, Any]]) -> List[Union[Tuple[int, List[Dict]], Exception]]:
+    """
+    Add several exercise entries in a single transaction.
+    
+    Each entry is a dict of add_exercise keyword arguments. An entry that
+    fails is rolled back on its own savepoint without affecting the others.
+    
+    Returns:
+        One (exercise_id, achievements) tuple or the raised exception per entry
+    """
+    conn = connect_db()
+    c = conn.cursor()
+    results = []
+    
+    try:
+        # A savepoint outside a transaction commits on RELEASE; open the batch's
+        # transaction explicitly so only conn.commit() publishes the entries
+        c.execute('BEGIN')
+        for entry in entries:
+            c.execute('SAVEPOINT batch_entry')
+            try:
+                results.append(record_exercise(
+                    c,
+                    entry['family_member'],
+                    entry['date'],
+                    entry['exercise_type'],
+                    entry.get('sets'),
+                    entry.get('reps_per_set'),
+                    entry.get('seconds_per_set'),
+                    entry.get('notes'),
+                    entry.get('feeling')
+                ))
+                c.execute('RELEASE batch_entry')
+            except Exception as e:
+                c.execute('ROLLBACK TO batch_entry')
+                c.execute('RELEASE batch_entry')
+                results.append(e)
+        
+        conn.commit()
+        return results
+        
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def update_exercise(
+    exercise_id: int,
+    family_member: str,
+    date: Union[str, date],
+    exercise_type: str,
+    sets: Optional[int] = None,
+    reps_per_set: Optional[List[int]] = None,
+    seconds_per_set: Optional[List[int]] = None,
+    notes: Optional[str] = None,
+    feeling: Optional[str] = None
+) -> List[Dict]:
+    """
+    Correct a logged exercise (live or archived) and recompute what it affected.
+
+    Only the derived state of the entry's old and new (member, exercise) slices
+    is recomputed, on the same transaction as the edit. An archived entry moved
+    past the archived range goes back to the live table, where queries for
+    recent dates look for it.
+
+    Returns:
+        List of achievements the corrected entry newly earns
+    """
+    conn = connect_db()
+    c = conn.cursor()
+
+    try:
+        table, old_session = _find_exercise(c, exercise_id)
+        new_session = (
+            _dimension_id(c, 'members', family_member),
+            _dimension_id(c, 'exercise_types', exercise_type),
+            epoch_day(date)
+        )
+        c.execute(f'''
+            UPDATE {table}
+            SET member_id = ?, exercise_type_id = ?, day = ?, sets = ?,
+                reps_per_set = ?, seconds_per_set = ?, notes = ?, feeling = ?
+            WHERE id = ?
+        ''', (*new_session, sets,
+              json.dumps(reps_per_set) if reps_per_set else None,
+              json.dumps(seconds_per_set) if seconds_per_set else None,
+              notes, feeling, exercise_id))
+
+        archived_through = _get_archived_through(conn)
+        if table == 'exercises_archive_data' and (
+            archived_through is None or new_session[2] > epoch_day(archived_through)
+        ):
+            c.execute('INSERT INTO exercises_data SELECT * FROM exercises_archive_data WHERE id = ?', (exercise_id,))
+            c.execute('DELETE FROM exercises_archive_data WHERE id = ?', (exercise_id,))
+
+        achievements = _recompute_exercise_slices(c, [old_session, new_session])
+        conn.commit()
+        return achievements
+
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def delete_exercise(exercise_id: int) -> None:
+    """Delete a logged exercise (live or archived) and recompute what it affected."""
+    conn = connect_db()
+    c = conn.cursor()
+
+    try:
+        table, session = _find_exercise(c, exercise_id)
+        c.execute(f'DELETE FROM {table} WHERE id = ?', (exercise_id,))
+        _recompute_exercise_slices(c, [session])
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def _find_exercise(cursor: sqlite3.Cursor, exercise_id: int) -> Tuple[str, Tuple[int, int, int]]:
+    """Return the table holding an exercise and its (member_id, exercise_type_id, day)."""
+    for table in ('exercises_data', 'exercises_archive_data'):
+        cursor.execute(f'SELECT member_id, exercise_type_id, day FROM {table} WHERE id = ?', (exercise_id,))
+        row = cursor.fetchone()
+        if row:
+            return table, row
+    raise ValueError(f"Unknown exercise id: {exercise_id}")
+
+def _recompute_exercise_slices(
+    cursor: sqlite3.Cursor,
+    sessions: List[Tuple[int, int, int]]
+) -> List[Dict]:
+    """
+    Recompute personal bests, personal best events, leaderboard rows, period
+    totals, goals, lifetime totals and heatmaps after the given (member_id,
+    exercise_type_id, day) sessions were changed or removed. Each table is only
+    touched for the affected slices, periods and years.
+
+    Returns:
+        List of achievements newly earned by re-evaluated goals and milestones
+    """
+    achievements = []
+
+    for member_id, exercise_type_id in dict.fromkeys((m, t) for m, t, _ in sessions):
+        cursor.execute('SELECT name FROM members WHERE id = ?', (member_id,))
+        family_member = cursor.fetchone()[0]
+        cursor.execute('SELECT name FROM exercise_types WHERE id = ?', (exercise_type_id,))
+        exercise_type = cursor.fetchone()[0]
+        days = [day for m, t, day in sessions if (m, t) == (member_id, exercise_type_id)]
+        slice_sessions = _slice_sessions(cursor, member_id, exercise_type_id)
+
+        _recompute_personal_bests(cursor, member_id, exercise_type_id)
+        _rebuild_pb_events(cursor, family_member, exercise_type)
+        _recompute_slice_totals(
+            cursor, member_id, exercise_type_id, family_member, exercise_type, slice_sessions, days
+        )
+        achievements.extend(_reevaluate_goals(
+            cursor, member_id, exercise_type_id, family_member, exercise_type, slice_sessions
+        ))
+        achievements.extend(_rebuild_lifetime_totals(cursor, member_id, exercise_type_id, notify=True))
+
+    for member_id in dict.fromkeys(m for m, _, _ in sessions):
+        _rebuild_activity_heatmap(cursor, member_id, sorted({
+            date.fromordinal(day + EPOCH_ORDINAL).year for m, _, day in sessions if m == member_id
+        }))
+
+    return achievements
+
+def _slice_sessions(
+    cursor: sqlite3.Cursor,
+    member_id: int,
+    exercise_type_id: int
+) -> List[Tuple[int, int, Optional[List[int]], Optional[List[int]]]]:
+    """A slice's (id, day, reps_per_set, seconds_per_set) sessions in date order, read through the slice index."""
+    cursor.execute('''
+        SELECT id, day, reps_per_set, seconds_per_set FROM exercises_data
+        WHERE member_id = ? AND exercise_type_id = ?
+        UNION ALL
+        SELECT id, day, reps_per_set, seconds_per_set FROM exercises_archive_data
+        WHERE member_id = ? AND exercise_type_id = ?
+        ORDER BY day, id
+    ''', (member_id, exercise_type_id) * 2)
+    return [
+        (session_id, day,
+         json.loads(reps_json) if reps_json else None,
+         json.loads(seconds_json) if seconds_json else None)
+        for session_id, day, reps_json, seconds_json in cursor.fetchall()
+    ]
+
+def refresh_derived_tables(
+    cursor: sqlite3.Cursor,
+    sessions: List[Tuple[int, int, int]],
+    archive_changed: bool = False
+) -> None:
+    """
+    Recompute the tables derived from the log that the changelog does not
+    carry (leaderboard, goal period totals, lifetime totals, heatmaps and,
+    when the archive changed, archive_state) for the given (member_id,
+    exercise_type_id, day) sessions. Goals, personal bests and achievements
+    are left alone. Replicas call this after applying a batch of changes.
+    """
+    for member_id, exercise_type_id in dict.fromkeys((m, t) for m, t, _ in sessions):
+        cursor.execute('SELECT name FROM members WHERE id = ?', (member_id,))
+        family_member = cursor.fetchone()[0]
+        cursor.execute('SELECT name FROM exercise_types WHERE id = ?', (exercise_type_id,))
+        exercise_type = cursor.fetchone()[0]
+        days = [day for m, t, day in sessions if (m, t) == (member_id, exercise_type_id)]
+        slice_sessions = _slice_sessions(cursor, member_id, exercise_type_id)
+
+        _recompute_slice_totals(
+            cursor, member_id, exercise_type_id, family_member, exercise_type, slice_sessions, days
+        )
+        cursor.execute(
+            'DELETE FROM lifetime_totals WHERE member_id = ? AND exercise_type_id = ?',
+            (member_id, exercise_type_id)
+        )
+        if slice_sessions:
+            cursor.execute('''
+                INSERT INTO lifetime_totals (member_id, exercise_type_id, reps, seconds, sessions)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (
+                member_id, exercise_type_id,
+                sum(sum(reps or []) for _, _, reps, _ in slice_sessions),
+                sum(sum(seconds or []) for _, _, _, seconds in slice_sessions),
+                len(slice_sessions)
+            ))
+
+    for member_id in dict.fromkeys(m for m, _, _ in sessions):
+        _rebuild_activity_heatmap(cursor, member_id, sorted({
+            date.fromordinal(day + EPOCH_ORDINAL).year for m, _, day in sessions if m == member_id
+        }))
+
+    if archive_changed:
+        _refresh_archive_state(cursor)
+
+def _recompute_personal_bests(cursor: sqlite3.Cursor, member_id: int, exercise_type_id: int) -> None:
+    """Reset a slice's personal bests to its best remaining set, first reached on the earliest day."""
+    for measurement_type, column in (('reps', 'reps_per_set'), ('time', 'seconds_per_set')):
+        cursor.execute(f'''
+            SELECT j.value, r.day
+            FROM (
+                SELECT id, day, {column} FROM exercises_data
+                WHERE member_id = ? AND exercise_type_id = ? AND {column} IS NOT NULL
+                UNION ALL
+                SELECT id, day, {column} FROM exercises_archive_data
+                WHERE member_id = ? AND exercise_type_id = ? AND {column} IS NOT NULL
+            ) r, json_each(r.{column}) j
+            ORDER BY j.value DESC, r.day, r.id
+            LIMIT 1
+        ''', (member_id, exercise_type_id) * 2)
+        best = cursor.fetchone()
+
+        cursor.execute('''
+            SELECT value, day FROM personal_bests_data
+            WHERE member_id = ? AND exercise_type_id = ? AND measurement_type = ?
+        ''', (member_id, exercise_type_id, measurement_type))
+        current = cursor.fetchone()
+
+        if best is None and current is not None:
+            cursor.execute('''
+                DELETE FROM personal_bests_data
+                WHERE member_id = ? AND exercise_type_id = ? AND measurement_type = ?
+            ''', (member_id, exercise_type_id, measurement_type))
+        elif best is not None and (current is None or tuple(current) != tuple(best)):
+            cursor.execute('''
+                INSERT INTO personal_bests_data (
+                    member_id, exercise_type_id, measurement_type, value, day
+                ) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(member_id, exercise_type_id, measurement_type)
+                DO UPDATE SET
+                    value = excluded.value,
+                    day = excluded.day
+            ''', (member_id, exercise_type_id, measurement_type, *best))
+
+def _recompute_slice_totals(
+    cursor: sqlite3.Cursor,
+    member_id: int,
+    exercise_type_id: int,
+    family_member: str,
+    exercise_type: str,
+    slice_sessions: List[Tuple[int, int, Optional[List[int]], Optional[List[int]]]],
+    days: List[int]
+) -> None:
+    """Rewrite the slice's leaderboard and goal period total rows for the periods containing `days`."""
+    periods = {
+        key
+        for day in days
+        for key in _leaderboard_period_keys(date.fromordinal(day + EPOCH_ORDINAL))
+    }
+    leaderboard = {key: [0, 0, 0] for key in periods}
+    totals = {key: [0, 0, 0] for key in periods if key[0] != 'all'}
+
+    for _, day, reps_per_set, seconds_per_set in slice_sessions:
+        values = _primary_set_values(exercise_type, reps_per_set, seconds_per_set) or []
+        for key in _leaderboard_period_keys(date.fromordinal(day + EPOCH_ORDINAL)):
+            if key in leaderboard:
+                row = leaderboard[key]
+                row[0] = max(row[0], max(values) if values else 0)
+                row[1] += sum(values)
+                row[2] += 1
+            if key in totals:
+                row = totals[key]
+                row[0] += sum(reps_per_set or [])
+                row[1] += sum(seconds_per_set or [])
+                row[2] += 1
+
+    cursor.executemany('''
+        DELETE FROM leaderboard
+        WHERE period_type = ? AND period_key = ? AND exercise_type = ? AND family_member = ?
+    ''', [(*key, exercise_type, family_member) for key in leaderboard])
+    cursor.executemany('''
+        INSERT INTO leaderboard (
+            period_type, period_key, exercise_type, family_member,
+            max_value, total_volume, session_count
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (*key, exercise_type, family_member, *row)
+        for key, row in leaderboard.items() if row[2]
+    ])
+
+    cursor.executemany('''
+        DELETE FROM goal_period_totals
+        WHERE member_id = ? AND exercise_type_id = ? AND period_type = ? AND period_key = ?
+    ''', [(member_id, exercise_type_id, *key) for key in totals])
+    cursor.executemany('''
+        INSERT INTO goal_period_totals (
+            member_id, exercise_type_id, period_type, period_key, reps, seconds, sessions
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (member_id, exercise_type_id, *key, *row)
+        for key, row in totals.items() if row[2]
+    ])
+
+def _goal_session_value(
+    goal_type: str,
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]]
+) -> Optional[float]:
+    """A single session's value towards a non-windowed goal, or None if it doesn't count."""
+    if goal_type == 'max_reps' and reps_per_set:
+        return max(reps_per_set)
+    if goal_type == 'total_reps' and reps_per_set:
+        return sum(reps_per_set)
+    if goal_type == 'max_time' and seconds_per_set:
+        return max(seconds_per_set)
+    if goal_type == 'total_time' and seconds_per_set:
+        return sum(seconds_per_set)
+    return None
+
+def _reevaluate_goals(
+    cursor: sqlite3.Cursor,
+    member_id: int,
+    exercise_type_id: int,
+    family_member: str,
+    exercise_type: str,
+    slice_sessions: List[Tuple[int, int, Optional[List[int]], Optional[List[int]]]],
+    notify: bool = True
+) -> List[Dict]:
+    """
+    Replay the slice's sessions from each active or achieved goal's start date.
+    Goals marked achieved by hand (without an achievement day) are left alone.
+
+    Progress, current value, status and the achievement are rewritten when the
+    replay disagrees with what is stored, so an achievement earned by a typo is
+    withdrawn and one earned by a correction is recorded.
+
+    Returns:
+        List of achievements newly earned
+    """
+    achievements = []
+
+    cursor.execute('''
+        SELECT id, goal_type, target_value, current_value, status, description, start_day, achievement_day
+        FROM goals_data
+        WHERE member_id = ? AND exercise_type_id = ?
+        AND (status = 'active' OR (status = 'achieved' AND achievement_day IS NOT NULL))
+    ''', (member_id, exercise_type_id))
+
+    for goal in cursor.fetchall():
+        if GOAL_TYPES.get(goal[1], {}).get('window'):
+            achievements.extend(_reevaluate_windowed_goal(
+                cursor, goal, member_id, exercise_type_id, family_member, exercise_type,
+                slice_sessions, notify
+            ))
+            continue
+
+        (goal_id, goal_type, target_value, current_value, status,
+         description, start_day, achievement_day) = goal
+        best = 0
+        progress = []
+        achieved = None
+
+        for _, day, reps_per_set, seconds_per_set in slice_sessions:
+            value = _goal_session_value(goal_type, reps_per_set, seconds_per_set)
+            if day < start_day or not value or value <= best:
+                continue
+            best = value
+            progress.append((
+                date.fromordinal(day + EPOCH_ORDINAL).isoformat(), value,
+                "🎉 Goal Achieved!" if value >= target_value else f"New best: {value}"
+            ))
+            if value >= target_value:
+                achieved = (day, value)
+                break
+
+        cursor.execute('SELECT date, value, notes FROM goal_progress WHERE goal_id = ? ORDER BY date, id',
+                       (goal_id,))
+        if [(str(d)[:10], v, n) for d, v, n in cursor.fetchall()] != progress:
+            cursor.execute('DELETE FROM goal_progress WHERE goal_id = ?', (goal_id,))
+            cursor.executemany('''
+                INSERT INTO goal_progress (goal_id, date, value, notes)
+                VALUES (?, ?, ?, ?)
+            ''', [(goal_id, *point) for point in progress])
+
+        new_status = 'achieved' if achieved else 'active'
+        new_achievement_day = achieved[0] if achieved else None
+        if (best, new_status, new_achievement_day) != (current_value, status, achievement_day):
+            cursor.execute('''
+                UPDATE goals_data
+                SET current_value = ?, status = ?, achievement_day = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (best, new_status, new_achievement_day, goal_id))
+
+        if status == 'achieved' and not achieved:
+            cursor.execute('DELETE FROM achievements_data WHERE goal_id = ?', (goal_id,))
+        elif status == 'achieved':
+            cursor.execute('''
+                UPDATE achievements_data SET achievement_day = ?, achieved_value = ?
+                WHERE goal_id = ? AND (achievement_day != ? OR achieved_value != ?)
+            ''', (*achieved, goal_id, *achieved))
+        elif achieved:
+            achievements.append(_record_goal_achievement(
+                cursor, goal_id, member_id, exercise_type_id, family_member, exercise_type,
+                goal_type, target_value, description, *achieved, notify
+            ))
+
+    return achievements
+
+def _reevaluate_windowed_goal(
+    cursor: sqlite3.Cursor,
+    goal: Tuple,
+    member_id: int,
+    exercise_type_id: int,
+    family_member: str,
+    exercise_type: str,
+    slice_sessions: List[Tuple[int, int, Optional[List[int]], Optional[List[int]]]],
+    notify: bool = True
+) -> List[Dict]:
+    """
+    Replay a windowed goal: a running total per week or month from the goal's
+    start day, and one achievement for every period whose total reached the
+    target. The goal stays active for the next period; its current value is
+    the total of the latest period, its achievement day the latest achievement.
+
+    Returns:
+        List of achievements newly earned
+    """
+    (goal_id, goal_type, target_value, current_value, status,
+     description, start_day, achievement_day) = goal
+    window = GOAL_TYPES[goal_type]['window']
+    period_totals = {}
+    achieved = {}  # period start day -> (achievement day, total)
+    progress = []
+    value = 0
+
+    for _, day, reps_per_set, seconds_per_set in slice_sessions:
+        counted = reps_per_set if GOAL_TYPES[goal_type]['unit'] == 'reps' else seconds_per_set
+        if day < start_day or not counted:
+            continue
+        period_start = _goal_period_bounds(day, window)[0]
+        period_totals[period_start] = value = period_totals.get(period_start, 0) + sum(counted)
+        reached = value >= target_value and period_start not in achieved
+        if reached:
+            achieved[period_start] = (day, value)
+        progress.append((
+            date.fromordinal(day + EPOCH_ORDINAL).isoformat(), value,
+            _windowed_goal_note(window, value, reached)
+        ))
+
+    cursor.execute('SELECT date, value, notes FROM goal_progress WHERE goal_id = ? ORDER BY date, id',
+                   (goal_id,))
+    if [(str(d)[:10], v, n) for d, v, n in cursor.fetchall()] != progress:
+        cursor.execute('DELETE FROM goal_progress WHERE goal_id = ?', (goal_id,))
+        cursor.executemany('''
+            INSERT INTO goal_progress (goal_id, date, value, notes)
+            VALUES (?, ?, ?, ?)
+        ''', [(goal_id, *point) for point in progress])
+
+    latest_day = max((day for day, _ in achieved.values()), default=None)
+    if (value, 'active', latest_day) != (current_value, status, achievement_day):
+        cursor.execute('''
+            UPDATE goals_data
+            SET current_value = ?, status = 'active', achievement_day = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (value, latest_day, goal_id))
+
+    # Keep, move or withdraw each period's recorded achievement
+    cursor.execute('SELECT id, achievement_day, achieved_value FROM achievements_data WHERE goal_id = ?',
+                   (goal_id,))
+    recorded = set()
+    for achievement_id, day, total in cursor.fetchall():
+        period_start = _goal_period_bounds(day, window)[0]
+        if period_start not in achieved or period_start in recorded:
+            cursor.execute('DELETE FROM achievements_data WHERE id = ?', (achievement_id,))
+            continue
+        recorded.add(period_start)
+        if achieved[period_start] != (day, total):
+            cursor.execute(
+                'UPDATE achievements_data SET achievement_day = ?, achieved_value = ? WHERE id = ?',
+                (*achieved[period_start], achievement_id)
+            )
+
+    return [
+        _record_goal_achievement(
+            cursor, goal_id, member_id, exercise_type_id, family_member, exercise_type,
+            goal_type, target_value, description, day, total, notify
+        )
+        for period_start, (day, total) in achieved.items()
+        if period_start not in recorded
+    ]
+
+def _goal_period_bounds(day: Union[int, str, date], window: str) -> Tuple[int, int]:
+    """First and last day number of the week (Monday to Sunday) or month containing `day`."""
+    day = date.fromordinal(day + EPOCH_ORDINAL) if isinstance(day, int) else _to_date(day)
+    if window == 'week':
+        first = day - timedelta(days=day.weekday())
+        last = first + timedelta(days=6)
+    else:
+        first = day.replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return epoch_day(first), epoch_day(last)
+
+def _windowed_goal_note(window: str, value: float, reached: bool) -> str:
+    """goal_progress note for a windowed goal's running total."""
+    return "🎉 Goal Achieved!" if reached else f"This {window}: {value}"
+
+def _record_goal_achievement(
+    cursor: sqlite3.Cursor,
+    goal_id: int,
+    member_id: int,
+    exercise_type_id: int,
+    family_member: str,
+    exercise_type: str,
+    goal_type: str,
+    target_value: float,
+    description: str,
+    day: int,
+    value: float,
+    notify: bool = True
+) -> Dict:
+    """Insert a goal's achievement and queue its event; returns the achievement."""
+    cursor.execute('''
+        INSERT INTO achievements_data (
+            goal_id, member_id, achievement_day,
+            exercise_type_id, goal_type, target_value,
+            achieved_value, description
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (goal_id, member_id, day, exercise_type_id,
+          goal_type, target_value, value, description))
+    achievement = {
+        'goal_id': goal_id,
+        'description': description,
+        'target_value': target_value,
+        'achieved_value': value,
+        'exercise_type': exercise_type,
+        'goal_type': goal_type
+    }
+    if notify:
+        queue_event(cursor, 'achievement', {
+            **achievement,
+            'achievement_id': cursor.lastrowid,
+            'family_member': family_member,
+            'date': date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+        })
+    return achievement
+
+def record_exercise(
+    cursor: sqlite3.Cursor,
+    family_member: str,
+    date: Union[str, date],
+    exercise_type: str,
+    sets: Optional[int],
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]],
+    notes: Optional[str],
+    feeling: Optional[str]
+) -> Tuple[int, List[Dict]]:
+    """
+    Insert an exercise and update all derived tables on the caller's transaction.
+    
+    Returns:
+        Tuple containing (exercise_id, list of achievements)
+    """
+    # Convert lists to JSON strings
+    reps_json = json.dumps(reps_per_set) if reps_per_set else None
+    seconds_json = json.dumps(seconds_per_set) if seconds_per_set else None
+    
+    # Insert exercise record
+    cursor.execute('''
+        INSERT INTO exercises_data (
+            member_id, day, exercise_type_id, sets,
+            reps_per_set, seconds_per_set, notes, feeling
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (_dimension_id(cursor, 'members', family_member), epoch_day(date),
+          _dimension_id(cursor, 'exercise_types', exercise_type), sets,
+          reps_json, seconds_json, notes, feeling))
+    
+    exercise_id = cursor.lastrowid
+    
+    # Update personal bests
+    if reps_per_set:
+        max_reps = max(reps_per_set)
+        update_personal_best(cursor, family_member, exercise_type, 'reps', max_reps, date, exercise_id)
+    
+    if seconds_per_set:
+        max_time = max(seconds_per_set)
+        update_personal_best(cursor, family_member, exercise_type, 'time', max_time, date, exercise_id)
+    
+    # Refresh the affected leaderboard rows
+    update_leaderboard(cursor, family_member, exercise_type, date, reps_per_set, seconds_per_set)
+    
+    # Mark the day on the member's activity heatmaps
+    update_activity_heatmap(cursor, family_member, exercise_type, date)
+    
+    # Roll the session into its week and month totals before windowed goals read them
+    update_goal_period_totals(cursor, family_member, exercise_type, date, reps_per_set, seconds_per_set)
+    
+    # Add the session to the lifetime totals and record any milestones it crosses
+    achievements = update_lifetime_totals(
+        cursor, family_member, exercise_type, date, reps_per_set, seconds_per_set
+    )
+    
+    # Check and update goals, get achievements
+    achievements += update_goals_for_exercise(
+        cursor, family_member, exercise_type, date, reps_per_set, seconds_per_set
+    )
+    
+    return exercise_id, achievements
+
+def update_goal_period_totals(
+    cursor: sqlite3.Cursor,
+    family_member: str,
+    exercise_type: str,
+    date: Union[str, date],
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]]
+) -> None:
+    """Add one session to the running week and month totals used by windowed goals."""
+    member_id = _dimension_id(cursor, 'members', family_member)
+    exercise_type_id = _dimension_id(cursor, 'exercise_types', exercise_type)
+    reps = sum(reps_per_set or [])
+    seconds = sum(seconds_per_set or [])
+    
+    cursor.executemany('''
+        INSERT INTO goal_period_totals (
+            member_id, exercise_type_id, period_type, period_key, reps, seconds, sessions
+        ) VALUES (?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT(member_id, exercise_type_id, period_type, period_key)
+        DO UPDATE SET
+            reps = reps + excluded.reps,
+            seconds = seconds + excluded.seconds,
+            sessions = sessions + 1
+    ''', [
+        (member_id, exercise_type_id, period_type, period_key, reps, seconds)
+        for period_type, period_key in _leaderboard_period_keys(date)
+        if period_type != 'all'
+    ])
+
+def _rebuild_goal_period_totals(cursor: sqlite3.Cursor) -> None:
+    """Repopulate the week and month totals on the caller's transaction from the log."""
+    cursor.execute('DELETE FROM goal_period_totals')
+    rows = cursor.connection.execute('''
+        SELECT family_member, exercise_type, date, reps_per_set, seconds_per_set
+        FROM exercises
+        UNION ALL
+        SELECT family_member, exercise_type, date, reps_per_set, seconds_per_set
+        FROM exercises_archive
+    ''')
+    for family_member, exercise_type, day, reps_json, seconds_json in rows:
+        update_goal_period_totals(
+            cursor, family_member, exercise_type, day,
+            json.loads(reps_json) if reps_json else None,
+            json.loads(seconds_json) if seconds_json else None
+        )
+
+# Achievement goal_type recorded for each MILESTONES metric; milestones have no goal_id
+MILESTONE_GOAL_TYPES = {
+    'reps': 'lifetime_reps',
+    'seconds': 'lifetime_time',
+    'sessions': 'lifetime_sessions'
+}
+
+def _crossed_milestones(metric: str, old_total: int, new_total: int) -> List[int]:
+    """Thresholds of a metric passed on the way from old_total to new_total."""
+    thresholds = MILESTONES.get(metric, [])
+    return thresholds[bisect_right(thresholds, old_total):bisect_right(thresholds, new_total)]
+
+def _milestone_description(metric: str, threshold: int, exercise_type: str) -> str:
+    """Badge text, e.g. '1,000 lifetime pull ups' or '1 hour of hangs in total'."""
+    exercise = exercise_type.replace('_', ' ')
+    if metric == 'reps':
+        return f"{threshold:,} lifetime {exercise}"
+    if metric == 'sessions':
+        return f"{threshold:,} {exercise} sessions logged"
+    if threshold % 3600 == 0:
+        hours = threshold // 3600
+        return f"{hours} hour{'s' if hours != 1 else ''} of {exercise} in total"
+    return f"{threshold // 60} minutes of {exercise} in total"
+
+def _record_milestone(
+    cursor: sqlite3.Cursor,
+    member_id: int,
+    exercise_type_id: int,
+    family_member: str,
+    exercise_type: str,
+    metric: str,
+    threshold: int,
+    total: int,
+    day: int,
+    notify: bool = True
+) -> Dict:
+    """Record a milestone achievement and, if notify, queue its event."""
+    achievement = {
+        'goal_id': None,
+        'description': _milestone_description(metric, threshold, exercise_type),
+        'target_value': threshold,
+        'achieved_value': total,
+        'exercise_type': exercise_type,
+        'goal_type': MILESTONE_GOAL_TYPES[metric]
+    }
+    cursor.execute('''
+        INSERT INTO achievements_data (
+            goal_id, member_id, achievement_day, exercise_type_id,
+            goal_type, target_value, achieved_value, description
+        ) VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)
+    ''', (member_id, day, exercise_type_id, achievement['goal_type'],
+          threshold, total, achievement['description']))
+    if notify:
+        queue_event(cursor, 'achievement', {
+            **achievement,
+            'achievement_id': cursor.lastrowid,
+            'family_member': family_member,
+            'date': date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+        })
+    return achievement
+
+def update_lifetime_totals(
+    cursor: sqlite3.Cursor,
+    family_member: str,
+    exercise_type: str,
+    date: Union[str, date],
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]]
+) -> List[Dict]:
+    """
+    Add one session to the member's lifetime totals for the exercise and record
+    the milestones it crosses. Only the running totals are read, never the log.
+
+    Milestones are dated on the session's day. For a back-dated session the
+    running total may have crossed them later; edits and deletes of the slice
+    and the maintenance pass (redate_lifetime_milestones) move them to that day.
+
+    Returns:
+        List of milestone achievements
+    """
+    member_id = _dimension_id(cursor, 'members', family_member)
+    exercise_type_id = _dimension_id(cursor, 'exercise_types', exercise_type)
+    added = {'reps': sum(reps_per_set or []), 'seconds': sum(seconds_per_set or []), 'sessions': 1}
+
+    cursor.execute('''
+        INSERT INTO lifetime_totals (member_id, exercise_type_id, reps, seconds, sessions)
+        VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT(member_id, exercise_type_id)
+        DO UPDATE SET
+            reps = reps + excluded.reps,
+            seconds = seconds + excluded.seconds,
+            sessions = sessions + 1
+        RETURNING reps, seconds, sessions
+    ''', (member_id, exercise_type_id, added['reps'], added['seconds']))
+    totals = dict(zip(('reps', 'seconds', 'sessions'), cursor.fetchone()))
+
+    return [
+        _record_milestone(
+            cursor, member_id, exercise_type_id, family_member, exercise_type,
+            metric, threshold, totals[metric], epoch_day(date)
+        )
+        for metric in MILESTONES
+        for threshold in _crossed_milestones(metric, totals[metric] - added[metric], totals[metric])
+    ]
+
+def _rebuild_lifetime_totals(
+    cursor: sqlite3.Cursor,
+    member_id: Optional[int] = None,
+    exercise_type_id: Optional[int] = None,
+    notify: bool = False
+) -> List[Dict]:
+    """
+    Recompute lifetime totals on the caller's transaction from the log, optionally
+    for one (member, exercise) slice, and bring milestone achievements in line:
+    milestones no longer reached are withdrawn, and newly reached ones are
+    recorded on the day the running total crossed them.
+
+    Returns:
+        List of milestone achievements newly recorded
+    """
+    where, params = '', []
+    if member_id is not None:
+        where += ' AND member_id = ?'
+        params.append(member_id)
+    if exercise_type_id is not None:
+        where += ' AND exercise_type_id = ?'
+        params.append(exercise_type_id)
+
+    cursor.execute('SELECT id, name FROM members')
+    member_names = dict(cursor.fetchall())
+    cursor.execute('SELECT id, name FROM exercise_types')
+    exercise_names = dict(cursor.fetchall())
+
+    # Running totals in date order, noting the day each threshold was crossed
+    totals, reached = {}, {}
+    rows = cursor.connection.execute(f'''
+        SELECT id, member_id, exercise_type_id, day, reps_per_set, seconds_per_set
+        FROM exercises_data WHERE 1=1 {where}
+        UNION ALL
+        SELECT id, member_id, exercise_type_id, day, reps_per_set, seconds_per_set
+        FROM exercises_archive_data WHERE 1=1 {where}
+        ORDER BY member_id, exercise_type_id, day, id
+    ''', params * 2)
+    for _, member, exercise, day, reps_json, seconds_json in rows:
+        current = totals.setdefault((member, exercise), {'reps': 0, 'seconds': 0, 'sessions': 0})
+        added = {
+            'reps': sum(json.loads(reps_json)) if reps_json else 0,
+            'seconds': sum(json.loads(seconds_json)) if seconds_json else 0,
+            'sessions': 1
+        }
+        for metric in MILESTONES:
+            for threshold in _crossed_milestones(metric, current[metric], current[metric] + added[metric]):
+                reached[(member, exercise, metric, threshold)] = (day, current[metric] + added[metric])
+            current[metric] += added[metric]
+
+    cursor.execute(f'DELETE FROM lifetime_totals WHERE 1=1 {where}', params)
+    cursor.executemany('''
+        INSERT INTO lifetime_totals (member_id, exercise_type_id, reps, seconds, sessions)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (member, exercise, current['reps'], current['seconds'], current['sessions'])
+        for (member, exercise), current in totals.items()
+    ])
+
+    metrics = {goal_type: metric for metric, goal_type in MILESTONE_GOAL_TYPES.items()}
+    cursor.execute(f'''
+        SELECT id, member_id, exercise_type_id, goal_type, target_value, achievement_day, achieved_value
+        FROM achievements_data
+        WHERE goal_id IS NULL AND goal_type IN ({', '.join('?' * len(metrics))}) {where}
+    ''', [*metrics, *params])
+    recorded = set()
+    for achievement_id, member, exercise, goal_type, threshold, day, total in cursor.fetchall():
+        key = (member, exercise, metrics[goal_type], threshold)
+        if key not in reached:
+            cursor.execute('DELETE FROM achievements_data WHERE id = ?', (achievement_id,))
+            continue
+        recorded.add(key)
+        if reached[key] != (day, total):
+            # An edited session moved the day the threshold was crossed
+            cursor.execute(
+                'UPDATE achievements_data SET achievement_day = ?, achieved_value = ? WHERE id = ?',
+                (*reached[key], achievement_id)
+            )
+
+    return [
+        _record_milestone(
+            cursor, member, exercise, member_names[member], exercise_names[exercise],
+            metric, threshold, total, day, notify
+        )
+        for (member, exercise, metric, threshold), (day, total) in reached.items()
+        if (member, exercise, metric, threshold) not in recorded
+    ]
+
+def redate_lifetime_milestones(
+    cursor: sqlite3.Cursor,
+    member_id: int,
+    exercise_type_id: int
+) -> int:
+    """
+    Replay one (member, exercise) slice on the caller's transaction so its
+    milestones carry the day the running total crossed them in date order,
+    as after an edit. Returns the number of milestones newly recorded.
+    """
+    return len(_rebuild_lifetime_totals(cursor, member_id, exercise_type_id))
+
+def _windowed_goal_value(
+    cursor: sqlite3.Cursor,
+    member_id: int,
+    exercise_type_id: int,
+    date: Union[str, date],
+    goal_type: str,
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]],
+    start_day: int
+) -> Optional[float]:
+    """
+    Running total for a windowed goal over the week or month containing `date`,
+    read from goal_period_totals with one key lookup. In the period the goal
+    starts in, only sessions from its start day count, summed from the slice
+    index instead. None if the session did not add to the goal's measure.
+    """
+    goal = GOAL_TYPES[goal_type]
+    column = 'reps' if goal['unit'] == 'reps' else 'seconds'
+    if not (reps_per_set if column == 'reps' else seconds_per_set):
+        return None
+    
+    period_start, period_end = _goal_period_bounds(date, goal['window'])
+    if start_day > period_start:
+        log_column = 'reps_per_set' if column == 'reps' else 'seconds_per_set'
+        cursor.execute(f'''
+            SELECT SUM(j.value)
+            FROM (
+                SELECT {log_column} FROM exercises_data
+                WHERE member_id = ? AND exercise_type_id = ? AND day BETWEEN ? AND ?
+                UNION ALL
+                SELECT {log_column} FROM exercises_archive_data
+                WHERE member_id = ? AND exercise_type_id = ? AND day BETWEEN ? AND ?
+            ) r, json_each(r.{log_column}) j
+        ''', (member_id, exercise_type_id, start_day, period_end) * 2)
+        return cursor.fetchone()[0]
+    
+    cursor.execute(f'''
+        SELECT {column} FROM goal_period_totals
+        WHERE member_id = ? AND exercise_type_id = ?
+        AND period_type = ? AND period_key = ?
+    ''', (member_id, exercise_type_id, goal['window'],
+          dict(_leaderboard_period_keys(date))[goal['window']]))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_goal_period_total(
+    family_member: str,
+    exercise_type: str,
+    goal_type: str,
+    as_of: Optional[Union[str, date]] = None
+) -> float:
+    """Total so far for a windowed goal type in the week or month containing `as_of` (default today)."""
+    goal = GOAL_TYPES[goal_type]
+    column = 'reps' if goal['unit'] == 'reps' else 'seconds'
+    period_key = dict(_leaderboard_period_keys(as_of or date.today()))[goal['window']]
+    
+    conn = connect_db()
+    row = conn.execute(f'''
+        SELECT {column} FROM goal_period_totals
+        WHERE member_id = (SELECT id FROM members WHERE name = ?)
+        AND exercise_type_id = (SELECT id FROM exercise_types WHERE name = ?)
+        AND period_type = ? AND period_key = ?
+    ''', (family_member, exercise_type, goal['window'], period_key)).fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def update_personal_best(
+    cursor: sqlite3.Cursor,
+    family_member: str,
+    exercise_type: str,
+    measurement_type: str,
+    value: float,
+    date: Union[str, date],
+    exercise_id: Optional[int] = None
+) -> None:
+    """Update personal best if the new value is higher, recording the improvement."""
+    member_id = _dimension_id(cursor, 'members', family_member)
+    exercise_type_id = _dimension_id(cursor, 'exercise_types', exercise_type)
+    
+    cursor.execute('''
+        SELECT value FROM personal_bests_data
+        WHERE member_id = ? AND exercise_type_id = ? AND measurement_type = ?
+    ''', (member_id, exercise_type_id, measurement_type))
+    row = cursor.fetchone()
+    previous_value = row[0] if row else None
+    
+    if previous_value is not None and value <= previous_value:
+        return
+    
+    cursor.execute('''
+        INSERT INTO personal_bests_data (
+            member_id, exercise_type_id, measurement_type, value, day
+        ) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(member_id, exercise_type_id, measurement_type)
+        DO UPDATE SET
+            value = excluded.value,
+            day = excluded.day
+    ''', (member_id, exercise_type_id, measurement_type, value, epoch_day(date)))
+    
+    cursor.execute('''
+        INSERT INTO personal_best_events (
+            family_member, exercise_type, measurement_type,
+            value, previous_value, date, exercise_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (family_member, exercise_type, measurement_type,
+          value, previous_value, date, exercise_id))
+    
+    queue_event(cursor, 'personal_best', {
+        'family_member': family_member,
+        'exercise_type': exercise_type,
+        'measurement_type': measurement_type,
+        'value': value,
+        'previous_value': previous_value,
+        'date': date,
+        'exercise_id': exercise_id
+    })
+
+def queue_event(cursor: sqlite3.Cursor, event_type: str, payload: Dict[str, Any]) -> None:
+    """Add an event to the outbox on the caller's transaction; events.py delivers it after commit."""
+    cursor.execute(
+        'INSERT INTO event_outbox (event_type, payload) VALUES (?, ?)',
+        (event_type, json.dumps(payload, default=str))
+    )
+
+def _rebuild_pb_events(
+    cursor: sqlite3.Cursor,
+    family_member: Optional[str] = None,
+    exercise_type: Optional[str] = None
+) -> None:
+    """
+    Recompute personal best events from the log in one pass, optionally for one
+    (member, exercise) slice, using a running max window over sessions in date order.
+    """
+    where = ''
+    params = []
+    if family_member:
+        where += ' AND family_member = ?'
+        params.append(family_member)
+    if exercise_type:
+        where += ' AND exercise_type = ?'
+        params.append(exercise_type)
+    
+    cursor.execute('DELETE FROM personal_best_events WHERE 1=1' + where, params)
+    cursor.execute(f'''
+        INSERT INTO personal_best_events (
+            family_member, exercise_type, measurement_type,
+            value, previous_value, date, exercise_id
+        )
+        WITH log AS (
+            SELECT * FROM exercises WHERE 1=1 {where}
+            UNION ALL
+            SELECT * FROM exercises_archive WHERE 1=1 {where}
+        ),
+        sessions AS (
+            SELECT id, family_member, exercise_type, date, 'reps' AS measurement_type,
+                   (SELECT MAX(value) FROM json_each(log.reps_per_set)) AS value
+            FROM log WHERE reps_per_set IS NOT NULL
+            UNION ALL
+            SELECT id, family_member, exercise_type, date, 'time' AS measurement_type,
+                   (SELECT MAX(value) FROM json_each(log.seconds_per_set)) AS value
+            FROM log WHERE seconds_per_set IS NOT NULL
+        ),
+        running AS (
+            SELECT *, MAX(value) OVER (
+                PARTITION BY family_member, exercise_type, measurement_type
+                ORDER BY date, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS previous_value
+            FROM sessions
+            WHERE value IS NOT NULL
+        )
+        SELECT family_member, exercise_type, measurement_type,
+               value, previous_value, date, id
+        FROM running
+        WHERE previous_value IS NULL OR value > previous_value
+        ORDER BY date, id
+    ''', params * 2)
+
+def get_pb_timeline(
+    family_member: str,
+    exercise_type: str,
+    measurement_type: Optional[str] = None
+) -> pd.DataFrame:
+    """Retrieve every personal best improvement for a member and exercise, oldest first."""
+    conn = connect_db()
+    
+    query = '''
+        SELECT date, measurement_type, value, previous_value, exercise_id
+        FROM personal_best_events
+        WHERE family_member = ? AND exercise_type = ?
+    '''
+    params = [family_member, exercise_type]
+    
+    if measurement_type:
+        query += ' AND measurement_type = ?'
+        params.append(measurement_type)
+    
+    query += ' ORDER BY date, id'
+    
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
+
+def _to_date(value: Union[str, date, datetime]) -> date:
+    """Normalise a date argument (date, datetime or ISO string) to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+def epoch_day(value: Optional[Union[str, date, datetime]]) -> Optional[int]:
+    """Convert a date argument to the day number stored in the compact tables."""
+    if value is None or value == '':
+        return None
+    return _to_date(value).toordinal() - EPOCH_ORDINAL
+
+def _dimension_id(cursor: sqlite3.Cursor, table: str, name: str) -> int:
+    """Return the id of a name in members or exercise_types, adding it if it is new."""
+    cursor.execute(f'SELECT id FROM {table} WHERE name = ?', (name,))
+    row = cursor.fetchone()
+    if row:
+        return row[0]
+    cursor.execute(f'INSERT INTO {table} (name) VALUES (?)', (name,))
+    return cursor.lastrowid
+
+def build_compact_query(view: str, where: str = '', columns: str = '*') -> str:
+    """
+    Build a query returning the legacy columns of one of the COMPAT_VIEWS.
+    
+    `where` is appended as ANDed conditions on the compact row r, so filters
+    on member_id, exercise_type_id and day columns can use their indexes.
+    """
+    return f'SELECT {columns} FROM ({COMPAT_VIEWS[view]} WHERE 1=1{where})'
+
+def _leaderboard_period_keys(day: Union[str, date]) -> List[Tuple[str, str]]:
+    """Return the (period_type, period_key) pairs a session on `day` counts towards."""
+    day = _to_date(day)
+    iso_year, iso_week, _ = day.isocalendar()
+    return [
+        ('week', f'{iso_year}-W{iso_week:02d}'),
+        ('month', day.strftime('%Y-%m')),
+        ('all', 'all')
+    ]
+
+def _primary_set_values(
+    exercise_type: str,
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]]
+) -> Optional[List[int]]:
+    """Pick the per-set values used for ranking (reps, or seconds for timed exercises)."""
+    measurements = EXERCISE_TYPES.get(exercise_type, {}).get('measurements', [])
+    if 'reps' in measurements and reps_per_set:
+        return reps_per_set
+    if 'time' in measurements and seconds_per_set:
+        return seconds_per_set
+    return reps_per_set or seconds_per_set
+
+def update_leaderboard(
+    cursor: sqlite3.Cursor,
+    family_member: str,
+    exercise_type: str,
+    date: Union[str, date],
+    reps_per_set: Optional[List[int]],
+    seconds_per_set: Optional[List[int]]
+) -> None:
+    """Fold one session into the week, month and all-time leaderboard rows."""
+    values = _primary_set_values(exercise_type, reps_per_set, seconds_per_set) or []
+    max_value = max(values) if values else 0
+    total_volume = sum(values)
+
+    cursor.executemany('''
+        INSERT INTO leaderboard (
+            period_type, period_key, exercise_type, family_member,
+            max_value, total_volume, session_count
+        ) VALUES (?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT(period_type, period_key, exercise_type, family_member)
+        DO UPDATE SET
+            max_value = MAX(max_value, excluded.max_value),
+            total_volume = total_volume + excluded.total_volume,
+            session_count = session_count + 1,
+            updated_at = CURRENT_TIMESTAMP
+    ''', [
+        (period_type, period_key, exercise_type, family_member, max_value, total_volume)
+        for period_type, period_key in _leaderboard_period_keys(date)
+    ])
+
+def rebuild_leaderboard() -> None:
+    """Recompute the whole leaderboard table from the exercises log."""
+    conn = connect_db()
+    c = conn.cursor()
+
+    try:
+        _rebuild_leaderboard(c)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def _rebuild_leaderboard(
+    cursor: sqlite3.Cursor,
+    progress: Optional[Callable[[str], None]] = None
+) -> None:
+    """Repopulate the leaderboard on the caller's transaction, reporting progress."""
+    cursor.execute('DELETE FROM leaderboard')
+    rows = cursor.connection.execute('''
+        SELECT family_member, exercise_type, date, reps_per_set, seconds_per_set
+        FROM exercises
+        UNION ALL
+        SELECT family_member, exercise_type, date, reps_per_set, seconds_per_set
+        FROM exercises_archive
+    ''')
+    processed = 0
+    for family_member, exercise_type, day, reps_json, seconds_json in rows:
+        update_leaderboard(
+            cursor, family_member, exercise_type, day,
+            json.loads(reps_json) if reps_json else None,
+            json.loads(seconds_json) if seconds_json else None
+        )
+        processed += 1
+        if progress and processed % 10000 == 0:
+            progress(f"  leaderboard: {processed} sessions processed")
+    if progress:
+        progress(f"  leaderboard: {processed} sessions processed")
+
+def get_leaderboard(
+    exercise_type: str,
+    period: str = 'week',
+    metric: str = 'max_value',
+    as_of: Optional[Union[str, date]] = None
+) -> pd.DataFrame:
+    """
+    Rank family members for one exercise over a week, month or all time.
+
+    Returns:
+        DataFrame with family_member, max_value, total_volume,
+        session_count and rank, best first
+    """
+    if period not in LEADERBOARD_PERIODS:
+        raise ValueError(f"Unknown leaderboard period: {period}")
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"Unknown leaderboard metric: {metric}")
+
+    period_key = dict(_leaderboard_period_keys(as_of or date.today()))[period]
+
+    conn = connect_db()
+    df = pd.read_sql_query(f'''
+        SELECT family_member, max_value, total_volume, session_count,
+               RANK() OVER (ORDER BY {metric} DESC) AS rank
+        FROM leaderboard
+        WHERE period_type = ? AND period_key = ? AND exercise_type = ?
+        ORDER BY {metric} DESC
+    ''', conn, params=[period, period_key, exercise_type])
+    conn.close()
+    return df
+
+def _heatmap_day_index(day: date) -> int:
+    """Position of a day in its year's heatmap arrays."""
+    return day.timetuple().tm_yday - 1
+
+def _mark_heatmap_day(active: bytearray, intensity: bytearray, index: int, sessions: int) -> None:
+    """Set a day's activity bit and add sessions to its intensity."""
+    active[index >> 3] |= 1 << (index & 7)
+    intensity[index] = min(intensity[index] + sessions, 255)
+
+def update_activity_heatmap(
+    cursor: sqlite3.Cursor,
+    family_member: str,
+    exercise_type: str,
+    date: Union[str, date]
+) -> None:
+    """Fold one session into the member's heatmap rows for its exercise and for all exercises."""
+    day = _to_date(date)
+    index = _heatmap_day_index(day)
+    member_id = _dimension_id(cursor, 'members', family_member)
+    
+    for exercise_type_id in (_dimension_id(cursor, 'exercise_types', exercise_type), HEATMAP_ALL_EXERCISES):
+        cursor.execute('''
+            SELECT active, intensity FROM activity_heatmap
+            WHERE member_id = ? AND exercise_type_id = ? AND year = ?
+        ''', (member_id, exercise_type_id, day.year))
+        row = cursor.fetchone()
+        active = bytearray(row[0] if row else HEATMAP_BITSET_BYTES)
+        intensity = bytearray(row[1] if row else HEATMAP_DAYS)
+        _mark_heatmap_day(active, intensity, index, 1)
+        cursor.execute('''
+            INSERT OR REPLACE INTO activity_heatmap (
+                member_id, exercise_type_id, year, active, intensity
+            ) VALUES (?, ?, ?, ?, ?)
+        ''', (member_id, exercise_type_id, day.year, bytes(active), bytes(intensity)))
+
+def rebuild_activity_heatmap() -> None:
+    """Recompute every activity heatmap from the exercises log."""
+    conn = connect_db()
+    c = conn.cursor()
+
+    try:
+        _rebuild_activity_heatmap(c)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def _rebuild_activity_heatmap(
+    cursor: sqlite3.Cursor,
+    member_id: Optional[int] = None,
+    years: Optional[List[int]] = None
+) -> None:
+    """
+    Repopulate the activity heatmaps on the caller's transaction from per-day
+    session counts, optionally only one member's rows for some years.
+    """
+    delete_where = ''
+    where = ''
+    delete_params = []
+    params = []
+    if member_id is not None:
+        delete_where += ' AND member_id = ?'
+        where += ' AND member_id = ?'
+        delete_params.append(member_id)
+        params.append(member_id)
+    if years:
+        delete_where += f" AND year IN ({', '.join('?' for _ in years)})"
+        where += ' AND (' + ' OR '.join('day BETWEEN ? AND ?' for _ in years) + ')'
+        delete_params.extend(years)
+        for year in years:
+            params.extend([epoch_day(date(year, 1, 1)), epoch_day(date(year, 12, 31))])
+
+    cursor.execute('DELETE FROM activity_heatmap WHERE 1=1' + delete_where, delete_params)
+    rows = cursor.connection.execute(f'''
+        SELECT member_id, exercise_type_id, day, COUNT(*)
+        FROM (
+            SELECT member_id, exercise_type_id, day FROM exercises_data WHERE 1=1 {where}
+            UNION ALL
+            SELECT member_id, exercise_type_id, day FROM exercises_archive_data WHERE 1=1 {where}
+        )
+        GROUP BY member_id, exercise_type_id, day
+    ''', params * 2)
+    
+    heatmaps = {}
+    for member_id, exercise_type_id, day_number, sessions in rows:
+        day = date.fromordinal(day_number + EPOCH_ORDINAL)
+        index = _heatmap_day_index(day)
+        for key in ((member_id, exercise_type_id, day.year), (member_id, HEATMAP_ALL_EXERCISES, day.year)):
+            if key not in heatmaps:
+                heatmaps[key] = (bytearray(HEATMAP_BITSET_BYTES), bytearray(HEATMAP_DAYS))
+            _mark_heatmap_day(*heatmaps[key], index, sessions)
+    
+    cursor.executemany('''
+        INSERT INTO activity_heatmap (member_id, exercise_type_id, year, active, intensity)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [
+        (*key, bytes(active), bytes(intensity))
+        for key, (active, intensity) in heatmaps.items()
+    ])
+
+def get_activity_heatmap(
+    family_member: str,
+    exercise_type: Optional[str] = None,
+    years: Optional[List[int]] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Retrieve a member's activity heatmaps, for one exercise or all exercises.
+    
+    Returns:
+        Dictionary mapping year to its raw 'active' bitset and 'intensity'
+        bytes plus the number of 'active_days', oldest year first
+    """
+    conn = connect_db()
+    
+    query = '''
+        SELECT year, active, intensity FROM activity_heatmap
+        WHERE member_id = (SELECT id FROM members WHERE name = ?)
+    '''
+    params = [family_member]
+    
+    if exercise_type:
+        query += ' AND exercise_type_id = (SELECT id FROM exercise_types WHERE name = ?)'
+        params.append(exercise_type)
+    else:
+        query += ' AND exercise_type_id = ?'
+        params.append(HEATMAP_ALL_EXERCISES)
+    if years:
+        query += f" AND year IN ({', '.join('?' for _ in years)})"
+        params.extend(years)
+    
+    query += ' ORDER BY year'
+    
+    heatmaps = {
+        year: {
+            'active': active,
+            'intensity': intensity,
+            'active_days': int.from_bytes(active, 'little').bit_count()
+        }
+        for year, active, intensity in conn.execute(query, params)
+    }
+    conn.close()
+    return heatmaps
+
+def build_exercises_query(
+    conn: sqlite3.Connection,
+    family_member: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    exercise_type: Optional[str] = None,
+    columns: str = '*'
+) -> Tuple[str, List[Any]]:
+    """
+    Build the filtered exercises query, newest first.
+    
+    Returns:
+        Tuple containing (SQL, parameters); the archive is only included
+        when the requested range reaches into it
+    """
+    where = ''
+    params = []
+    
+    if family_member:
+        where += ' AND r.member_id = (SELECT id FROM members WHERE name = ?)'
+        params.append(family_member)
+    if start_date:
+        where += ' AND r.day >= ?'
+        params.append(epoch_day(start_date))
+    if end_date:
+        where += ' AND r.day <= ?'
+        params.append(epoch_day(end_date))
+    if exercise_type:
+        where += ' AND r.exercise_type_id = (SELECT id FROM exercise_types WHERE name = ?)'
+        params.append(exercise_type)
+    
+    query = build_compact_query('exercises', where, columns)
+    
+    # Only touch the archive when the requested range reaches into it
+    archived_through = _get_archived_through(conn)
+    if archived_through and (not start_date or str(start_date) <= archived_through):
+        query += ' UNION ALL ' + build_compact_query('exercises_archive', where, columns)
+        params = params * 2
+    
+    query += ' ORDER BY date DESC, created_at DESC'
+    return query, params
+
+def get_exercises(
+    family_member: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    exercise_type: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None
+) -> pd.DataFrame:
+    """
+    Retrieve exercise records with optional filtering.
+    
+    Pass conn to read from another connection, such as the analytics snapshot;
+    it is left open.
+    
+    Returns:
+        DataFrame containing exercise records
+    """
+    owns_connection = conn is None
+    if owns_connection:
+        conn = connect_db()
+    
+    query, params = build_exercises_query(
+        conn, family_member, start_date, end_date, exercise_type
+    )
+    
+    df = pd.read_sql_query(query, conn, params=params)
+    
+    # Parse JSON columns
+    if not df.empty:
+        df['reps_per_set'] = df['reps_per_set'].apply(
+            lambda x: json.loads(x) if isinstance(x, str) and x else None
+        )
+        df['seconds_per_set'] = df['seconds_per_set'].apply(
+            lambda x: json.loads(x) if isinstance(x, str) and x else None
+        )
+    
+    if owns_connection:
+        conn.close()
+    return df
+
+def _get_archived_through(conn: sqlite3.Connection) -> Optional[str]:
+    """Return the newest date held in exercises_archive, or None if nothing is archived."""
+    row = conn.execute(
+        "SELECT archived_through FROM archive_state WHERE table_name = 'exercises'"
+    ).fetchone()
+    return row[0] if row else None
+
+def _refresh_archive_state(cursor: sqlite3.Cursor) -> None:
+    """Point archive_state at the newest archived day, or clear it when the archive is empty."""
+    cursor.execute('SELECT MAX(day) FROM exercises_archive_data')
+    newest = cursor.fetchone()[0]
+    if newest is None:
+        cursor.execute("DELETE FROM archive_state WHERE table_name = 'exercises'")
+        return
+    cursor.execute('''
+        INSERT INTO archive_state (table_name, archived_through)
+        VALUES ('exercises', ?)
+        ON CONFLICT(table_name) DO UPDATE SET
+            archived_through = excluded.archived_through,
+            updated_at = CURRENT_TIMESTAMP
+    ''', (date.fromordinal(newest + EPOCH_ORDINAL).isoformat(),))
+
+def archive_old_exercises(horizon_days: Optional[int] = None) -> int:
+    """
+    Move sessions older than the horizon from exercises to exercises_archive.
+    
+    Returns:
+        Number of sessions archived
+    """
+    horizon_days = ARCHIVE_HORIZON_DAYS if horizon_days is None else horizon_days
+    cutoff = epoch_day(date.today() - timedelta(days=horizon_days))
+    
+    conn = connect_db()
+    c = conn.cursor()
+    
+    try:
+        c.execute('''
+            INSERT INTO exercises_archive_data
+            SELECT * FROM exercises_data WHERE day < ?
+        ''', (cutoff,))
+        c.execute('DELETE FROM exercises_data WHERE day < ?', (cutoff,))
+        moved = c.rowcount
+        
+        if moved:
+            _refresh_archive_state(c)
+        
+        conn.commit()
+        return moved
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all words, ignoring FTS5 operators."""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"' for term in terms)
+
+def search_notes(
+    query: str,
+    family_member: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    limit: int = 50,
+    conn: Optional[sqlite3.Connection] = None
+) -> pd.DataFrame:
+    """
+    Full-text search over exercise notes, achievement notes and goal descriptions.
+    
+    Pass conn to search another connection, such as the analytics snapshot;
+    it is left open.
+    
+    Returns:
+        DataFrame with source, source_id, family_member, date and a
+        highlighted snippet, best match first
+    """
+    fts_query = _fts_query(query)
+    if not fts_query:
+        return pd.DataFrame(columns=['source', 'source_id', 'family_member', 'date', 'snippet'])
+    
+    owns_connection = conn is None
+    if owns_connection:
+        conn = connect_db()
+    
+    sql = '''
+        SELECT source, rowid / 4 AS source_id, family_member, date,
+               snippet(notes_fts, 0, '**', '**', '…', 12) AS snippet
+        FROM notes_fts
+        WHERE notes_fts MATCH ?
+    '''
+    params = [fts_query]
+    
+    if family_member:
+        sql += ' AND family_member = ?'
+        params.append(family_member)
+    if start_date:
+        sql += ' AND date >= ?'
+        params.append(start_date)
+    if end_date:
+        sql += ' AND date <= ?'
+        params.append(end_date)
+    
+    sql += ' ORDER BY rank LIMIT ?'
+    params.append(limit)
+    
+    df = pd.read_sql_query(sql, conn, params=params)
+    if owns_connection:
+        conn.close()
+    return df
+
+def get_personal_bests(
+    family_member: Optional[str] = None,
+    exercise_type: Optional[str] = None
+) -> pd.DataFrame:
+    """Retrieve personal bests with optional filtering."""
+    conn = connect_db()
+    
+    where = ''
+    params = []
+    
+    if family_member:
+        where += ' AND r.member_id = (SELECT id FROM members WHERE name = ?)'
+        params.append(family_member)
+    if exercise_type:
+        where += ' AND r.exercise_type_id = (SELECT id FROM exercise_types WHERE name = ?)'
+        params.append(exercise_type)
+    
+    df = pd.read_sql_query(build_compact_query('personal_bests', where), conn, params=params)
+    conn.close()
+    return df
+
+def add_goal(
+    family_member: str,
+    exercise_type: str,
+    goal_type: str,
+    target_value: float,
+    start_date: Union[str, date],
+    target_date: Optional[Union[str, date]] = None,
+    description: Optional[str] = None
+) -> int:
+    """Add a new goal to the database."""
+    conn = connect_db()
+    c = conn.cursor()
+    
+    try:
+        c.execute('''
+            INSERT INTO goals_data (
+                member_id, exercise_type_id, goal_type, target_value,
+                start_day, target_day, description
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (_dimension_id(c, 'members', family_member),
+              _dimension_id(c, 'exercise_types', exercise_type), goal_type, target_value,
+              epoch_day(start_date), epoch_day(target_date), description))
+        
+        goal_id = c.lastrowid
+        conn.commit()
+        return goal_id
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def get_goals(
+    family_member: Optional[str] = None,
+    status: str = 'active'
+) -> pd.DataFrame:
+    """Retrieve goals with optional filtering."""
+    conn = connect_db()
+    
+    where = ' AND r.status = ?'
+    params = [status]
+    
+    if family_member:
+        where += ' AND r.member_id = (SELECT id FROM members WHERE name = ?)'
+        params.append(family_member)
+    
+    df = pd.read_sql_query(build_compact_query('goals', where), conn, params=params)
+    conn.close()
+    return df
+
+def get_goal_progress(goal_id: int) -> pd.DataFrame:
+    """Retrieve progress history for a specific goal."""
+    conn = connect_db()
+    df = pd.read_sql_query('''
+        SELECT * FROM goal_progress 
+        WHERE goal_id = ?
+        ORDER BY date
+    ''', conn, params=[goal_id])
+    conn.close()
+    return df
+
+def get_recent_achievements(days: int = 30) -> pd.DataFrame:
+    """Get recent achievements within the specified number of days."""
+    conn = connect_db()
+    
+    query = build_compact_query(
+        'achievements', ' AND r.achievement_day >= ?'
+    ) + ' ORDER BY achievement_date DESC, created_at DESC'
+    
+    df = pd.read_sql_query(
+        query,
+        conn,
+        params=[epoch_day(date.today() - timedelta(days=days))]
+    )
+    
+    conn.close()
+    return df
+
+def get_achievements_summary(family_member: Optional[str] = None) -> Dict[str, Any]:
+    """Get summary statistics for achievements."""
+    conn = connect_db()
+    
+    query = '''
+        SELECT 
+            COUNT(*) as total_achievements,
+            COUNT(DISTINCT exercise_type) as unique_exercises,
+            COUNT(DISTINCT date(achievement_date)) as achievement_days,
+            MAX(achievement_date) as last_achievement,
+            family_member
+        FROM achievements
+    '''
+    
+    if family_member:
+        query += ' WHERE family_member = ?'
+        query += ' GROUP BY family_member'
+        df = pd.read_sql_query(query, conn, params=[family_member])
+    else:
+        query += ' GROUP BY family_member'
+        df = pd.read_sql_query(query, conn)
+    
+    conn.close()
+    
+    if df.empty:
+        return {}
+    
+    return {
+        row['family_member']: {
+            'total_achievements': row['total_achievements'],
+            'unique_exercises': row['unique_exercises'],
+            'achievement_days': row['achievement_days'],
+            'last_achievement': row['last_achievement']
+        }
+        for _, row in df.iterrows()
+    }
+
+def update_goal_status(goal_id: int, status: str) -> None:
+    """Update the status of a goal (active/achieved/archived)."""
+    conn = connect_db()
+    c = conn.cursor()
+    
+    try:
+        c.execute('''
+            UPDATE goals_data 
+            SET status = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (status, goal_id))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def delete_goal(goal_id: int) -> None:
+    """Delete a goal and its progress records."""
+    conn = connect_db()
+    c = conn.cursor()
+    
+    try:
+        # Delete goal progress first (foreign key constraint)
+        c.execute('DELETE FROM goal_progress WHERE goal_id = ?', (goal_id,))
+        # Delete the goal
+        c.execute('DELETE FROM goals_data WHERE id = ?', (goal_id,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        conn.close()
+
+def update_goals_for_exercise(cursor, family_member, exercise_type, date, reps_per_set, seconds_per_set):
+    """Enhanced goal update function with achievement celebration"""
+    achievements = []  # Track achievements in this session
+    
+    member_id = _dimension_id(cursor, 'members', family_member)
+    exercise_type_id = _dimension_id(cursor, 'exercise_types', exercise_type)
+    
+    cursor.execute('''
+        SELECT id, goal_type, target_value, current_value, description, start_day
+        FROM goals_data 
+        WHERE member_id = ? AND exercise_type_id = ?
+        AND status = 'active'
+        AND start_day <= ?  -- sessions before a goal's start don't count towards it
+    ''', (member_id, exercise_type_id, epoch_day(date)))
+    
+    active_goals = cursor.fetchall()
+    
+    for goal_id, goal_type, target_value, current_value, description, start_day in active_goals:
+        new_value = None
+        was_achieved = False
+        
+        window = GOAL_TYPES.get(goal_type, {}).get('window')
+        if window:
+            # Recurring: at most one achievement per week or month, and the goal stays active
+            new_value = _windowed_goal_value(
+                cursor, member_id, exercise_type_id, date, goal_type, reps_per_set, seconds_per_set, start_day
+            )
+            if not new_value:
+                continue
+            period_start, period_end = _goal_period_bounds(date, window)
+            cursor.execute('''
+                SELECT 1 FROM achievements_data
+                WHERE achievement_day BETWEEN ? AND ? AND goal_id = ?
+            ''', (period_start, period_end, goal_id))
+            was_achieved = new_value >= target_value and cursor.fetchone() is None
+            if was_achieved:
+                achievements.append(_record_goal_achievement(
+                    cursor, goal_id, member_id, exercise_type_id, family_member, exercise_type,
+                    goal_type, target_value, description, epoch_day(date), new_value
+                ))
+            cursor.execute('''
+                INSERT INTO goal_progress (goal_id, date, value, notes)
+                VALUES (?, ?, ?, ?)
+            ''', (goal_id, _to_date(date).isoformat(), new_value,
+                  _windowed_goal_note(window, new_value, was_achieved)))
+            cursor.execute('''
+                UPDATE goals_data
+                SET current_value = ?,
+                    achievement_day = CASE WHEN ? THEN ? ELSE achievement_day END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (new_value, was_achieved, epoch_day(date), goal_id))
+            continue
+        
+        if goal_type == 'max_reps' and reps_per_set:
+            new_value = max(reps_per_set)
+        elif goal_type == 'total_reps' and reps_per_set:
+            new_value = sum(reps_per_set)
+        elif goal_type == 'max_time' and seconds_per_set:
+            new_value = max(seconds_per_set)
+        elif goal_type == 'total_time' and seconds_per_set:
+            new_value = sum(seconds_per_set)
+        
+        if new_value and new_value >= target_value and current_value < target_value:
+            was_achieved = True
+            achievements.append(_record_goal_achievement(
+                cursor, goal_id, member_id, exercise_type_id, family_member, exercise_type,
+                goal_type, target_value, description, epoch_day(date), new_value
+            ))
+        
+        if new_value and new_value > current_value:
+            # Update goal progress
+            cursor.execute('''
+                INSERT INTO goal_progress (goal_id, date, value, notes)
+                VALUES (?, ?, ?, ?)
+            ''', (goal_id, date, new_value, 
+                  "🎉 Goal Achieved!" if was_achieved else f"New best: {new_value}"))
+            
+            # Update goal status
+            cursor.execute('''
+                UPDATE goals_data 
+                SET current_value = ?,
+                    status = CASE WHEN ? >= target_value THEN 'achieved' ELSE status END,
+                    achievement_day = CASE WHEN ? >= target_value THEN ? ELSE NULL END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (new_value, new_value, new_value,
+                  epoch_day(date) if was_achieved else None, goal_id))
+    
+    return achievements
+
+def get_exercise_summary(
+    family_member: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None
+) -> Dict[str, Any]:
+    """Get summary statistics for exercises."""
+    df = get_exercises(family_member, start_date, end_date)
+    
+    if df.empty:
+        return {}
+    
+    summary = {
+        'total_exercises': len(df),
+        'exercise_types': df['exercise_type'].value_counts().to_dict(),
+        'dates': {
+            'first': df['date'].min(),
+            'last': df['date'].max()
+        }
+    }
+    
+    return summary
+
+def prune_changelog(cursor: sqlite3.Cursor) -> int:
+    """
+    Delete changelog entries every registered replica has applied, or all of
+    them while no replica is registered, on the caller's transaction. The
+    AUTOINCREMENT high-water mark is kept, so get_write_generation is unaffected.
+    
+    Returns:
+        Number of entries deleted
+    """
+    cursor.execute('''
+        DELETE FROM changelog
+        WHERE NOT EXISTS (SELECT 1 FROM replica_acks)
+           OR seq <= (SELECT MIN(last_seq) FROM replica_acks)
+    ''')
+    return cursor.rowcount
+
+def get_write_generation() -> int:
+    """
+    Return a counter that increases with every committed change to the logged tables.
+    
+    It is the changelog's AUTOINCREMENT high-water mark, so it keeps rising even
+    after acknowledged changelog entries are pruned.
+    """
+    conn = connect_db()
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changelog'").fetchone()
+    conn.close()
+    return row[0] if row else 0
@@ -0,0 +1,298 @@
+# events.py
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+from config import (
+    EVENT_SINKS, EVENT_BATCH_SIZE, EVENT_POLL_SECONDS, EVENT_MAX_BACKOFF_SECONDS
+)
+from storage import connect_db
+
+# How long a dispatcher owns a sink while delivering; longer than any sink timeout
+LEASE_SECONDS = 60
+
+class EventSink:
+    """
+    Destination for outbox events.
+
+    deliver() receives a batch of events in outbox order and raises to have the
+    whole batch retried later. Delivery is at least once: a batch can be seen
+    again after a crash, so consumers should de-duplicate on the event id.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def deliver(self, events: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+class JsonlFileSink(EventSink):
+    """Append events to a JSON Lines file, such as a family feed or a notification file"""
+
+    def __init__(self, name: str, path: str):
+        super().__init__(name)
+        self.path = path
+
+    def deliver(self, events):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+class WebhookSink(EventSink):
+    """POST each batch as a JSON array to a URL; any non-2xx response is retried"""
+
+    def __init__(self, name: str, url: str, timeout: float = 10):
+        super().__init__(name)
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, events):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(events).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+class CallbackSink(EventSink):
+    """Hand batches to a Python callable, for in-process consumers"""
+
+    def __init__(self, name: str, callback: Callable[[List[Dict[str, Any]]], None]):
+        super().__init__(name)
+        self.callback = callback
+
+    def deliver(self, events):
+        self.callback(events)
+
+SINK_TYPES = {
+    'jsonl': JsonlFileSink,
+    'webhook': WebhookSink
+}
+
+def build_sinks(sink_config: Dict[str, Dict[str, Any]] = EVENT_SINKS) -> List[EventSink]:
+    """Create the sinks described in config.EVENT_SINKS"""
+    sinks = []
+    for name, options in sink_config.items():
+        options = dict(options)
+        sink_type = options.pop('type')
+        if sink_type not in SINK_TYPES:
+            raise ValueError(f"Unknown event sink type: {sink_type}")
+        sinks.append(SINK_TYPES[sink_type](name, **options))
+    return sinks
+
+def get_sink_status(db_path=None) -> List[Dict[str, Any]]:
+    """Delivery position, pending events and last error of every sink"""
+    conn = connect_db(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute('''
+        SELECT c.sink, c.last_id, c.attempts, c.last_error, c.next_attempt_at, c.updated_at,
+               (SELECT COUNT(*) FROM event_outbox o WHERE o.id > c.last_id) AS pending
+        FROM event_sink_cursors c
+        ORDER BY c.sink
+    ''').fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+class EventDispatcher(threading.Thread):
+    """
+    Deliver outbox events to sinks in a background thread.
+
+    Writers only insert one outbox row per event, so commit latency does not
+    depend on the sinks. Each sink has its own cursor; it only advances after
+    a successful delivery, and a failing sink backs off without holding up
+    the others.
+    """
+
+    def __init__(
+        self,
+        sinks: Optional[List[EventSink]] = None,
+        batch_size: int = EVENT_BATCH_SIZE,
+        poll_seconds: float = EVENT_POLL_SECONDS,
+        db_path: Optional[str] = None
+    ):
+        super().__init__(name='event-dispatcher', daemon=True)
+        self.sinks = build_sinks() if sinks is None else sinks
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.db_path = db_path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.cursors_created = False
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                traceback.print_exc()
+            self.wakeup.wait(self.poll_seconds)
+            self.wakeup.clear()
+
+    def notify(self):
+        """Wake the dispatcher, e.g. right after a commit that queued events"""
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def run_once(self) -> int:
+        """Deliver everything pending to every sink that is due; return the number of events delivered"""
+        delivered = 0
+        conn = connect_db(self.db_path, timeout=30)
+        try:
+            if not self.cursors_created:
+                self._create_cursors(conn)
+            for sink in self.sinks:
+                while True:
+                    count = self._dispatch(conn, sink)
+                    delivered += count
+                    if count < self.batch_size:
+                        break
+            if delivered:
+                self._prune(conn)
+        finally:
+            conn.close()
+        return delivered
+
+    def _create_cursors(self, conn):
+        """Add a cursor row for every sink that does not have one yet"""
+        try:
+            conn.executemany('INSERT INTO event_sink_cursors (sink) VALUES (?) ON CONFLICT(sink) DO NOTHING',
+                             [(sink.name,) for sink in self.sinks])
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        self.cursors_created = True
+
+    def _dispatch(self, conn, sink) -> int:
+        """Deliver one batch to one sink; returns the batch size, or 0 when there was nothing to do"""
+        now = time.time()
+        # Read-only check first, so an idle poll never takes the write lock
+        due = conn.execute('''
+            SELECT 1 FROM event_sink_cursors c
+            WHERE c.sink = ? AND c.next_attempt_at <= ?
+            AND EXISTS (SELECT 1 FROM event_outbox o WHERE o.id > c.last_id)
+        ''', (sink.name, now)).fetchone()
+        if not due:
+            return 0
+
+        try:
+            leased = conn.execute('''
+                UPDATE event_sink_cursors
+                SET lease_owner = ?, lease_expires_at = ?
+                WHERE sink = ? AND next_attempt_at <= ?
+                AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires_at < ?)
+            ''', (self.owner, now + LEASE_SECONDS, sink.name, now, self.owner, now)).rowcount
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        if not leased:
+            return 0
+
+        last_id, attempts = conn.execute(
+            'SELECT last_id, attempts FROM event_sink_cursors WHERE sink = ?', (sink.name,)
+        ).fetchone()
+        events = [
+            {'id': event_id, 'event_type': event_type, 'created_at': created_at, 'payload': json.loads(payload)}
+            for event_id, event_type, payload, created_at in conn.execute('''
+                SELECT id, event_type, payload, created_at FROM event_outbox
+                WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, self.batch_size))
+        ]
+
+        changes = {'lease_owner': None}
+        if events:
+            try:
+                sink.deliver(events)
+                changes.update(last_id=events[-1]['id'], attempts=0, last_error=None, next_attempt_at=0)
+            except Exception as e:
+                attempts += 1
+                changes.update(
+                    attempts=attempts,
+                    last_error=''.join(traceback.format_exception_only(type(e), e)).strip(),
+                    next_attempt_at=time.time() + min(2 ** attempts, EVENT_MAX_BACKOFF_SECONDS)
+                )
+                events = []
+
+        assignments = ', '.join(f'{column} = ?' for column in changes)
+        try:
+            conn.execute(f'''
+                UPDATE event_sink_cursors SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                WHERE sink = ? AND lease_owner = ?
+            ''', [*changes.values(), sink.name, self.owner])
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        return len(events)
+
+    def _prune(self, conn):
+        """Delete events every configured sink has received"""
+        if not self.sinks:
+            return
+        names = [sink.name for sink in self.sinks]
+        try:
+            conn.execute(f'''
+                DELETE FROM event_outbox
+                WHERE id <= (
+                    SELECT MIN(last_id) FROM event_sink_cursors
+                    WHERE sink IN ({', '.join('?' for _ in names)})
+                )
+            ''', names)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def start_event_dispatcher():
+    """Start the in-process dispatcher once per process and return it"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None or not _dispatcher.is_alive():
+            _dispatcher = EventDispatcher()
+            _dispatcher.start()
+        return _dispatcher
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver achievement and personal best events to the configured sinks")
+    parser.add_argument('--interval', type=float, default=EVENT_POLL_SECONDS,
+                        help=f"Seconds between outbox polls (default {EVENT_POLL_SECONDS})")
+    parser.add_argument('--once', action='store_true', help="Deliver what is pending and exit")
+    args = parser.parse_args()
+
+    dispatcher = EventDispatcher(poll_seconds=args.interval)
+    if args.once:
+        print(f"Delivered {dispatcher.run_once()} events")
+        for status in get_sink_status(dispatcher.db_path):
+            print(f"  {status['sink']}: {status['pending']} pending"
+                  + (f", last error: {status['last_error']}" if status['last_error'] else ''))
+        return
+
+    print(f"Delivering events to {', '.join(sink.name for sink in dispatcher.sinks)}")
+    dispatcher.start()
+    try:
+        while dispatcher.is_alive():
+            dispatcher.join(1)
+    except KeyboardInterrupt:
+        dispatcher.stop()
+
+if __name__ == "__main__":
+    main()
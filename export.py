@@ -0,0 +1,152 @@
+# export.py
+import argparse
+import csv
+import io
+import json
+import sqlite3
+import tempfile
+from datetime import date
+from typing import BinaryIO, Iterator, Optional, Union
+from config import EXPORT_CHUNK_ROWS
+from database import build_exercises_query
+from storage import connect_db
+
+# Filtered exports of the exercise log. Rows are read from the cursor in
+# chunks of EXPORT_CHUNK_ROWS and encoded chunk by chunk, so memory use does
+# not depend on how much history is exported.
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'jsonl': ('application/x-ndjson', '.jsonl')
+}
+
+SESSION_COLUMNS = [
+    'id', 'date', 'family_member', 'exercise_type', 'sets',
+    'reps_per_set', 'seconds_per_set', 'feeling', 'notes', 'created_at'
+]
+
+SET_COLUMNS = [
+    'id', 'date', 'family_member', 'exercise_type', 'set_number',
+    'reps', 'seconds', 'feeling', 'notes', 'created_at'
+]
+
+def _set_rows(row):
+    """Expand one session row into one row per set"""
+    session_id, day, member, exercise_type, sets, reps_json, seconds_json, feeling, notes, created_at = row
+    reps = json.loads(reps_json) if reps_json else []
+    seconds = json.loads(seconds_json) if seconds_json else []
+    for i in range(max(len(reps), len(seconds), 1)):
+        yield (session_id, day, member, exercise_type, i + 1,
+               reps[i] if i < len(reps) else None,
+               seconds[i] if i < len(seconds) else None,
+               feeling, notes, created_at)
+
+def _encode(rows, columns, export_format) -> bytes:
+    """Encode one chunk of rows"""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode('utf-8')
+
+    lines = []
+    for row in rows:
+        record = dict(zip(columns, row))
+        for column in ('reps_per_set', 'seconds_per_set'):
+            if column in record:
+                record[column] = json.loads(record[column]) if record[column] else None
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+def iter_exercise_export(
+    family_member: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    exercise_type: Optional[str] = None,
+    export_format: str = 'csv',
+    per_set: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    conn: Optional[sqlite3.Connection] = None
+) -> Iterator[bytes]:
+    """
+    Stream the sessions get_exercises would return as encoded CSV or JSON Lines chunks.
+
+    With per_set=True each session becomes one row per set. Pass conn to read
+    from another connection, such as the analytics snapshot; it is left open.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    owns_connection = conn is None
+    if owns_connection:
+        conn = connect_db()
+    columns = SET_COLUMNS if per_set else SESSION_COLUMNS
+
+    try:
+        query, params = build_exercises_query(
+            conn, family_member, start_date, end_date, exercise_type,
+            columns=', '.join(SESSION_COLUMNS)
+        )
+        cursor = conn.execute(query, params)
+
+        if export_format == 'csv':
+            yield _encode([columns], columns, 'csv')
+
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            if per_set:
+                rows = [set_row for row in rows for set_row in _set_rows(row)]
+            yield _encode(rows, columns, export_format)
+    finally:
+        if owns_connection:
+            conn.close()
+
+def write_exercise_export(output: BinaryIO, **filters) -> int:
+    """Write a filtered export to a binary file object and return the bytes written"""
+    written = 0
+    for chunk in iter_exercise_export(**filters):
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+def export_to_tempfile(**filters) -> BinaryIO:
+    """
+    Write a filtered export to an anonymous temporary file, rewound for reading.
+
+    Used for download buttons, which need a file object rather than an iterator.
+    """
+    output = tempfile.TemporaryFile()
+    write_exercise_export(output, **filters)
+    output.seek(0)
+    return output
+
+def export_file_name(family_member, start_date, end_date, export_format, per_set=False) -> str:
+    """File name describing an export's filters, e.g. dad_2024-01-01_2024-03-31_sets.csv"""
+    parts = [(family_member or 'family').lower().replace(' ', '_')]
+    parts += [str(value) for value in (start_date, end_date) if value]
+    if per_set:
+        parts.append('sets')
+    return '_'.join(parts) + EXPORT_FORMATS[export_format][1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Export filtered exercise history as CSV or JSON Lines")
+    parser.add_argument('--member', help="Only this family member")
+    parser.add_argument('--start', type=date.fromisoformat, help="First date, YYYY-MM-DD")
+    parser.add_argument('--end', type=date.fromisoformat, help="Last date, YYYY-MM-DD")
+    parser.add_argument('--exercise', help="Only this exercise type")
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--per-set', action='store_true', help="One row per set instead of per session")
+    parser.add_argument('--output', '-o', help="Output file (default: named after the filters)")
+    args = parser.parse_args()
+
+    path = args.output or export_file_name(args.member, args.start, args.end, args.format, args.per_set)
+    with open(path, 'wb') as f:
+        written = write_exercise_export(
+            f, family_member=args.member, start_date=args.start, end_date=args.end,
+            exercise_type=args.exercise, export_format=args.format, per_set=args.per_set
+        )
+    print(f"Wrote {written / 1024:.1f} KB to {path}")
+
+if __name__ == "__main__":
+    main()
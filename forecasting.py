@@ -0,0 +1,93 @@
+# forecasting.py
+import threading
+import numpy as np
+import pandas as pd
+from database import get_write_generation
+from storage import connect_db
+
+FORECAST_COLUMNS = [
+    'goal_id', 'points', 'slope_per_day', 'projected_date', 'on_track'
+]
+
+_cache = {'generation': None, 'forecasts': None}
+_cache_lock = threading.Lock()
+
+def get_goal_forecasts() -> pd.DataFrame:
+    """
+    Forecast all active goals, cached until the next write to the database.
+
+    Returns:
+        DataFrame indexed by goal_id with points, slope_per_day,
+        projected_date and on_track
+    """
+    generation = get_write_generation()
+    with _cache_lock:
+        if _cache['generation'] != generation:
+            _cache['forecasts'] = forecast_active_goals()
+            _cache['generation'] = generation
+        return _cache['forecasts']
+
+def forecast_active_goals() -> pd.DataFrame:
+    """
+    Fit a least-squares trend to every active goal's progress in one batched pass.
+
+    Goals with fewer than two progress points, or with a flat or falling trend,
+    get no projected date and on_track is False.
+    """
+    conn = connect_db()
+    # Both reads in one transaction, so every progress row's goal is in goals
+    conn.execute('BEGIN')
+    goals = pd.read_sql_query('''
+        SELECT id AS goal_id, start_date, target_date, target_value
+        FROM goals
+        WHERE status = 'active'
+    ''', conn)
+    progress = pd.read_sql_query('''
+        SELECT p.goal_id, p.date, p.value
+        FROM goal_progress p
+        JOIN goals g ON g.id = p.goal_id
+        WHERE g.status = 'active'
+    ''', conn)
+    conn.commit()
+    conn.close()
+
+    if goals.empty:
+        return pd.DataFrame(columns=FORECAST_COLUMNS).set_index('goal_id')
+
+    goals = goals.set_index('goal_id')
+    start = pd.to_datetime(goals['start_date'], format='ISO8601')
+
+    # Map every progress row to its goal's position, x = days since the goal started
+    position = goals.index.get_indexer(progress['goal_id'])
+    x = (
+        pd.to_datetime(progress['date'], format='ISO8601').to_numpy()
+        - start.to_numpy()[position]
+    ) / np.timedelta64(1, 'D')
+    y = progress['value'].to_numpy(dtype=float)
+
+    # Per-goal sums for the closed-form simple linear regression
+    size = len(goals)
+    n = np.bincount(position, minlength=size).astype(float)
+    sx = np.bincount(position, weights=x, minlength=size)
+    sy = np.bincount(position, weights=y, minlength=size)
+    sxx = np.bincount(position, weights=x * x, minlength=size)
+    sxy = np.bincount(position, weights=x * y, minlength=size)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = n * sxx - sx * sx
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+        intercept = (sy - slope * sx) / n
+        days_to_target = np.where(
+            slope > 0, (goals['target_value'].to_numpy() - intercept) / slope, np.nan
+        )
+
+    projected = start + pd.to_timedelta(np.ceil(days_to_target), unit='D')
+    target_date = pd.to_datetime(goals['target_date'], format='ISO8601')
+    on_track = projected.notna() & (target_date.isna() | (projected <= target_date))
+
+    return pd.DataFrame({
+        'points': n.astype(int),
+        'slope_per_day': slope,
+        'projected_date': projected.dt.date,
+        'on_track': on_track
+    }, index=goals.index)
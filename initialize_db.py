@@ -1,45 +1,65 @@
-# initialize_db.py
-import os
-import sqlite3
-from database import init_db
-
-def reset_database():
-    """Reset the database by removing existing file and reinitializing"""
-    db_path = 'data/exercise_log.db'
-    
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
-    # Remove existing database if it exists
-    if os.path.exists(db_path):
-        try:
-            os.remove(db_path)
-            print(f"Removed existing database: {db_path}")
-        except Exception as e:
-            print(f"Error removing database: {e}")
-            return
-    
-    # Initialize new database
-    try:
-        init_db()
-        
-        # Verify tables were created
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        
-        # Get list of tables
-        c.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = c.fetchall()
-        
-        print("\nSuccessfully created tables:")
-        for table in tables:
-            print(f"- {table[0]}")
-            
-        conn.close()
-        print("\nDatabase initialization complete!")
-        
-    except Exception as e:
-        print(f"Error initializing database: {e}")
-
-if __name__ == "__main__":
-    reset_database()
\ No newline at end of file
+# initialize_db.py
+import argparse
+import os
+from database import init_db, SCHEMA_VERSION
+from storage import connect_db, ensure_db_directory, get_db_path, is_in_memory
+
+def reset_database():
+    """Reset the database by removing existing file and reinitializing"""
+    db_path = get_db_path()
+    
+    # Create data directory if it doesn't exist
+    ensure_db_directory()
+    
+    # Remove existing database if it exists
+    if not is_in_memory() and os.path.exists(db_path):
+        try:
+            os.remove(db_path)
+            print(f"Removed existing database: {db_path}")
+        except Exception as e:
+            print(f"Error removing database: {e}")
+            return
+    
+    # Initialize new database
+    try:
+        init_db()
+        
+        # Verify tables were created
+        conn = connect_db()
+        c = conn.cursor()
+        
+        # Get list of tables
+        c.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = c.fetchall()
+        
+        print("\nSuccessfully created tables:")
+        for table in tables:
+            print(f"- {table[0]}")
+            
+        conn.close()
+        print("\nDatabase initialization complete!")
+        
+    except Exception as e:
+        print(f"Error initializing database: {e}")
+
+def migrate_database():
+    """Apply any pending schema migrations, keeping existing data"""
+    try:
+        version = init_db()
+        print(f"Database schema is at version {version} (latest {SCHEMA_VERSION})")
+    except Exception as e:
+        print(f"Error migrating database: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or migrate the exercise log database")
+    parser.add_argument(
+        '--reset',
+        action='store_true',
+        help="Delete the existing database and start from an empty one"
+    )
+    args = parser.parse_args()
+    
+    if args.reset:
+        reset_database()
+    else:
+        migrate_database()
\ No newline at end of file
@@ -0,0 +1,148 @@
+# loadtest_api.py
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from config import FAMILY_MEMBERS, EXERCISE_TYPES, API_HOST, API_PORT
+
+
+class Connection:
+    """A persistent HTTP/1.1 keep-alive connection to the API server."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, path: str, payload: Optional[dict] = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value.strip())
+        return status, await self.reader.readexactly(length)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+def random_log() -> dict:
+    """Build a plausible exercise log request body."""
+    exercise_type = random.choice(list(EXERCISE_TYPES))
+    sets = random.randint(1, 5)
+    payload = {
+        'family_member': random.choice(FAMILY_MEMBERS),
+        'date': (date.today() - timedelta(days=random.randint(0, 365))).isoformat(),
+        'exercise_type': exercise_type,
+        'sets': sets,
+        'notes': 'load test'
+    }
+    if 'reps' in EXERCISE_TYPES[exercise_type]['measurements']:
+        payload['reps_per_set'] = [random.randint(1, 30) for _ in range(sets)]
+    else:
+        payload['seconds_per_set'] = [random.randint(5, 90) for _ in range(sets)]
+    return payload
+
+
+def random_read() -> str:
+    """Pick one of the read endpoints with a realistic filter."""
+    member = random.choice(FAMILY_MEMBERS)
+    start = (date.today() - timedelta(days=30)).isoformat()
+    return random.choice([
+        f"/exercises?family_member={member}&start_date={start}",
+        f"/goals?family_member={member}",
+        f"/personal_bests?family_member={member}"
+    ])
+
+
+async def worker(host: str, port: int, remaining: List[int], write_ratio: float,
+                 latencies: List[float], errors: List[str]) -> None:
+    conn = Connection(host, port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                if random.random() < write_ratio:
+                    status, body = await conn.request('POST', '/exercises', random_log())
+                else:
+                    status, body = await conn.request('GET', random_read())
+                if status >= 400:
+                    errors.append(f"{status}: {body[:200]!r}")
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                errors.append(repr(e))
+                conn.close()
+                conn = Connection(host, port)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        conn.close()
+
+
+def percentile(values: List[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+async def run(host: str, port: int, requests: int, concurrency: int, write_ratio: float) -> None:
+    remaining = [requests]
+    latencies = []
+    errors = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        worker(host, port, remaining, write_ratio, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    print(f"Requests:     {len(latencies)} ({concurrency} concurrent, {write_ratio:.0%} writes)")
+    print(f"Elapsed:      {elapsed:.2f} s")
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency p50:  {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"Latency p95:  {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"Latency p99:  {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"Errors:       {len(errors)}")
+    for error in errors[:5]:
+        print(f"  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the exercise JSON API")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--write-ratio', type=float, default=0.3,
+                        help="Fraction of requests that log an exercise")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.host, args.port, args.requests, args.concurrency, args.write_ratio))
+
+if __name__ == "__main__":
+    main()
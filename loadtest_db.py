@@ -0,0 +1,250 @@
+# loadtest_db.py
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+import pandas as pd
+from config import FAMILY_MEMBERS, EXERCISE_TYPES
+from database import init_db, record_exercise, build_exercises_query, build_compact_query, epoch_day
+from backup import ExerciseLogBackup
+from storage import set_db_path
+
+DB_PATH = 'data/exercise_log.db'
+TEMPLATE_PATH = 'data/template.db'
+
+DEFAULT_MIX = {'log': 30, 'history': 35, 'dashboard': 30, 'backup': 5}
+
+LOCK_GIVE_UP_SECONDS = 10
+
+
+class Session:
+    """
+    One simulated family member clicking around the app.
+
+    Connections are opened with timeout=0 and lock conflicts are retried here,
+    so the time spent waiting for locks can be measured separately from work.
+    """
+
+    def __init__(self, strategy, seed):
+        self.strategy = strategy
+        self.random = random.Random(seed)
+        self.member = self.random.choice(FAMILY_MEMBERS)
+        self._conn = None
+
+    def connection(self):
+        if self.strategy == 'persistent':
+            if self._conn is None:
+                self._conn = sqlite3.connect(DB_PATH, timeout=0)
+            return self._conn
+        return sqlite3.connect(DB_PATH, timeout=0)
+
+    def release(self, conn):
+        if self.strategy != 'persistent':
+            conn.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+    def run_op(self, op):
+        """Run one operation; returns (lock_wait_seconds, error or None)."""
+        if op == 'backup':
+            # Uses its own connection like the Backup page, so lock waits aren't visible
+            try:
+                ExerciseLogBackup().create_full_backup()
+                return 0.0, None
+            except Exception as e:
+                return 0.0, f"{type(e).__name__}: {e}"
+
+        work = {'log': self._log, 'history': self._history, 'dashboard': self._dashboard}[op]
+        waited = 0.0
+        delay = 0.001
+        while True:
+            conn = self.connection()
+            try:
+                work(conn)
+                return waited, None
+            except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
+                # pandas wraps read errors in its own DatabaseError
+                conn.rollback()
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    return waited, f"{type(e).__name__}: {e}"
+                if waited >= LOCK_GIVE_UP_SECONDS:
+                    return waited, f"gave up: {e}"
+                time.sleep(delay)
+                waited += delay
+                delay = min(delay * 2, 0.05)
+            except Exception as e:
+                conn.rollback()
+                return waited, f"{type(e).__name__}: {e}"
+            finally:
+                self.release(conn)
+
+    def _log(self, conn):
+        exercise_type = self.random.choice(list(EXERCISE_TYPES))
+        sets = self.random.randint(1, 5)
+        reps = seconds = None
+        if 'reps' in EXERCISE_TYPES[exercise_type]['measurements']:
+            reps = [self.random.randint(1, 30) for _ in range(sets)]
+        else:
+            seconds = [self.random.randint(5, 90) for _ in range(sets)]
+        day = (date.today() - timedelta(days=self.random.randint(0, 30))).isoformat()
+        record_exercise(conn.cursor(), self.member, day, exercise_type, sets, reps, seconds,
+                        f"load test {self.random.random():.6f}", 'Moderate')
+        conn.commit()
+
+    def _history(self, conn):
+        start = (date.today() - timedelta(days=30)).isoformat()
+        query, params = build_exercises_query(conn, family_member=self.member, start_date=start)
+        pd.read_sql_query(query, conn, params=params)
+
+    def _dashboard(self, conn):
+        start = date.today() - timedelta(days=30)
+        pd.read_sql_query(
+            build_compact_query('achievements', ' AND r.achievement_day >= ?')
+            + ' ORDER BY achievement_date DESC, created_at DESC',
+            conn, params=[epoch_day(start)]
+        )
+        query, params = build_exercises_query(conn, start_date=start.isoformat())
+        pd.read_sql_query(query, conn, params=params)
+        pd.read_sql_query(build_compact_query('goals', " AND r.status = 'active'"), conn)
+
+
+def run_session(strategy, seed, mix, duration, think_ms):
+    """Run one session until the deadline; returns a list of (op, latency, lock_wait, error)."""
+    session = Session(strategy, seed)
+    ops, weights = zip(*mix.items())
+    records = []
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            op = session.random.choices(ops, weights)[0]
+            started = time.perf_counter()
+            lock_wait, error = session.run_op(op)
+            records.append((op, time.perf_counter() - started, lock_wait, error))
+            if think_ms:
+                time.sleep(session.random.expovariate(1000 / think_ms))
+    finally:
+        session.close()
+    return records
+
+
+def prepare_database(journal_mode):
+    """Copy the seeded template to a fresh database and set its journal mode."""
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    shutil.copy2(TEMPLATE_PATH, DB_PATH)
+    shutil.rmtree('backups', ignore_errors=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(f'PRAGMA journal_mode={journal_mode}')
+    conn.close()
+
+
+def seed_template():
+    """Create the template database with about a year of history per member."""
+    init_db(progress=lambda message: None)
+    conn = sqlite3.connect(DB_PATH)
+    rng = random.Random(0)
+    for member in FAMILY_MEMBERS:
+        for days_ago in range(365, 0, -1):
+            if rng.random() < 0.5:
+                exercise_type = rng.choice(list(EXERCISE_TYPES))
+                key = 'reps' if 'reps' in EXERCISE_TYPES[exercise_type]['measurements'] else 'time'
+                values = [rng.randint(1, 30) for _ in range(3)]
+                record_exercise(conn.cursor(), member, (date.today() - timedelta(days=days_ago)).isoformat(),
+                                exercise_type, 3, values if key == 'reps' else None,
+                                values if key == 'time' else None, 'seed', 'Easy')
+    conn.commit()
+    conn.close()
+    shutil.copy2(DB_PATH, TEMPLATE_PATH)
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+def run_config(journal_mode, strategy, concurrency, mode, mix, duration, think_ms):
+    prepare_database(journal_mode)
+    pool_class = ProcessPoolExecutor if mode == 'processes' else ThreadPoolExecutor
+
+    started = time.perf_counter()
+    with pool_class(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_session, strategy, seed, mix, duration, think_ms)
+            for seed in range(concurrency)
+        ]
+        records = [record for future in futures for record in future.result()]
+    elapsed = time.perf_counter() - started
+
+    print(f"\n== journal_mode={journal_mode} strategy={strategy} "
+          f"{concurrency} {mode}, {duration:g}s ==")
+    print(f"{'op':<10}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'lock s':>9}{'errors':>8}")
+    for op in list(mix) + ['all']:
+        rows = [r for r in records if op == 'all' or r[0] == op]
+        if not rows:
+            continue
+        latencies = [r[1] for r in rows]
+        print(f"{op:<10}{len(rows):>7}"
+              f"{percentile(latencies, 50) * 1000:>9.1f}"
+              f"{percentile(latencies, 95) * 1000:>9.1f}"
+              f"{percentile(latencies, 99) * 1000:>9.1f}"
+              f"{sum(r[2] for r in rows):>9.2f}"
+              f"{sum(1 for r in rows if r[3]):>8}")
+    print(f"throughput: {len(records) / elapsed:.1f} ops/s")
+    errors = [r[3] for r in records if r[3]]
+    for error in sorted(set(errors))[:5]:
+        print(f"  {errors.count(error)} x {error}")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        op, _, weight = part.partition('=')
+        if op not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation {op!r}")
+        mix[op] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate concurrent app sessions against a scratch copy of the database"
+    )
+    parser.add_argument('--sessions', type=int, default=8, help="Concurrent sessions")
+    parser.add_argument('--mode', choices=['threads', 'processes'], default='threads')
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per configuration")
+    parser.add_argument('--think-ms', type=float, default=20, help="Mean pause between operations")
+    parser.add_argument('--mix', type=parse_mix,
+                        default=DEFAULT_MIX,
+                        help="Operation weights, e.g. log=30,history=35,dashboard=30,backup=5")
+    parser.add_argument('--journal-modes', default='delete,wal',
+                        help="Comma separated journal modes to compare")
+    parser.add_argument('--strategies', default='per_call,persistent',
+                        help="Connection strategies to compare: per_call, persistent")
+    parser.add_argument('--workdir', help="Scratch directory (default: a new temp directory)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='exercise_loadtest_')
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    os.chdir(workdir)
+    # Whatever EXERCISE_LOG_DB says, init_db and backups must use the scratch copy
+    set_db_path(DB_PATH)
+    print(f"Working in {workdir}")
+    seed_template()
+
+    for journal_mode in args.journal_modes.split(','):
+        for strategy in args.strategies.split(','):
+            run_config(journal_mode, strategy, args.sessions, args.mode,
+                       args.mix, args.duration, args.think_ms)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# maintenance.py
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from config import MAINTENANCE_INTERVAL_MINUTES, MAINTENANCE_INTEGRITY_CHECK_DAYS
+from database import prune_changelog, redate_lifetime_milestones
+from scheduling import IntervalScheduler, lower_io_priority
+from storage import connect_db, get_db_path, is_in_memory
+
+STATUS_PATH = 'data/maintenance_status.json'
+
+# Rows examined per index by PRAGMA optimize's ANALYZE, so routine runs stay quick
+ANALYSIS_LIMIT = 1000
+
+# Free pages released per write transaction, so loggers wait at most a few milliseconds
+VACUUM_BATCH_PAGES = 256
+
+def get_database_stats(db_path=None) -> Dict[str, Any]:
+    """
+    Page counts, free pages, file sizes and per-table and per-index sizes.
+
+    Object sizes come from the dbstat virtual table; on SQLite builds without
+    it 'objects' is empty.
+    """
+    db_path = db_path or get_db_path()
+    conn = connect_db(db_path, read_only=True)
+    try:
+        stats = {
+            pragma: conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+            for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum', 'journal_mode')
+        }
+        stats['auto_vacuum'] = {0: 'none', 1: 'full', 2: 'incremental'}[stats['auto_vacuum']]
+        if is_in_memory(db_path):
+            stats['file_size'] = stats['page_count'] * stats['page_size']
+            stats['wal_size'] = 0
+        else:
+            stats['file_size'] = os.path.getsize(db_path)
+            wal_path = db_path + '-wal'
+            stats['wal_size'] = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        stats['free_percent'] = round(100 * stats['freelist_count'] / max(stats['page_count'], 1), 1)
+        stats['analyzed'] = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone() is not None
+
+        try:
+            rows = conn.execute('''
+                SELECT s.name, COALESCE(m.type, 'internal'), COALESCE(m.tbl_name, s.name),
+                       COUNT(*), SUM(s.pgsize), SUM(s.unused)
+                FROM dbstat s
+                LEFT JOIN sqlite_master m ON m.name = s.name
+                GROUP BY s.name
+                ORDER BY SUM(s.pgsize) DESC
+            ''').fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        stats['objects'] = [
+            {
+                'name': name, 'type': kind, 'table': table, 'pages': pages, 'bytes': size,
+                # Share of the object's pages that is empty space
+                'unused_percent': round(100 * unused / size, 1) if size else 0.0
+            }
+            for name, kind, table, pages, size, unused in rows
+        ]
+        return stats
+    finally:
+        conn.close()
+
+def run_maintenance(db_path=None, integrity_check=False,
+                    analyze=False, convert_auto_vacuum=False) -> Dict[str, Any]:
+    """
+    One maintenance pass; returns what was done and how long each step took.
+
+    Runs a quick check (or a full integrity check), refreshes planner
+    statistics, prunes replicated changelog entries, re-dates the lifetime
+    milestones of back-dated sessions, returns free pages to the file system
+    and checkpoints the WAL. Each step is short and takes the
+    write lock at most briefly.
+
+    With convert_auto_vacuum it first switches the database to
+    auto_vacuum=INCREMENTAL. That needs a full VACUUM, which holds an exclusive
+    lock while it rewrites the file, so only the maintenance CLI asks for it;
+    otherwise the report flags the conversion as pending.
+    """
+    report = {'steps': {}}
+    conn = connect_db(db_path, timeout=30, isolation_level=None)
+
+    def step(name, fn):
+        started = time.perf_counter()
+        result = fn()
+        report['steps'][name] = round(time.perf_counter() - started, 3)
+        return result
+
+    try:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            if convert_auto_vacuum:
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                step('vacuum (auto_vacuum conversion)', lambda: conn.execute('VACUUM'))
+            else:
+                report['auto_vacuum_conversion_pending'] = True
+
+        check = 'integrity_check' if integrity_check else 'quick_check'
+        problems = step(check, lambda: [row[0] for row in conn.execute(f'PRAGMA {check}')])
+        report['check'] = check
+        report['check_ok'] = problems == ['ok']
+        if not report['check_ok']:
+            report['check_errors'] = problems[:100]
+
+        # New indexes arrive with migrations, so analyse in full after a schema change
+        has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+        if analyze or not has_stats:
+            step('analyze', lambda: conn.execute('ANALYZE'))
+        else:
+            conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+            step('optimize', lambda: conn.execute('PRAGMA optimize').fetchall())
+
+        # Changes no replica still needs (all of them with no replica registered)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            report['changelog_pruned'] = step('prune changelog', lambda: prune_changelog(conn.cursor()))
+            conn.execute('COMMIT')
+        except Exception as e:
+            conn.execute('ROLLBACK')
+            raise e
+
+        report['milestones_recorded'] = step('redate milestones', lambda: _redate_milestones(conn))
+
+        report['freed_pages'] = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if report['freed_pages']:
+            step('incremental_vacuum', lambda: _incremental_vacuum(conn))
+
+        if conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            busy, wal_pages, checkpointed = step(
+                'wal_checkpoint', lambda: conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+            )
+            report['wal_checkpoint'] = {'busy': bool(busy), 'pages': wal_pages, 'checkpointed': checkpointed}
+    finally:
+        conn.close()
+
+    return report
+
+def _redate_milestones(conn):
+    """Re-date lifetime milestones slice by slice, one short write transaction each."""
+    recorded = 0
+    for member_id, exercise_type_id in conn.execute(
+        'SELECT member_id, exercise_type_id FROM lifetime_totals'
+    ).fetchall():
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            recorded += redate_lifetime_milestones(conn.cursor(), member_id, exercise_type_id)
+            conn.execute('COMMIT')
+        except Exception as e:
+            conn.execute('ROLLBACK')
+            raise e
+    return recorded
+
+def _incremental_vacuum(conn, pages_per_transaction=VACUUM_BATCH_PAGES):
+    """
+    Return every free page to the file system in short write transactions.
+
+    PRAGMA incremental_vacuum(N) frees one page per step, and the pragma has no
+    result columns, so Connection.execute (and fetchall on its cursor) steps it
+    only once and frees a single page. executescript steps each statement to
+    completion, so one call frees a whole batch.
+    """
+    free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    while free:
+        try:
+            conn.executescript(
+                f'BEGIN IMMEDIATE; PRAGMA incremental_vacuum({pages_per_transaction}); COMMIT;'
+            )
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise e
+        remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if remaining >= free:
+            break  # not in incremental mode; nothing more can be freed
+        free = remaining
+
+class MaintenanceScheduler(IntervalScheduler):
+    """
+    Run database maintenance on an interval in a background thread, skipping
+    idle databases. The auto_vacuum conversion only runs with
+    convert_auto_vacuum, which the in-app scheduler never sets.
+    """
+
+    def __init__(self, interval_minutes=MAINTENANCE_INTERVAL_MINUTES, status_path=STATUS_PATH,
+                 db_path=None, convert_auto_vacuum=False):
+        super().__init__('maintenance-scheduler', interval_minutes, status_path)
+        self.db_path = db_path
+        self.convert_auto_vacuum = convert_auto_vacuum
+
+    def run_job(self, integrity_check=None):
+        """One maintenance pass, with a full integrity check when one is due"""
+        conn = connect_db(self.db_path, read_only=True)
+        try:
+            schema_version = conn.execute('PRAGMA user_version').fetchone()[0]
+        finally:
+            conn.close()
+
+        if integrity_check is None:
+            last_integrity = self.status.get('last_integrity_check')
+            integrity_check = not last_integrity or (
+                datetime.now() - datetime.fromisoformat(last_integrity)
+                >= timedelta(days=MAINTENANCE_INTEGRITY_CHECK_DAYS)
+            )
+
+        report = run_maintenance(
+            self.db_path,
+            integrity_check=integrity_check,
+            analyze=schema_version != self.status.get('analyzed_schema_version'),
+            convert_auto_vacuum=self.convert_auto_vacuum
+        )
+        changes = dict(
+            last_result='ok' if report['check_ok'] else f"{report['check']} found problems",
+            last_report=report,
+            analyzed_schema_version=schema_version
+        )
+        if integrity_check:
+            changes['last_integrity_check'] = datetime.now().isoformat(timespec='seconds')
+        return changes
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def start_maintenance_scheduler(interval_minutes=MAINTENANCE_INTERVAL_MINUTES):
+    """Start the in-process maintenance scheduler once per process and return it"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = MaintenanceScheduler(interval_minutes)
+            _scheduler.start()
+        return _scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze, check, vacuum and checkpoint the exercise log database")
+    parser.add_argument('--interval', type=float, default=MAINTENANCE_INTERVAL_MINUTES,
+                        help=f"Minutes between runs (default {MAINTENANCE_INTERVAL_MINUTES})")
+    parser.add_argument('--once', action='store_true', help="Run maintenance once and exit")
+    parser.add_argument('--integrity-check', action='store_true',
+                        help="With --once, run a full integrity check instead of a quick check")
+    parser.add_argument('--stats', action='store_true', help="Print database size statistics and exit")
+    parser.add_argument('--no-convert', action='store_true',
+                        help="Do not switch the database to auto_vacuum=INCREMENTAL (a full VACUUM that blocks writers)")
+    args = parser.parse_args()
+
+    if args.stats:
+        stats = get_database_stats()
+        print(f"{stats['page_count']} pages of {stats['page_size']} bytes, "
+              f"{stats['freelist_count']} free ({stats['free_percent']}%), "
+              f"file {stats['file_size'] / 1024:.0f} KB, WAL {stats['wal_size'] / 1024:.0f} KB, "
+              f"auto_vacuum={stats['auto_vacuum']}, journal_mode={stats['journal_mode']}")
+        for obj in stats['objects']:
+            print(f"  {obj['name']:<50} {obj['type']:<8} {obj['pages']:>6} pages "
+                  f"{obj['bytes'] / 1024:>9.1f} KB  {obj['unused_percent']:>5}% unused")
+        return
+
+    scheduler = MaintenanceScheduler(args.interval, convert_auto_vacuum=not args.no_convert)
+    if args.once:
+        lower_io_priority()
+        scheduler.run_once(force=True, integrity_check=args.integrity_check or None)
+        print(json.dumps(scheduler.status, indent=2))
+        return
+
+    print(f"Running maintenance every {args.interval:g} minutes; status in {scheduler.status_path}")
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            scheduler.join(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# profiling.py
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Optional
+import pandas as pd
+from config import PROFILE_TRACE_PATH, PAGE_LATENCY_BUDGETS_MS
+
+# Render-time profiling: each profiled rerun records the page's total time,
+# time per phase (fetch, transform, figure, render) and the Streamlit elements it
+# emitted, and appends one JSON line to PROFILE_TRACE_PATH.
+
+SUMMARY_COLUMNS = [
+    'page', 'runs', 'p50_ms', 'p95_ms', 'max_ms', 'mean_widgets',
+    'fetch_ms', 'transform_ms', 'figure_ms', 'render_ms', 'budget_ms', 'over_budget'
+]
+
+_current: ContextVar[Optional['PageProfile']] = ContextVar('page_profile', default=None)
+_write_lock = threading.Lock()
+_counting_installed = False
+
+class PageProfile:
+    """Timings and element counts of one page rerun"""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.phases = Counter()
+        self.widgets = Counter()
+        self.result = None  # the trace, once the page has finished
+        self._phase = None
+
+    def count(self, kind: str):
+        self.widgets[kind] += 1
+
+    def trace(self) -> Dict[str, Any]:
+        total_ms = (time.perf_counter() - self.started) * 1000
+        budget_ms = PAGE_LATENCY_BUDGETS_MS.get(self.page)
+        return {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'page': self.page,
+            'total_ms': round(total_ms, 2),
+            'phases': {name: round(ms, 2) for name, ms in self.phases.items()},
+            'widgets': dict(self.widgets),
+            'widget_count': sum(self.widgets.values()),
+            'budget_ms': budget_ms,
+            'over_budget': budget_ms is not None and total_ms > budget_ms
+        }
+
+def _install_widget_counting():
+    """
+    Count every element and layout block Streamlit emits while a profile is
+    active, by wrapping the two DeltaGenerator methods all of them go through.
+    """
+    global _counting_installed
+    if _counting_installed:
+        return
+    _counting_installed = True
+
+    from streamlit.delta_generator import DeltaGenerator
+    enqueue = getattr(DeltaGenerator, '_enqueue', None)
+    block = getattr(DeltaGenerator, '_block', None)
+    if enqueue is None or block is None:
+        # Unknown Streamlit internals: still time pages, just without counts
+        return
+
+    def counting_enqueue(self, delta_type, *args, **kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.count(delta_type)
+        return enqueue(self, delta_type, *args, **kwargs)
+
+    def counting_block(self, block_proto=None, *args, **kwargs):
+        profile = _current.get()
+        if profile is not None:
+            kind = block_proto.WhichOneof('type') if block_proto is not None else None
+            profile.count(kind or 'block')
+        return block(self, block_proto, *args, **kwargs)
+
+    DeltaGenerator._enqueue = counting_enqueue
+    DeltaGenerator._block = counting_block
+
+@contextmanager
+def profile_page(page: str, enabled: bool, trace_path: str = PROFILE_TRACE_PATH):
+    """
+    Profile the page rendered inside the block and append its trace.
+
+    Yields the PageProfile, or None when profiling is off, in which case
+    nothing is timed or written.
+    """
+    if not enabled:
+        yield None
+        return
+
+    _install_widget_counting()
+    profile = PageProfile(page)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        profile.result = profile.trace()
+        write_trace(profile.result, trace_path)
+
+@contextmanager
+def phase(name: str):
+    """Attribute the time spent in the block to a phase of the current page, if profiling"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    # Nested phases only count towards the outermost one
+    outer = profile._phase
+    if outer is None:
+        profile._phase = name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if outer is None:
+            profile.phases[name] += (time.perf_counter() - started) * 1000
+            profile._phase = None
+
+def write_trace(trace: Dict[str, Any], trace_path: str = PROFILE_TRACE_PATH):
+    """Append one rerun's trace to the JSONL file"""
+    os.makedirs(os.path.dirname(trace_path) or '.', exist_ok=True)
+    with _write_lock:
+        with open(trace_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(trace) + '\n')
+
+def load_traces(trace_path: str = PROFILE_TRACE_PATH) -> pd.DataFrame:
+    """Read the traces into a DataFrame with one column per phase (in ms)"""
+    if not os.path.exists(trace_path):
+        return pd.DataFrame(columns=['timestamp', 'page', 'total_ms', 'widget_count', 'over_budget'])
+    with open(trace_path, encoding='utf-8') as f:
+        traces = [json.loads(line) for line in f if line.strip()]
+    df = pd.DataFrame(traces)
+    if df.empty:
+        return df
+    phases = pd.json_normalize(df.pop('phases').tolist()).add_suffix('_ms')
+    return pd.concat([df, phases], axis=1)
+
+def summarize_traces(trace_path: str = PROFILE_TRACE_PATH) -> pd.DataFrame:
+    """Per-page latency percentiles, mean phase times and widget counts against the budgets"""
+    df = load_traces(trace_path)
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    for column in ('fetch_ms', 'transform_ms', 'figure_ms', 'render_ms'):
+        if column not in df:
+            df[column] = 0.0
+    grouped = df.groupby('page')
+    summary = pd.DataFrame({
+        'runs': grouped.size(),
+        'p50_ms': grouped['total_ms'].quantile(0.5),
+        'p95_ms': grouped['total_ms'].quantile(0.95),
+        'max_ms': grouped['total_ms'].max(),
+        'mean_widgets': grouped['widget_count'].mean(),
+        'fetch_ms': grouped['fetch_ms'].mean(),
+        'transform_ms': grouped['transform_ms'].mean(),
+        'figure_ms': grouped['figure_ms'].mean(),
+        'render_ms': grouped['render_ms'].mean(),
+        'over_budget': grouped['over_budget'].sum()
+    }).reset_index()
+    summary['budget_ms'] = summary['page'].map(PAGE_LATENCY_BUDGETS_MS)
+    return summary[SUMMARY_COLUMNS].round(1).sort_values('p95_ms', ascending=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise page render traces against the latency budgets")
+    parser.add_argument('--traces', default=PROFILE_TRACE_PATH, help="Trace file written by the app")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with status 1 if any page's p95 exceeds its budget")
+    args = parser.parse_args()
+
+    summary = summarize_traces(args.traces)
+    if summary.empty:
+        print(f"No traces in {args.traces}; run the app with EXERCISE_LOG_PROFILE=1")
+        return
+    print(summary.to_string(index=False))
+
+    over = summary[summary['budget_ms'].notna() & (summary['p95_ms'] > summary['budget_ms'])]
+    for _, row in over.iterrows():
+        print(f"{row['page']}: p95 {row['p95_ms']} ms is over its {row['budget_ms']:.0f} ms budget")
+    if args.check and not over.empty:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
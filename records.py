@@ -0,0 +1,221 @@
+# records.py
+import json
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from database import build_compact_query, build_exercises_query, epoch_day
+from storage import connect_db
+
+# Lightweight read API: rows come straight from the cursor into compact records,
+# without building DataFrames. Use it for pages that only iterate over rows.
+
+_UNSET = object()
+
+class ExerciseRecord:
+    """One exercise session; the JSON set columns are decoded on first access."""
+
+    __slots__ = (
+        'id', 'family_member', 'date', 'exercise_type', 'sets',
+        '_reps_json', '_seconds_json', 'notes', 'feeling', 'created_at',
+        '_reps', '_seconds'
+    )
+
+    COLUMNS = (
+        'id, family_member, date, exercise_type, sets, '
+        'reps_per_set, seconds_per_set, notes, feeling, created_at'
+    )
+
+    def __init__(self, id, family_member, date, exercise_type, sets,
+                 reps_json, seconds_json, notes, feeling, created_at):
+        self.id = id
+        self.family_member = family_member
+        self.date = date
+        self.exercise_type = exercise_type
+        self.sets = sets
+        self._reps_json = reps_json
+        self._seconds_json = seconds_json
+        self.notes = notes
+        self.feeling = feeling
+        self.created_at = created_at
+        self._reps = _UNSET
+        self._seconds = _UNSET
+
+    @property
+    def reps_per_set(self) -> Optional[List[int]]:
+        if self._reps is _UNSET:
+            self._reps = json.loads(self._reps_json) if self._reps_json else None
+        return self._reps
+
+    @property
+    def seconds_per_set(self) -> Optional[List[int]]:
+        if self._seconds is _UNSET:
+            self._seconds = json.loads(self._seconds_json) if self._seconds_json else None
+        return self._seconds
+
+    def __repr__(self):
+        return (f"ExerciseRecord(id={self.id}, family_member={self.family_member!r}, "
+                f"date={self.date!r}, exercise_type={self.exercise_type!r})")
+
+class Goal(NamedTuple):
+    id: int
+    family_member: str
+    exercise_type: str
+    goal_type: str
+    target_value: float
+    current_value: float
+    start_date: str
+    target_date: Optional[str]
+    status: str
+    description: Optional[str]
+    achievement_date: Optional[str]
+    created_at: str
+    updated_at: str
+
+class GoalProgress(NamedTuple):
+    id: int
+    goal_id: int
+    date: str
+    value: float
+    notes: Optional[str]
+    created_at: str
+
+class PersonalBest(NamedTuple):
+    id: int
+    family_member: str
+    exercise_type: str
+    measurement_type: str
+    value: float
+    date: str
+    created_at: str
+
+class Achievement(NamedTuple):
+    id: int
+    goal_id: Optional[int]
+    family_member: str
+    achievement_date: str
+    exercise_type: str
+    goal_type: str
+    target_value: float
+    achieved_value: float
+    description: Optional[str]
+    notes: Optional[str]
+    created_at: str
+
+def _columns(record_type) -> str:
+    return ', '.join(record_type._fields)
+
+def fetch_exercises(
+    family_member: Optional[str] = None,
+    start_date: Optional[Union[str, date]] = None,
+    end_date: Optional[Union[str, date]] = None,
+    exercise_type: Optional[str] = None
+) -> List[ExerciseRecord]:
+    """Exercise sessions with optional filtering, newest first."""
+    conn = connect_db()
+    query, params = build_exercises_query(
+        conn, family_member, start_date, end_date, exercise_type,
+        columns=ExerciseRecord.COLUMNS
+    )
+    records = [ExerciseRecord(*row) for row in conn.execute(query, params)]
+    conn.close()
+    return records
+
+def fetch_goals(
+    family_member: Optional[str] = None,
+    status: str = 'active'
+) -> List[Goal]:
+    """Goals with optional filtering."""
+    conn = connect_db()
+
+    where = ' AND r.status = ?'
+    params = [status]
+
+    if family_member:
+        where += ' AND r.member_id = (SELECT id FROM members WHERE name = ?)'
+        params.append(family_member)
+
+    query = build_compact_query('goals', where, _columns(Goal))
+    records = [Goal(*row) for row in conn.execute(query, params)]
+    conn.close()
+    return records
+
+def count_goals(status: str = 'active') -> int:
+    """Number of goals with the given status."""
+    conn = connect_db()
+    count = conn.execute('SELECT COUNT(*) FROM goals_data WHERE status = ?', (status,)).fetchone()[0]
+    conn.close()
+    return count
+
+def fetch_goal_progress(goal_id: int) -> List[GoalProgress]:
+    """Progress history for one goal, oldest first."""
+    conn = connect_db()
+    records = [GoalProgress(*row) for row in conn.execute(f'''
+        SELECT {_columns(GoalProgress)} FROM goal_progress
+        WHERE goal_id = ?
+        ORDER BY date
+    ''', (goal_id,))]
+    conn.close()
+    return records
+
+def fetch_personal_bests(
+    family_member: Optional[str] = None,
+    exercise_type: Optional[str] = None
+) -> List[PersonalBest]:
+    """Current personal bests with optional filtering."""
+    conn = connect_db()
+
+    where = ''
+    params = []
+
+    if family_member:
+        where += ' AND r.member_id = (SELECT id FROM members WHERE name = ?)'
+        params.append(family_member)
+    if exercise_type:
+        where += ' AND r.exercise_type_id = (SELECT id FROM exercise_types WHERE name = ?)'
+        params.append(exercise_type)
+
+    query = build_compact_query('personal_bests', where, _columns(PersonalBest))
+    records = [PersonalBest(*row) for row in conn.execute(query, params)]
+    conn.close()
+    return records
+
+def fetch_recent_achievements(days: int = 30) -> List[Achievement]:
+    """Achievements within the last `days` days, newest first."""
+    conn = connect_db()
+    query = build_compact_query(
+        'achievements', ' AND r.achievement_day >= ?', _columns(Achievement)
+    ) + ' ORDER BY achievement_date DESC, created_at DESC'
+    since = epoch_day(date.today() - timedelta(days=days))
+    records = [Achievement(*row) for row in conn.execute(query, (since,))]
+    conn.close()
+    return records
+
+def fetch_achievements_summary(family_member: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Achievement summary statistics per family member."""
+    conn = connect_db()
+
+    query = '''
+        SELECT family_member,
+               COUNT(*),
+               COUNT(DISTINCT exercise_type),
+               COUNT(DISTINCT date(achievement_date)),
+               MAX(achievement_date)
+        FROM achievements
+    '''
+    params = []
+    if family_member:
+        query += ' WHERE family_member = ?'
+        params.append(family_member)
+    query += ' GROUP BY family_member'
+
+    summary = {
+        member: {
+            'total_achievements': total,
+            'unique_exercises': unique_exercises,
+            'achievement_days': achievement_days,
+            'last_achievement': last_achievement
+        }
+        for member, total, unique_exercises, achievement_days, last_achievement
+        in conn.execute(query, params)
+    }
+    conn.close()
+    return summary
@@ -0,0 +1,215 @@
+# replica.py
+import argparse
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from database import CHANGELOG_TABLES, prune_changelog, refresh_derived_tables
+from storage import connect_db, get_db_path
+
+# Session tables whose changes move the derived tables
+SESSION_TABLES = ('exercises_data', 'exercises_archive_data')
+
+class ExerciseLogReplica:
+    """
+    Keep a read-only copy of the exercise log current from the primary's changelog.
+
+    The changelog carries the log itself (CHANGELOG_TABLES). Tables derived
+    from it, such as archive_state, the leaderboard, period and lifetime
+    totals and the heatmaps, are not captured: after applying each batch the
+    replica recomputes them for the sessions the batch touched.
+    """
+
+    def __init__(self, replica_path, source_path=None, name=None, batch_size=500):
+        self.source_path = source_path or get_db_path()
+        self.replica_path = replica_path
+        self.name = name or os.path.splitext(os.path.basename(replica_path))[0]
+        self.batch_size = batch_size
+
+    def seed(self):
+        """Create the replica from a consistent snapshot of the primary"""
+        os.makedirs(os.path.dirname(self.replica_path) or '.', exist_ok=True)
+
+        # Register before the snapshot, so changes made after it are kept for us
+        self._acknowledge(self._high_water_mark())
+
+        source = connect_db(self.source_path)
+        replica = sqlite3.connect(self.replica_path)
+        try:
+            source.backup(replica)
+
+            # The snapshot already contains every change up to its high-water mark
+            last_seq = self._high_water_mark(replica)
+
+            # Replicas only apply changes, they don't capture their own
+            for table in CHANGELOG_TABLES:
+                for event in ('insert', 'update', 'delete'):
+                    replica.execute(f'DROP TRIGGER IF EXISTS {table}_cdc_{event}')
+            replica.execute('DELETE FROM changelog')
+            replica.execute('DELETE FROM replica_acks')
+            replica.execute('''
+                CREATE TABLE IF NOT EXISTS replica_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    source_path TEXT NOT NULL,
+                    last_seq INTEGER NOT NULL,
+                    synced_at TIMESTAMP
+                )
+            ''')
+            replica.execute('''
+                INSERT OR REPLACE INTO replica_state (id, source_path, last_seq, synced_at)
+                VALUES (1, ?, ?, ?)
+            ''', (self.source_path, last_seq, datetime.now().isoformat(timespec='seconds')))
+            replica.commit()
+        finally:
+            replica.close()
+            source.close()
+
+        self._acknowledge(last_seq)
+        return last_seq
+
+    def sync(self):
+        """Apply all pending changes in batches and return the number applied"""
+        if not os.path.exists(self.replica_path) or self._schema_changed():
+            self.seed()
+            return 0
+
+        source = connect_db(self.source_path, read_only=True)
+        replica = sqlite3.connect(self.replica_path)
+        applied = 0
+        try:
+            last_seq = replica.execute('SELECT last_seq FROM replica_state WHERE id = 1').fetchone()[0]
+
+            while True:
+                changes = source.execute('''
+                    SELECT seq, table_name, op, row_id, row_data
+                    FROM changelog
+                    WHERE seq > ?
+                    ORDER BY seq
+                    LIMIT ?
+                ''', (last_seq, self.batch_size)).fetchall()
+                if not changes:
+                    break
+
+                self._apply_batch(replica, changes)
+                last_seq = changes[-1][0]
+                replica.execute('''
+                    UPDATE replica_state SET last_seq = ?, synced_at = ? WHERE id = 1
+                ''', (last_seq, datetime.now().isoformat(timespec='seconds')))
+                replica.commit()
+                applied += len(changes)
+        except Exception as e:
+            replica.rollback()
+            raise e
+        finally:
+            replica.close()
+            source.close()
+
+        self._acknowledge(last_seq)
+        return applied
+
+    def _schema_changed(self):
+        """True when the primary has migrated past the replica's schema, which needs a reseed"""
+        source = connect_db(self.source_path, read_only=True)
+        replica = sqlite3.connect(self.replica_path)
+        try:
+            return (source.execute('PRAGMA user_version').fetchone()[0]
+                    != replica.execute('PRAGMA user_version').fetchone()[0])
+        finally:
+            replica.close()
+            source.close()
+
+    def _apply_batch(self, replica, changes):
+        """
+        Apply one batch of changelog rows, then recompute the derived tables
+        for the sessions it touched; only the last change per row matters.
+        """
+        latest = {}
+        for seq, table_name, op, row_id, row_data in changes:
+            latest[(table_name, row_id)] = (op, row_data)
+
+        # (member_id, exercise_type_id, day) of every session before and after the batch
+        sessions = []
+        archive_changed = False
+        for (table_name, row_id), (op, row_data) in latest.items():
+            if table_name not in SESSION_TABLES:
+                continue
+            archive_changed = archive_changed or table_name == 'exercises_archive_data'
+            old = replica.execute(
+                f'SELECT member_id, exercise_type_id, day FROM {table_name} WHERE id = ?', (row_id,)
+            ).fetchone()
+            if old:
+                sessions.append(tuple(old))
+            if op != 'D':
+                row = json.loads(row_data)
+                sessions.append((row['member_id'], row['exercise_type_id'], row['day']))
+
+        for (table_name, row_id), (op, row_data) in latest.items():
+            if op == 'D':
+                replica.execute(f'DELETE FROM {table_name} WHERE id = ?', (row_id,))
+                continue
+
+            row = json.loads(row_data)
+            columns = list(row)
+            placeholders = ', '.join('?' for _ in columns)
+            updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col != 'id')
+            replica.execute(f'''
+                INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})
+                ON CONFLICT(id) DO UPDATE SET {updates}
+            ''', [row[col] for col in columns])
+
+        refresh_derived_tables(replica.cursor(), sessions, archive_changed)
+
+    def _high_water_mark(self, conn=None):
+        """Sequence of the newest change captured, even if its entry was pruned"""
+        source = conn or connect_db(self.source_path, read_only=True)
+        try:
+            row = source.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changelog'").fetchone()
+            return row[0] if row else 0
+        finally:
+            if conn is None:
+                source.close()
+
+    def _acknowledge(self, last_seq):
+        """Record this replica's position on the primary and prune entries every replica has applied."""
+        source = connect_db(self.source_path)
+        try:
+            source.execute('''
+                INSERT INTO replica_acks (replica_name, last_seq) VALUES (?, ?)
+                ON CONFLICT(replica_name) DO UPDATE SET
+                    last_seq = excluded.last_seq,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (self.name, last_seq))
+            prune_changelog(source.cursor())
+            source.commit()
+        except Exception as e:
+            source.rollback()
+            raise e
+        finally:
+            source.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a replica of the exercise log up to date")
+    parser.add_argument('replica', help="Path of the replica database file")
+    parser.add_argument('--source', help="Primary database file (default: the configured database)")
+    parser.add_argument('--name', help="Replica name used for acknowledgements (default: file name)")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--reseed', action='store_true', help="Rebuild the replica from a fresh snapshot")
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help="Keep syncing at this interval instead of exiting")
+    args = parser.parse_args()
+
+    replica = ExerciseLogReplica(args.replica, args.source, args.name, args.batch_size)
+
+    if args.reseed or not os.path.exists(args.replica):
+        print(f"Seeded {args.replica} at sequence {replica.seed()}")
+
+    while True:
+        applied = replica.sync()
+        print(f"{datetime.now():%H:%M:%S} applied {applied} changes to {args.replica}")
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+if __name__ == "__main__":
+    main()
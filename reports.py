@@ -0,0 +1,232 @@
+# reports.py
+import argparse
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Optional
+import pandas as pd
+import plotly.express as px
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from database import build_compact_query, build_exercises_query, epoch_day
+from storage import connect_db, get_db_path
+
+TREND_WEEKS = 12
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{plotlyjs}
+<style>
+body {{ font-family: sans-serif; margin: 2em auto; max-width: 960px; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 1em; }}
+th, td {{ padding: 4px 10px; border-bottom: 1px solid #ddd; text-align: left; }}
+.metrics {{ display: flex; gap: 2em; }}
+.metric b {{ display: block; font-size: 1.6em; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+def open_read_only(db_path):
+    """Open the database read-only, so report workers can never take the write lock"""
+    return connect_db(db_path, read_only=True)
+
+def _session_totals(df):
+    """Add total reps and seconds per session from the JSON set columns"""
+    df['reps'] = df['reps_per_set'].apply(lambda x: sum(json.loads(x)) if isinstance(x, str) and x else 0)
+    df['seconds'] = df['seconds_per_set'].apply(lambda x: sum(json.loads(x)) if isinstance(x, str) and x else 0)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def _table(df, empty_message):
+    if df.empty:
+        return f"<p>{html.escape(empty_message)}</p>"
+    return df.to_html(index=False, border=0)
+
+def _chart(fig):
+    return fig.to_html(full_html=False, include_plotlyjs=False)
+
+def build_report(db_path, family_member, week_ending, output_dir, inline_js=False):
+    """
+    Write one weekly report, for a single member or (family_member=None) the
+    whole family, and return (path, seconds taken). Runs in a worker process.
+    """
+    started = time.perf_counter()
+    week_start = week_ending - timedelta(days=6)
+    trend_start = week_ending - timedelta(weeks=TREND_WEEKS) + timedelta(days=1)
+    member_filter = ' AND r.member_id = (SELECT id FROM members WHERE name = ?)' if family_member else ''
+    member_params = [family_member] if family_member else []
+
+    conn = open_read_only(db_path)
+    try:
+        query, params = build_exercises_query(
+            conn, family_member, trend_start.isoformat(), week_ending.isoformat()
+        )
+        sessions = _session_totals(pd.read_sql_query(query, conn, params=params))
+
+        personal_bests = pd.read_sql_query(
+            build_compact_query('personal_bests', member_filter,
+                                'family_member, exercise_type, measurement_type, value, date'),
+            conn, params=member_params
+        )
+
+        pb_events = pd.read_sql_query(f'''
+            SELECT family_member, exercise_type, measurement_type, value, previous_value, date
+            FROM personal_best_events
+            WHERE date BETWEEN ? AND ? {'AND family_member = ?' if family_member else ''}
+            ORDER BY date
+        ''', conn, params=[week_start.isoformat(), week_ending.isoformat()] + member_params)
+
+        goals = pd.read_sql_query(
+            build_compact_query(
+                'goals',
+                member_filter + " AND (r.status = 'active' OR r.achievement_day BETWEEN ? AND ?)",
+                'family_member, exercise_type, goal_type, description, current_value, '
+                'target_value, target_date, status, achievement_date'
+            ),
+            conn, params=member_params + [epoch_day(week_start), epoch_day(week_ending)]
+        )
+    finally:
+        conn.close()
+
+    this_week = sessions[sessions['date'] >= pd.Timestamp(week_start)]
+    previous_sessions = len(sessions[
+        (sessions['date'] >= pd.Timestamp(week_start - timedelta(days=7)))
+        & (sessions['date'] < pd.Timestamp(week_start))
+    ])
+    who = family_member or 'Family'
+    title = f"{who} - week of {week_start.isoformat()} to {week_ending.isoformat()}"
+    color = None if family_member else 'family_member'
+    parts = []
+
+    # Summary
+    metrics = {
+        'Sessions': f"{len(this_week)} ({len(this_week) - previous_sessions:+d} vs last week)",
+        'Active days': this_week['date'].nunique(),
+        'Total reps': int(this_week['reps'].sum()),
+        'Total time': f"{int(this_week['seconds'].sum())} s"
+    }
+    parts.append('<div class="metrics">' + ''.join(
+        f'<div class="metric"><b>{html.escape(str(value))}</b>{html.escape(name)}</div>'
+        for name, value in metrics.items()
+    ) + '</div>')
+
+    # This week's sessions by exercise
+    parts.append("<h2>This week</h2>")
+    group = ['family_member', 'exercise_type'] if not family_member else ['exercise_type']
+    by_exercise = this_week.groupby(group).agg(
+        sessions=('id', 'count'), total_reps=('reps', 'sum'), total_seconds=('seconds', 'sum')
+    ).reset_index()
+    parts.append(_table(by_exercise, "No sessions logged this week."))
+
+    if not this_week.empty:
+        daily = this_week.groupby(['date', 'exercise_type'] + ([color] if color else [])).agg(
+            reps=('reps', 'sum'), seconds=('seconds', 'sum')
+        ).reset_index()
+        daily['volume'] = daily['reps'] + daily['seconds']
+        parts.append(_chart(px.bar(
+            daily, x='date', y='volume', color=color or 'exercise_type',
+            hover_data=['exercise_type', 'reps', 'seconds'],
+            title="Daily volume (reps + seconds)"
+        )))
+
+    # Personal bests
+    parts.append("<h2>New personal bests</h2>")
+    parts.append(_table(pb_events, "No new personal bests this week."))
+    parts.append("<h2>Current personal bests</h2>")
+    parts.append(_table(personal_bests, "No personal bests recorded yet."))
+
+    # Goals
+    parts.append("<h2>Goals</h2>")
+    if not goals.empty:
+        goals['progress'] = (goals['current_value'] / goals['target_value'] * 100).round(1).astype(str) + '%'
+    parts.append(_table(goals, "No active goals."))
+
+    # Trend
+    if not sessions.empty:
+        weekly = sessions.assign(
+            week=sessions['date'].dt.to_period('W-' + week_ending.strftime('%a').upper()).dt.start_time
+        ).groupby(['week'] + ([color] if color else [])).size().reset_index(name='sessions')
+        parts.append(f"<h2>Last {TREND_WEEKS} weeks</h2>")
+        parts.append(_chart(px.line(
+            weekly, x='week', y='sessions', color=color, markers=True, title="Sessions per week"
+        )))
+
+    if inline_js:
+        plotlyjs = f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    else:
+        plotlyjs = f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{who.lower().replace(' ', '_')}.html")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(title), plotlyjs=plotlyjs, body='\n'.join(parts)))
+    os.replace(tmp_path, path)
+    return path, time.perf_counter() - started
+
+def report_jobs(db_paths, week_ending, reports_dir, members=None):
+    """One family report plus one report per member for every database (one family each)"""
+    jobs = []
+    families = set()
+    for db_path in db_paths:
+        family = os.path.splitext(os.path.basename(db_path))[0]
+        if family in families:
+            # Shards usually share a file name, so tell them apart by directory
+            family = f"{os.path.basename(os.path.dirname(os.path.abspath(db_path)))}_{family}"
+        families.add(family)
+        output_dir = os.path.join(reports_dir, family, week_ending.isoformat())
+        conn = open_read_only(db_path)
+        names = [row[0] for row in conn.execute('SELECT name FROM members ORDER BY name')]
+        conn.close()
+        jobs.append((db_path, None, output_dir))
+        jobs.extend((db_path, name, output_dir) for name in names if not members or name in members)
+    return jobs
+
+def generate_reports(db_paths, week_ending: Optional[date] = None, reports_dir='reports',
+                     members=None, workers=None, inline_js=False):
+    """Build every report in a process pool and return [(path, seconds)]"""
+    week_ending = week_ending or date.today()
+    jobs = report_jobs(db_paths, week_ending, reports_dir, members)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(build_report, db_path, member, week_ending, output_dir, inline_js)
+            for db_path, member, output_dir in jobs
+        ]
+        return [future.result() for future in as_completed(futures)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Write weekly HTML progress reports for each family member")
+    parser.add_argument('--db', action='append', dest='db_paths',
+                        help="Database file, one per family; repeat for sharded setups "
+                             "(default: the configured database)")
+    parser.add_argument('--week-ending', type=date.fromisoformat, default=date.today(),
+                        help="Last day of the reported week, YYYY-MM-DD (default today)")
+    parser.add_argument('--member', action='append', dest='members',
+                        help="Only report on this member (repeatable); the family report is always written")
+    parser.add_argument('--output', default='reports', help="Reports directory")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--inline-js', action='store_true',
+                        help="Embed plotly.js in every report instead of loading it from the CDN")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = generate_reports(
+        args.db_paths or [get_db_path()], args.week_ending, args.output,
+        args.members, args.workers, args.inline_js
+    )
+    for path, seconds in sorted(results):
+        print(f"{path} ({seconds:.2f}s)")
+    print(f"{len(results)} reports in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
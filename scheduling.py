@@ -0,0 +1,140 @@
+# scheduling.py
+import ctypes
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from database import get_write_generation
+
+# Linux ioprio_set(2) constants for dropping to the idle I/O class
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+SYS_IOPRIO_SET = {'x86_64': 251, 'aarch64': 30}
+
+def lower_io_priority():
+    """
+    Best effort: make the calling thread yield CPU and disk to interactive
+    work. Also usable as a process pool initializer, for the worker's thread.
+    """
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 10)
+    except (AttributeError, OSError):
+        pass
+
+    syscall_number = SYS_IOPRIO_SET.get(os.uname().machine) if hasattr(os, 'uname') else None
+    if sys.platform.startswith('linux') and syscall_number:
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.syscall(syscall_number, IOPRIO_WHO_PROCESS, tid,
+                         IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT)
+        except OSError:
+            pass
+
+def load_scheduler_status(status_path):
+    """Return the last status written by a scheduler, or an empty dict"""
+    if not os.path.exists(status_path):
+        return {}
+    try:
+        with open(status_path) as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+class IntervalScheduler(threading.Thread):
+    """
+    Run a job on an interval in a low-priority background thread, skipping
+    runs when nothing was written since the last one, and keep the outcome in
+    a JSON status file.
+
+    Subclasses implement run_job(), which returns extra status fields.
+    """
+
+    skipped_result = 'skipped: no changes since last run'
+
+    def __init__(self, name, interval_minutes, status_path):
+        super().__init__(name=name, daemon=True)
+        self.interval = interval_minutes * 60
+        self.status_path = status_path
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.force = False
+        self.status = load_scheduler_status(status_path) or {'runs': 0, 'skipped_runs': 0}
+
+    def run(self):
+        lower_io_priority()
+        while not self.stopping.is_set():
+            self.run_once(force=self.force)
+            self.force = False
+            self._update_status(
+                next_run=(datetime.now() + timedelta(seconds=self.interval)).isoformat(timespec='seconds')
+            )
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+
+    def run_now(self):
+        """Ask the scheduler thread to run the job as soon as possible, even if nothing changed"""
+        self.force = True
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def run_once(self, force=False, **options):
+        """Run the job once unless nothing was written since the last run"""
+        try:
+            generation = get_write_generation()
+        except Exception as e:
+            self._update_status(state='idle', last_error=str(e))
+            return
+
+        if not force and generation == self.status.get('last_generation'):
+            self._update_status(
+                last_checked=datetime.now().isoformat(timespec='seconds'),
+                last_result=self.skipped_result,
+                skipped_runs=self.status.get('skipped_runs', 0) + 1
+            )
+            return
+
+        started = time.perf_counter()
+        self._update_status(state='running', started=datetime.now().isoformat(timespec='seconds'))
+        try:
+            changes = self.run_job(**options)
+        except Exception as e:
+            self._update_status(
+                state='idle',
+                last_checked=datetime.now().isoformat(timespec='seconds'),
+                last_result='failed',
+                last_error=''.join(traceback.format_exception_only(type(e), e)).strip()
+            )
+            return
+
+        now = datetime.now().isoformat(timespec='seconds')
+        self._update_status(**{
+            'state': 'idle',
+            'last_run': now,
+            'last_checked': now,
+            'last_result': 'ok',
+            'last_error': None,
+            'last_duration': round(time.perf_counter() - started, 2),
+            'last_generation': generation,
+            'runs': self.status.get('runs', 0) + 1,
+            **changes
+        })
+
+    def run_job(self, **options) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _update_status(self, **changes):
+        self.status.update(changes)
+        os.makedirs(os.path.dirname(self.status_path) or '.', exist_ok=True)
+        tmp_path = self.status_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.status, f, indent=2)
+        os.replace(tmp_path, self.status_path)
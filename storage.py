@@ -0,0 +1,138 @@
+# storage.py
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from config import DB_PATH, DB_TEMPLATE_PATH
+
+# Where the exercise log database lives. Every module opens it through
+# connect_db(), so the location is set in one place: EXERCISE_LOG_DB in the
+# environment (see config.py), or set_db_path() / use_database() at runtime.
+#
+# Besides a file path, the location may be ':memory:' or 'memory:<name>': a
+# shared-cache in-memory database seen by every connection in this process.
+# This module keeps one connection to it open so it outlives the short-lived
+# connections the rest of the code opens. In-memory databases are meant for
+# tests and benchmarks; other processes (report workers, the replica and
+# maintenance CLIs) cannot see them, and shared-cache table locks fail at
+# once instead of waiting.
+
+MEMORY_PREFIX = 'memory:'
+
+_db_path = DB_PATH
+_memory_keepers: Dict[str, sqlite3.Connection] = {}
+_lock = threading.Lock()
+
+def get_db_path() -> str:
+    """The configured database location"""
+    return _db_path
+
+def is_in_memory(db_path: Optional[str] = None) -> bool:
+    """Whether a location (default: the configured one) is a shared in-memory database"""
+    db_path = db_path or _db_path
+    return db_path == ':memory:' or db_path.startswith(MEMORY_PREFIX)
+
+def _memory_uri(db_path: str) -> str:
+    name = 'exercise_log' if db_path == ':memory:' else db_path[len(MEMORY_PREFIX):]
+    return f'file:{name}?mode=memory&cache=shared'
+
+def connect_db(db_path: Optional[str] = None, read_only: bool = False, **kwargs) -> sqlite3.Connection:
+    """
+    Open the configured database, or db_path. Extra keyword arguments go to
+    sqlite3.connect. read_only connections can never take the write lock.
+    """
+    db_path = db_path or _db_path
+    if is_in_memory(db_path):
+        conn = sqlite3.connect(_memory_uri(db_path), uri=True, **kwargs)
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
+    if read_only:
+        return sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, **kwargs)
+    return sqlite3.connect(db_path, **kwargs)
+
+def ensure_db_directory(db_path: Optional[str] = None) -> None:
+    """Create the directory a database file goes in"""
+    db_path = db_path or _db_path
+    if not is_in_memory(db_path):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+
+def _keep_alive(db_path: str) -> bool:
+    """Hold a connection to an in-memory database; returns True if it was just created"""
+    with _lock:
+        if db_path in _memory_keepers:
+            return False
+        _memory_keepers[db_path] = sqlite3.connect(_memory_uri(db_path), uri=True, check_same_thread=False)
+        return True
+
+def drop_memory_database(db_path: str) -> None:
+    """Release an in-memory database; it is freed once its last connection closes"""
+    with _lock:
+        keeper = _memory_keepers.pop(db_path, None)
+    if keeper is not None:
+        keeper.close()
+
+def set_db_path(db_path: str, template_path: Optional[str] = None) -> None:
+    """
+    Point every module at another database. A new database (any in-memory
+    one, or a file that does not exist yet) starts as a copy of template_path
+    when that is given.
+    """
+    global _db_path
+    is_new = _keep_alive(db_path) if is_in_memory(db_path) else not os.path.exists(db_path)
+    if template_path and is_new:
+        clone_database(template_path, db_path)
+    _db_path = db_path
+
+def clone_database(template_path: str, db_path: Optional[str] = None) -> None:
+    """
+    Overwrite a database (default: the configured one) with a copy of a
+    template database. The copy goes page by page through the backup API,
+    which is much faster than running the migrations or replaying inserts.
+    """
+    db_path = db_path or _db_path
+    ensure_db_directory(db_path)
+    source = sqlite3.connect(f'file:{template_path}?mode=ro', uri=True)
+    target = connect_db(db_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+@contextmanager
+def use_database(db_path: str, template_path: Optional[str] = None):
+    """
+    Use another database inside the block, e.g. one per test:
+
+        with use_database('memory:test_goals', template_path='data/template.db'):
+            ...
+
+    An in-memory database created for the block is dropped afterwards.
+    """
+    previous = _db_path
+    created = is_in_memory(db_path) and db_path not in _memory_keepers
+    set_db_path(db_path, template_path)
+    try:
+        yield db_path
+    finally:
+        set_db_path(previous)
+        if created:
+            drop_memory_database(db_path)
+
+def create_template(template_path: str) -> str:
+    """
+    Create (or migrate) an empty database at template_path with the current
+    schema, for fixtures to clone instead of running every migration.
+    """
+    from database import init_db
+
+    with use_database(template_path):
+        ensure_db_directory()
+        init_db(progress=lambda message: None)
+    return template_path
+
+# A database configured through the environment is set up like any other
+if is_in_memory(DB_PATH) or DB_TEMPLATE_PATH:
+    set_db_path(DB_PATH, DB_TEMPLATE_PATH)